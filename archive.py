@@ -0,0 +1,215 @@
+import mmap
+import struct
+import zlib
+
+from traces import CARD_NONE, card_code
+
+MAGIC = b"MONOARC2"
+INDEX_ENTRY = struct.Struct("<qqQII")  # game id, seed, block offset, offset within the block, length
+FOOTER = struct.Struct("<QI8s")  # index offset, number of games, magic
+
+# Flags packed into the dice byte alongside the dice pair (0 = not rolled, 1-36 = rolled)
+IN_JAIL = 0x40
+HAS_CARD = 0x80
+
+
+def _write_varint(buffer, value):
+    """Appends an unsigned integer to the buffer, 7 bits per byte"""
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    """Returns the unsigned integer at the offset, and the offset following it"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value // 2 if not value & 1 else -(value + 1) // 2
+
+
+def encode_game(turns, board_size=40):
+    """
+    Packs a game's turns into bytes
+    Each turn is a (seat, die1, die2, position, cash, in_jail, card code) tuple.
+    Positions and cash are stored as changes from the same player's previous turn.
+    """
+    buffer = bytearray()
+    _write_varint(buffer, len(turns))
+    positions = {}
+    cash = {}
+    for seat, die1, die2, position, player_cash, in_jail, card in turns:
+        dice = (die1 - 1) * 6 + die2 if die1 else 0
+        flags = (IN_JAIL if in_jail else 0) | (HAS_CARD if card != CARD_NONE else 0)
+        buffer.append(seat)
+        buffer.append(dice | flags)
+        buffer.append((position - positions.get(seat, 0)) % board_size)
+        if card != CARD_NONE:
+            buffer.append(card)
+        _write_varint(buffer, _zigzag(player_cash - cash.get(seat, 0)))
+        positions[seat] = position
+        cash[seat] = player_cash
+    return bytes(buffer)
+
+
+def decode_game(data, board_size=40):
+    """Unpacks bytes written by encode_game() back into a list of turns"""
+    turn_count, offset = _read_varint(data, 0)
+    positions = {}
+    cash = {}
+    turns = []
+    for _ in range(turn_count):
+        seat, dice, delta = data[offset], data[offset + 1], data[offset + 2]
+        offset += 3
+        card = CARD_NONE
+        if dice & HAS_CARD:
+            card = data[offset]
+            offset += 1
+        change, offset = _read_varint(data, offset)
+
+        position = (positions.get(seat, 0) + delta) % board_size
+        player_cash = cash.get(seat, 0) + _unzigzag(change)
+        positions[seat] = position
+        cash[seat] = player_cash
+
+        in_jail = bool(dice & IN_JAIL)
+        dice &= ~(IN_JAIL | HAS_CARD)
+        die1, die2 = ((dice - 1) // 6 + 1, (dice - 1) % 6 + 1) if dice else (0, 0)
+        turns.append((seat, die1, die2, position, player_cash, in_jail, card))
+    return turns
+
+
+class ArchiveWriter:
+    """
+    Writes finished games to a compact, compressed archive file
+
+    Games are packed with encode_game() and compressed together in blocks of about block_size bytes.
+    An index of where each game is stored is written at the end of the file, so ArchiveReader can
+    jump straight to any game. Pass an instance to Game(trace=...) to archive games as they are played,
+    numbered in the order they finish, or add already finished games with add_game(). Call close() once done.
+    Game ids must be unique within an archive, seeds need not be.
+    """
+
+    def __init__(self, path, block_size=1 << 16):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.block_size = block_size
+        self.index = []
+        self._block = bytearray()
+        self._block_games = []  # (game id, seed, offset within the block, length)
+        self._game_ids = set()
+        self._next_game_id = 0  # One past the highest game id archived
+        self._turns = []
+
+    def record_turn(self, game, player):
+        """Called at the end of each player turn, before the dice are reset"""
+        self._turns.append(
+            (
+                player.seat,
+                player.dice.die1 or 0,
+                player.dice.die2 or 0,
+                player.position_id,
+                player.cash,
+                player.in_jail,
+                card_code(game.turn_card),
+            )
+        )
+
+    def record_game(self, game):
+        """Called once a game has finished"""
+        self.add_game(self._next_game_id, self._turns, game.seed if game.seed is not None else -1)
+        self._turns = []
+
+    def add_game(self, game_id, turns, seed=-1):
+        """Archives a game's turns, see encode_game() for their format"""
+        if game_id in self._game_ids:
+            raise ValueError(f"Game {game_id} is already in the archive")
+        self._game_ids.add(game_id)
+        self._next_game_id = max(self._next_game_id, game_id + 1)
+        data = encode_game(turns)
+        self._block_games.append((game_id, seed, len(self._block), len(data)))
+        self._block += data
+        if len(self._block) >= self.block_size:
+            self._flush_block()
+
+    def _flush_block(self):
+        if not self._block_games:
+            return
+        block_offset = self.file.tell()
+        self.file.write(zlib.compress(bytes(self._block)))
+        for game_id, seed, offset, length in self._block_games:
+            self.index.append((game_id, seed, block_offset, offset, length))
+        self._block = bytearray()
+        self._block_games = []
+
+    def close(self):
+        self._flush_block()
+        index_offset = self.file.tell()
+        for entry in self.index:
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.write(FOOTER.pack(index_offset, len(self.index), MAGIC))
+        self.file.close()
+
+
+class ArchiveReader:
+    """Random access to the games in an archive written by ArchiveWriter"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game archive")
+
+        index_offset, count, magic = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is incomplete, the archive was not closed")
+
+        self.index = {}
+        self.seeds = {}  # game id -> seed, -1 for unseeded games
+        block_offsets = []
+        for i in range(count):
+            game_id, seed, block_offset, offset, length = INDEX_ENTRY.unpack_from(
+                self.data, index_offset + i * INDEX_ENTRY.size
+            )
+            if game_id in self.index:
+                raise ValueError(f"{path} has game {game_id} more than once")
+            self.index[game_id] = (block_offset, offset, length)
+            self.seeds[game_id] = seed
+            block_offsets.append(block_offset)
+
+        # Each block runs up to the next one, the last up to the index
+        offsets = sorted(set(block_offsets)) + [index_offset]
+        self._block_ends = dict(zip(offsets, offsets[1:]))
+        self._cached_block = (None, None)
+
+    def games(self):
+        """Returns the ids of the archived games"""
+        return list(self.index)
+
+    def _block(self, block_offset):
+        if self._cached_block[0] != block_offset:
+            data = zlib.decompress(self.data[block_offset : self._block_ends[block_offset]])
+            self._cached_block = (block_offset, data)
+        return self._cached_block[1]
+
+    def read_game(self, game_id):
+        """Returns the turns of an archived game"""
+        block_offset, offset, length = self.index[game_id]
+        return decode_game(self._block(block_offset)[offset : offset + length])
+
+    def close(self):
+        self.data.close()
+        self.file.close()
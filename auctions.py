@@ -0,0 +1,31 @@
+SEALED_BID = "sealed"  # The highest bid wins and pays what it bid
+ASCENDING = "ascending"  # The highest bid wins and pays just over the second highest
+AUCTION_MODES = (SEALED_BID, ASCENDING)
+
+INCREMENT = 10  # The smallest raise in an ascending auction
+
+
+def resolve(bids, mode, increment=INCREMENT):
+    """
+    Returns the winner of an auction and the price they pay, or (None, 0) if nobody bid
+
+    bids is a list of (bidder, bid) pairs in bidding order, ties go to whoever bid first.
+    Every bidder is asked once for the most they will pay, so an auction costs one call per bidder.
+    An ascending auction is settled as if it had been called out from the increment, each bidder staying in
+    while the price is below their bid: the winner pays the second highest bid plus an increment, capped at their own.
+    """
+    if mode not in AUCTION_MODES:
+        raise ValueError(f"Unknown auction mode {mode!r}")
+
+    winner, highest, second = None, 0, 0
+    for bidder, bid in bids:
+        if bid > highest:
+            winner, highest, second = bidder, bid, highest
+        elif bid > second:
+            second = bid
+
+    if winner is None:
+        return None, 0
+    if mode == SEALED_BID:
+        return winner, highest
+    return winner, min(highest, second + increment)
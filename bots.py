@@ -0,0 +1,272 @@
+import itertools
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent import futures
+
+import main
+import properties
+
+# Bots speak JSON lines over stdin/stdout. The host writes batches of decision requests, a list per line:
+#   [{"id": 7, "decision": "leave_jail", "state": {...}}, {"id": 8, "decision": "buy", "state": {...}}]
+# and the bot answers each batch with a line holding a choice per request, in any order:
+#   [{"id": 8, "choice": true}, {"id": 7, "choice": "roll"}]
+#
+# Decisions and their choices:
+#   leave_jail - one of "card", "pay" or "roll"
+#   buy - true or false, state["landing"] is the position on offer
+#   build - a list of positions to build a house on, in order
+#   bid - the most to pay for state["landing"], which is being auctioned, 0 to not bid.
+#         The bids of every player a bot plays in an auction are requested together.
+#
+# The state holds the deciding player's seat, each player still in the game as
+# [seat, position, cash, in_jail, jail cards held], and the owner's seat and houses of every position.
+
+
+class BotProcess:
+    """
+    Runs a bot process and sends it the decisions of any number of RemotePlayers, from any number of threads
+
+    At most max_batches lines are sent ahead of the bot's answers. Requests made while the bot is busy
+    are queued and sent together as the next line, so concurrent games share round trips.
+    At most max_in_flight requests wait on the bot at a time, further requests block until there's room.
+    A request not answered within timeout seconds, or asked of a bot that has crashed,
+    gets no choice and the player falls back to DefaultPlayer.
+    """
+
+    def __init__(self, command, timeout=1.0, max_in_flight=64, max_batch=64, max_batches=2):
+        self.command = command
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self.max_batches = max_batches
+        self.batches = 0  # Lines written to the bot
+        self.requests = 0
+        self.fallbacks = 0  # Requests that fell back to DefaultPlayer
+
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1
+        )
+        self._ids = itertools.count()
+        self._pending = {}  # request id -> Future
+        self._queue = []
+        self._batches_in_flight = 0
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._condition = threading.Condition()
+        self.closed = False
+        self.crashed = False
+
+        threading.Thread(target=self._write, daemon=True).start()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _write(self):
+        while True:
+            with self._condition:
+                while (
+                    not self._queue or self._batches_in_flight >= self.max_batches
+                ) and not self.closed:
+                    self._condition.wait()
+                if self.closed:
+                    return
+                batch, self._queue = self._queue[: self.max_batch], self._queue[self.max_batch :]
+                self._batches_in_flight += 1
+
+            try:
+                self.process.stdin.write(json.dumps(batch, separators=(",", ":")) + "\n")
+                self.process.stdin.flush()
+            except (OSError, ValueError):
+                self._fail_pending()
+                return
+            self.batches += 1
+
+    def _read(self):
+        try:
+            for line in self.process.stdout:
+                for response in json.loads(line):
+                    self._resolve(response["id"], response.get("choice"))
+                with self._condition:
+                    self._batches_in_flight -= 1
+                    self._condition.notify_all()
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # A bot writing garbage is treated as crashed
+        self._fail_pending()
+
+    def _resolve(self, request_id, choice):
+        with self._condition:
+            future = self._pending.pop(request_id, None)
+        if future is not None:  # Otherwise the request already timed out
+            self._slots.release()
+            future.set_result(choice)
+
+    def _fail_pending(self):
+        with self._condition:
+            self.crashed = True
+            self.closed = True  # Stops the writer
+            self._condition.notify_all()
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            self._slots.release()
+            future.set_result(None)
+
+    def decide(self, decision, state):
+        """Asks the bot for a decision, returning its choice or None if it didn't make one in time"""
+        return self.decide_all([(decision, state)])[0]
+
+    def decide_all(self, requests):
+        """
+        Asks the bot for several decisions at once, as a list of (decision, state) pairs
+        They are queued together, so go to the bot in the same line unless there are more than max_batch.
+        Returns the choices in the same order, None for any not made in time.
+        """
+        self.requests += len(requests)
+        pending = []
+        for decision, state in requests:
+            if self.crashed or not self._slots.acquire(timeout=self.timeout):
+                pending.append(None)
+                continue
+            request_id = next(self._ids)
+            future = futures.Future()
+            pending.append((request_id, future))
+            with self._condition:
+                if self.crashed:
+                    self._slots.release()
+                    pending[-1] = None
+                    continue
+                self._pending[request_id] = future
+                self._queue.append({"id": request_id, "decision": decision, "state": state})
+        with self._condition:
+            self._condition.notify_all()
+
+        choices = []
+        deadline = time.monotonic() + self.timeout
+        for request in pending:
+            choice = None
+            if request is not None:
+                request_id, future = request
+                try:
+                    choice = future.result(max(0, deadline - time.monotonic()))
+                except futures.TimeoutError:
+                    with self._condition:
+                        timed_out = self._pending.pop(request_id, None) is not None
+                    if timed_out:
+                        self._slots.release()
+            if choice is None:
+                self.fallbacks += 1
+            choices.append(choice)
+        return choices
+
+    def player_class(self, name="RemotePlayer"):
+        """Returns a RemotePlayer class whose decisions are made by this bot"""
+        return type(name, (RemotePlayer,), {"bot": self})
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(self.timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class RemotePlayer(main.DefaultPlayer):
+    """A player whose decisions are made by a bot process, see BotProcess.player_class()"""
+
+    bot = None
+
+    def _state(self, **extra):
+        game = self.game
+        state = {
+            "seat": self.seat,
+            "players": [
+                [p.seat, p.position_id, p.cash, p.in_jail, len(p.get_out_of_jail_free_cards)]
+                for p in game.players
+            ],
+            "owners": [owner.seat if owner else None for owner in game.properties.owners],
+            "houses": list(game.properties.houses),
+        }
+        state.update(extra)
+        return state
+
+    def leave_jail_option(self):
+        choice = self.bot.decide("leave_jail", self._state())
+        board = self.game.board
+        if choice in (board.LEAVE_JAIL_PAY, board.LEAVE_JAIL_ROLL) or (
+            choice == board.LEAVE_JAIL_USE_CARD and self.get_out_of_jail_free_cards
+        ):
+            return choice
+        return super().leave_jail_option()
+
+    def buy_property_option(self, landing):
+        choice = self.bot.decide("buy", self._state(landing=self.position_id))
+        if isinstance(choice, bool):
+            return choice
+        return super().buy_property_option(landing)
+
+    def build_option(self):
+        choice = self.bot.decide("build", self._state())
+        if self._valid_builds(choice):
+            return choice
+        return super().build_option()
+
+    def bid_option(self, landing):
+        return self.bid_options([self], landing)[0]
+
+    @classmethod
+    def bid_options(cls, players, landing):
+        # The property on auction is the one the current player declined
+        position = players[0].game.current_player.position_id
+        choices = cls.bot.decide_all([("bid", player._state(landing=position)) for player in players])
+        return [
+            choice
+            if isinstance(choice, int) and not isinstance(choice, bool)
+            else main.DefaultPlayer.bid_option(player, landing)
+            for player, choice in zip(players, choices)
+        ]
+
+    def _valid_builds(self, positions):
+        """
+        Checks the bot asked for distinct positions that can all be built on now, and that it can pay for them
+        Building on one position never stops another that could be built on from being built on,
+        other than by running out of cash or of houses and hotels in the bank.
+        """
+        if not isinstance(positions, list) or not all(isinstance(p, int) for p in positions):
+            return False
+        if len(set(positions)) != len(positions):
+            return False
+        game_properties = self.game.properties
+        cost = houses = hotels = 0
+        for position in positions:
+            if not 0 <= position < len(game_properties.owners):
+                return False
+            if game_properties.owner(position) is not self or not game_properties.can_build(position):
+                return False
+            cost += self.game.board.landings[position].house_cost
+            if game_properties.houses[position] == properties.HOTEL - 1:
+                hotels += 1
+            else:
+                houses += 1
+        bank = self.game.bank
+        return cost <= self.cash and houses <= bank.houses and hotels <= bank.hotels
+
+
+def run_bot(strategy, stdin=None, stdout=None):
+    """
+    Serves decisions from a strategy function, for bots written in Python
+    The strategy is called with each request's decision and state, and returns the choice.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        responses = [
+            {"id": request["id"], "choice": strategy(request["decision"], request["state"])}
+            for request in json.loads(line)
+        ]
+        stdout.write(json.dumps(responses, separators=(",", ":")) + "\n")
+        stdout.flush()
@@ -0,0 +1,95 @@
+import time
+
+import main
+import stats
+
+DEFAULT_MOVE = "default"  # Replace a decision over the hard budget with DefaultPlayer's
+FORFEIT = "forfeit"  # A player going over the hard budget forfeits the game
+
+
+class DecisionBudget:
+    """
+    Times every decision a strategy makes, and holds strategies to a time budget per decision
+
+    Latencies are recorded per strategy class. A decision taking longer than soft seconds is counted,
+    one taking longer than hard seconds is also dealt with by the overrun policy, DEFAULT_MOVE or FORFEIT.
+    Strategies run in the game's thread so a slow decision can't be cut short, only overruled once it returns.
+    Bots run out of process with BotProcess can be, with its timeout.
+    """
+
+    def __init__(self, soft=None, hard=None, overrun=DEFAULT_MOVE, clock=time.perf_counter):
+        if overrun not in (DEFAULT_MOVE, FORFEIT):
+            raise ValueError(f"Unknown overrun policy {overrun!r}")
+        self.soft = soft
+        self.hard = hard
+        self.overrun = overrun
+        self.clock = clock
+        self.latencies = {}  # strategy name -> QuantileSketch of seconds per decision
+        self.latency_stats = {}  # strategy name -> RunningStats of seconds per decision
+        self.soft_overruns = {}  # strategy name -> count
+        self.hard_overruns = {}  # strategy name -> count
+
+    def decide(self, game, player, hook, args):
+        """Calls the player's decision hook, timing it and applying the budget"""
+        start = self.clock()
+        choice = getattr(player, hook)(*args)
+        elapsed = self.clock() - start
+
+        strategy = type(player).__name__
+        if strategy not in self.latencies:
+            self.latencies[strategy] = stats.QuantileSketch()
+            self.latency_stats[strategy] = stats.RunningStats()
+        self.latencies[strategy].push(elapsed)
+        self.latency_stats[strategy].push(elapsed)
+
+        if self.soft is not None and elapsed > self.soft:
+            self.soft_overruns[strategy] = self.soft_overruns.get(strategy, 0) + 1
+        if self.hard is not None and elapsed > self.hard:
+            self.hard_overruns[strategy] = self.hard_overruns.get(strategy, 0) + 1
+            main.log(f"Took {elapsed:.3f}s to decide {hook}, over the {self.hard}s budget")
+            if self.overrun == FORFEIT:
+                game.forfeit(player)
+            choice = getattr(main.DefaultPlayer, hook)(player, *args)
+
+        return choice
+
+    def merge(self, other):
+        """Combines the latencies recorded by another DecisionBudget into this one"""
+        for strategy, sketch in other.latencies.items():
+            if strategy not in self.latencies:
+                self.latencies[strategy] = stats.QuantileSketch()
+                self.latency_stats[strategy] = stats.RunningStats()
+            self.latencies[strategy].merge(sketch)
+            self.latency_stats[strategy].merge(other.latency_stats[strategy])
+        for mine, theirs in ((self.soft_overruns, other.soft_overruns), (self.hard_overruns, other.hard_overruns)):
+            for strategy, count in theirs.items():
+                mine[strategy] = mine.get(strategy, 0) + count
+
+    def report(self, players, wins):
+        """
+        Returns a row per strategy of its win rate, decisions made, p50/p99/max latency and overruns
+        players and wins are as given to and returned by SimulationJob
+        """
+        games = sum(wins.values())
+        seats = {}
+        for seat, (_, player_obj) in enumerate(players):
+            seats.setdefault(player_obj.__name__, []).append(seat)
+
+        rows = []
+        for strategy, strategy_seats in seats.items():
+            sketch = self.latencies.get(strategy, stats.QuantileSketch())
+            latency = self.latency_stats.get(strategy, stats.RunningStats())
+            rows.append(
+                {
+                    "strategy": strategy,
+                    "seats": len(strategy_seats),
+                    "win_rate": sum(wins.get(seat, 0) for seat in strategy_seats) / games if games else 0.0,
+                    "decisions": latency.count,
+                    "p50": sketch.quantile(0.5),
+                    "p99": sketch.quantile(0.99),
+                    "max": latency.max,
+                    "soft_overruns": self.soft_overruns.get(strategy, 0),
+                    "hard_overruns": self.hard_overruns.get(strategy, 0),
+                }
+            )
+        return rows
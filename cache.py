@@ -0,0 +1,147 @@
+import hashlib
+import inspect
+import os
+import pickle
+
+import auctions
+import bots
+import jobs
+import landings
+import ledger
+import main
+import properties
+import strategies
+
+
+_sources = {}  # (object, source file modified time) -> source
+
+
+def _source(obj):
+    """inspect.getsource(), remembered until the file it comes from is modified"""
+    key = (obj, os.stat(inspect.getsourcefile(obj)).st_mtime_ns)
+    if key not in _sources:
+        _sources[key] = inspect.getsource(obj)
+    return _sources[key]
+
+
+def rules_fingerprint():
+    """
+    Returns a hash of the source code defining the rules of the game
+    The board, the decks and everything the game does with them, including the turns and auctions
+    """
+    sources = [
+        _source(landings),
+        _source(auctions),
+        _source(properties),
+        _source(ledger),
+        _source(main.Dice),
+        _source(main.Board),
+        _source(main.Bank),
+        _source(main.Game),
+        _source(main.Turn),
+        _source(main.TerminationPolicy),
+        _source(main.Rules),
+    ]
+    return hashlib.sha256("\0".join(sources).encode()).hexdigest()
+
+
+def strategy_fingerprint(player_obj):
+    """
+    Returns a hash of the source code of a player class, and every class it inherits from
+    Classes made at run time have no source: a compiled strategy is hashed by its strategy,
+    and a bot's player class by the command running the bot
+    """
+    sources = []
+    for cls in player_obj.__mro__:
+        if cls is object:
+            continue
+        if isinstance(cls, strategies.StrategyType):
+            sources.append(cls.strategy)
+        elif isinstance(vars(cls).get("bot"), bots.BotProcess):
+            sources.append(repr(cls.bot.command))
+        else:
+            sources.append(_source(cls))
+    return hashlib.sha256("\0".join(sources).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Caches the results of runs of seeded games on disk
+
+    Results are keyed by the source of each strategy, any parameters, the rules of the game and the seeds,
+    so editing any of them means the old results are no longer found. Once the cache grows past max_bytes,
+    the least recently used results are removed.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, players, seeds, policy=None, params=None, rules=None):
+        """Returns the cache key for a run"""
+        policy = policy or main.TerminationPolicy()
+        parts = [
+            repr(rules or main.Rules()),
+            rules_fingerprint(),
+            repr([(name, strategy_fingerprint(player_obj)) for name, player_obj in players]),
+            repr(sorted((params or {}).items())),
+            repr((policy.max_turns, policy.win_probability)),
+            repr(list(seeds)),
+        ]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """Returns the cached result, or None if there isn't one"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+        # Mark the result as recently used
+        os.utime(path)
+        return result
+
+    def put(self, key, result):
+        path = self._path(key)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """Removes the least recently used results until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def run(self, players, seeds, policy=None, params=None, rules=None):
+        """
+        Returns the stats and win counts of playing every seed, from the cache if this run has been done before
+        Runs that are not cached are played as a SimulationJob, so an interrupted run picks up where it stopped
+        """
+        key = self.key(players, seeds, policy, params, rules)
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        job_path = os.path.join(self.directory, f"{key}.job")
+        result = jobs.SimulationJob(job_path, seeds, players, policy, rules=rules).run()
+        self.put(key, result)
+        os.remove(job_path)
+        return result
@@ -0,0 +1,151 @@
+import pickle
+import socket
+import struct
+import sys
+import threading
+
+import jobs
+import main
+import stats
+
+HEADER = struct.Struct("!I")  # Length of the pickled message that follows
+
+
+def send_message(sock, message):
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def recv_message(sock):
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return pickle.loads(_recv_exactly(sock, size))
+
+
+def merge_results(results):
+    """Merges (stats, wins) results, in the order given"""
+    merged_stats = stats.GameStats()
+    merged_wins = {}
+    for game_stats, wins in results:
+        merged_stats.merge(game_stats)
+        for seat, count in wins.items():
+            merged_wins[seat] = merged_wins.get(seat, 0) + count
+    return merged_stats, merged_wins
+
+
+class Coordinator:
+    """
+    Splits a range of seeds into shards and hands them out to workers connecting over TCP
+
+    A shard is sent back to the queue if its worker disconnects or takes longer than shard_timeout seconds,
+    and handed to the next worker to ask. Results are merged in shard order once all are in, so the
+    outcome is the same however the shards were scheduled.
+    Messages are pickled, only run workers on a network you trust.
+    """
+
+    def __init__(
+        self,
+        seeds,
+        players,
+        policy=None,
+        shard_size=100,
+        host="127.0.0.1",
+        port=0,
+        shard_timeout=None,
+    ):
+        self.players = players
+        self.policy = policy or main.TerminationPolicy()
+        self.shard_timeout = shard_timeout
+        self.shards = [seeds[i : i + shard_size] for i in range(0, len(seeds), shard_size)]
+        self.pending = list(range(len(self.shards)))
+        self.results = {}  # shard index -> (stats, wins)
+        self.retries = 0
+        self._condition = threading.Condition()
+
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+
+    @property
+    def finished(self):
+        return len(self.results) == len(self.shards)
+
+    def _next_shard(self):
+        """Waits for a shard to hand out, returning None once every shard has a result"""
+        with self._condition:
+            while not self.pending and not self.finished:
+                self._condition.wait()
+            return self.pending.pop(0) if self.pending else None
+
+    def _serve(self, connection):
+        with connection:
+            connection.settimeout(self.shard_timeout)
+            while True:
+                shard = self._next_shard()
+                if shard is None:
+                    try:
+                        send_message(connection, ("done",))
+                    except OSError:
+                        pass
+                    return
+
+                try:
+                    send_message(
+                        connection,
+                        ("shard", shard, self.shards[shard], self.players, self.policy),
+                    )
+                    _, _, result = recv_message(connection)
+                except (OSError, ConnectionError, EOFError, pickle.UnpicklingError):
+                    with self._condition:
+                        # Hand the shard to another worker
+                        self.pending.insert(0, shard)
+                        self.retries += 1
+                        self._condition.notify_all()
+                    return
+
+                with self._condition:
+                    self.results[shard] = result
+                    self._condition.notify_all()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return  # The server was closed
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def run(self):
+        """Waits for workers to complete every shard, returning the merged stats and win counts"""
+        threading.Thread(target=self._accept, daemon=True).start()
+        with self._condition:
+            while not self.finished:
+                self._condition.wait()
+        self.server.close()
+        return merge_results(self.results[shard] for shard in range(len(self.shards)))
+
+
+def run_worker(host, port):
+    """Connects to a coordinator and plays the shards it hands out until it says it is done"""
+    with socket.create_connection((host, port)) as connection:
+        while True:
+            message = recv_message(connection)
+            if message[0] == "done":
+                return
+
+            _, shard, seeds, players, policy = message
+            result = jobs.SimulationJob(None, seeds, players, policy).run()
+            send_message(connection, ("result", shard, result))
+
+
+if __name__ == "__main__":
+    # python cluster.py HOST PORT
+    run_worker(sys.argv[1], int(sys.argv[2]))
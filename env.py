@@ -0,0 +1,148 @@
+try:
+    import numpy
+except ImportError:  # numpy is only needed for the environment's observation arrays
+    numpy = None
+
+import main
+
+# The decisions the agent makes each step, indexed by action: how to leave jail, and whether to buy
+ACTIONS = [
+    (main.Board.LEAVE_JAIL_ROLL, False),
+    (main.Board.LEAVE_JAIL_PAY, False),
+    (main.Board.LEAVE_JAIL_USE_CARD, False),
+    (main.Board.LEAVE_JAIL_ROLL, True),
+    (main.Board.LEAVE_JAIL_PAY, True),
+    (main.Board.LEAVE_JAIL_USE_CARD, True),
+]
+
+
+class AgentPlayer(main.DefaultPlayer):
+    """
+    A player whose jail and buying decisions are the action set by the environment before its turn
+    Choosing to use a card without one rolls instead. Building is left to DefaultPlayer.
+    """
+
+    action = 0
+
+    def leave_jail_option(self):
+        option, _ = ACTIONS[self.action]
+        if option == self.game.board.LEAVE_JAIL_USE_CARD and not self.get_out_of_jail_free_cards:
+            return self.game.board.LEAVE_JAIL_ROLL
+        return option
+
+    def buy_property_option(self, landing):
+        _, buy = ACTIONS[self.action]
+        return buy
+
+
+class VectorEnv:
+    """
+    Plays a batch of games for training a bot, one agent turn per game at a time
+
+    The agent sits in the first seat of every game, against the opponents given as (name, player class) pairs.
+    step() plays the agent's turn in every game with its action, then the opponents' turns up to the agent's next.
+    The reward is the change in the agent's share of the net worth in the game, so a won game has
+    paid out 1 in total and a lost one 0, less the share the agent started with.
+    A game is done once the agent wins, goes bankrupt or the termination policy stops it. It is then
+    reset with the next unused seed, and the observations returned are for the new game.
+
+    Observations are a dict of (games, seats) arrays, updated in place by the next step.
+    """
+
+    def __init__(self, num_games, opponents=None, policy=None, rules=None):
+        if numpy is None:
+            raise ImportError("The environment requires numpy")
+
+        self.num_games = num_games
+        self.opponents = opponents or [(f"Opponent{i}", main.DefaultPlayer) for i in range(1, 4)]
+        self.policy = policy or main.TerminationPolicy(max_turns=1000)
+        self.rules = rules
+        self.games = [None] * num_games
+        self.shares = numpy.zeros(num_games)  # The agent's share of the net worth after its last step
+        self.next_seed = None
+
+        seats = 1 + len(self.opponents)
+        self.observations = {
+            "position": numpy.zeros((num_games, seats), "<i1"),
+            "cash": numpy.zeros((num_games, seats), "<i4"),
+            "in_jail": numpy.zeros((num_games, seats), "|b1"),
+            "cards": numpy.zeros((num_games, seats), "<i1"),  # Get out of jail free cards held
+            "bankrupt": numpy.zeros((num_games, seats), "|b1"),
+        }
+
+    def _new_game(self, index, seed):
+        game = main.Game(seed=seed, rules=self.rules)
+        game.add_player("Agent", AgentPlayer)
+        for name, player_obj in self.opponents:
+            game.add_player(name, player_obj)
+        self.games[index] = game
+        self.shares[index] = self._share(game)
+        self._observe(index)
+
+    @staticmethod
+    def _share(game):
+        agent = game.players[0] if game.players[0].seat == 0 else None
+        if agent is None:
+            return 0.0
+        total = sum(game.net_worth(p) for p in game.players)
+        return game.net_worth(agent) / total if total else 1 / len(game.players)
+
+    def _observe(self, index):
+        game = self.games[index]
+        observations = self.observations
+        for player in game.players + game.eliminated:
+            seat = player.seat
+            observations["position"][index, seat] = player.position_id
+            observations["cash"][index, seat] = player.cash
+            observations["in_jail"][index, seat] = player.in_jail
+            observations["cards"][index, seat] = len(player.get_out_of_jail_free_cards)
+            observations["bankrupt"][index, seat] = player.bankrupt
+
+    def reset(self, seeds):
+        """Starts a game for each seed, returning the observations"""
+        if len(seeds) != self.num_games:
+            raise ValueError(f"Expected {self.num_games} seeds, got {len(seeds)}")
+
+        with main.logger.disabled():
+            for index, seed in enumerate(seeds):
+                self._new_game(index, seed)
+
+        self.next_seed = max(seeds) + 1
+        return self.observations
+
+    def _play(self, game, action):
+        """Plays the agent's turn and the opponents' turns after it, returning True once the game is done"""
+        agent = game.players[0]
+        agent.action = action
+        game.take_turn(agent)
+        while not agent.bankrupt and not game.winner:
+            if self.policy.should_stop(game):
+                return True
+            player = game.next_player
+            if player is agent:
+                return False
+            game.take_turn(player)
+        return True
+
+    def step(self, actions):
+        """
+        Plays one agent turn in every game, with the action at the same index
+        Returns the observations, the rewards and which games finished, as arrays
+        """
+        rewards = numpy.zeros(self.num_games)
+        dones = numpy.zeros(self.num_games, "|b1")
+
+        with main.logger.disabled():
+            for index, game in enumerate(self.games):
+                dones[index] = self._play(game, int(actions[index]))
+                share = self._share(game)
+                rewards[index] = share - self.shares[index]
+                self.shares[index] = share
+
+                if dones[index]:
+                    self._new_game(index, self.next_seed)
+                    self.next_seed += 1
+                else:
+                    self._observe(index)
+
+        return self.observations, rewards, dones
@@ -0,0 +1,89 @@
+from typing import Any, NamedTuple
+
+
+class Rolled(NamedTuple):
+    """A player rolled the dice, to move or to try to leave jail"""
+
+    player: Any
+    die1: int
+    die2: int
+
+
+class Moved(NamedTuple):
+    """A player's piece landed on a position, by dice or by card"""
+
+    player: Any
+    position_id: int
+    backwards: bool
+
+
+class PassedGo(NamedTuple):
+    player: Any
+
+
+class CardDrawn(NamedTuple):
+    player: Any
+    card: Any
+
+
+class Payment(NamedTuple):
+    """Money changed hands, payer and payee are players or the bank"""
+
+    payer: Any
+    payee: Any
+    amount: int
+
+
+class JailEntered(NamedTuple):
+    player: Any
+
+
+class JailExited(NamedTuple):
+    """A player left jail, option is how, one of the Board.LEAVE_JAIL_* options"""
+
+    player: Any
+    option: str
+
+
+class Traded(NamedTuple):
+    """A player accepted another's trade, see trading.Trade"""
+
+    trade: Any
+
+
+class AuctionWon(NamedTuple):
+    """A player won an auction for a property, paying price to the bank"""
+
+    player: Any
+    position_id: int
+    price: int
+
+
+EVENT_TYPES = (Rolled, Moved, PassedGo, CardDrawn, Payment, JailEntered, JailExited, Traded, AuctionWon)
+
+
+class EventBus:
+    """
+    Calls the handlers subscribed to each type of game event
+
+    Each type's handlers are kept in a tuple, rebuilt whenever someone subscribes or unsubscribes.
+    The game checks the tuple before building an event, so an event nobody listens to costs a lookup.
+    Handlers are called in the order they subscribed, with the event as their only argument.
+    """
+
+    def __init__(self):
+        self.handlers = {event_type: () for event_type in EVENT_TYPES}
+
+    def subscribe(self, event_type, handler):
+        if event_type not in self.handlers:
+            raise ValueError(f"{event_type} is not a game event")
+        self.handlers[event_type] += (handler,)
+
+    def unsubscribe(self, event_type, handler):
+        handlers = list(self.handlers[event_type])
+        handlers.remove(handler)
+        self.handlers[event_type] = tuple(handlers)
+
+    def emit(self, event):
+        for handler in self.handlers[type(event)]:
+            handler(event)
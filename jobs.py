@@ -0,0 +1,139 @@
+import os
+import pickle
+
+import main
+import stats
+
+
+class SimulationJob:
+    """
+    Runs a range of seeded games, checkpointing progress to a file so a stopped job resumes where it left off
+
+    The checkpoint holds the next seed to start, the stats and win counts of the games finished so far,
+    and a snapshot of the game in progress. Games only draw on their own seeded random generator,
+    so a resumed job gives exactly the same results as one that was never stopped.
+    players is a list of (name, player class) pairs, added to every game in order.
+    Pass path=None to run without checkpoints, rules to play with house rules
+    and a DecisionBudget to time the players' decisions.
+    """
+
+    def __init__(
+        self,
+        path,
+        seeds,
+        players,
+        policy=None,
+        checkpoint_games=100,
+        checkpoint_turns=1000,
+        rules=None,
+        budget=None,
+    ):
+        self.path = path
+        self.seeds = seeds
+        self.players = players
+        self.policy = policy or main.TerminationPolicy()
+        self.checkpoint_games = checkpoint_games
+        self.checkpoint_turns = checkpoint_turns
+        self.rules = rules
+        self.budget = budget
+
+        self.next_seed_index = 0
+        self.stats = stats.GameStats()
+        self.wins = {}  # winning seat -> number of games won
+        self.game = None  # The game in progress
+        self._load()
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            checkpoint = pickle.load(f)
+        if checkpoint["seeds"] != self.seeds:
+            raise ValueError(f"{self.path} is a checkpoint for a different range of seeds")
+        for name, value in self._setup().items():
+            if checkpoint["setup"][name] != value:
+                raise ValueError(f"{self.path} is a checkpoint for different {name}")
+
+        self.next_seed_index = checkpoint["next_seed_index"]
+        self.stats = checkpoint["stats"]
+        self.wins = checkpoint["wins"]
+        self.game = checkpoint["game"]
+        if self.budget is not None:
+            # The decisions timed before the checkpoint go into the budget passed in, which the game carries on with
+            self.budget.merge(checkpoint["budget"])
+            if self.game is not None:
+                self.game.budget = self.budget
+
+    def _setup(self):
+        """Returns what the results depend on other than the seeds, which a checkpoint must have been run with"""
+        budget = self.budget
+        return {
+            "players": list(self.players),
+            "policy": (self.policy.max_turns, self.policy.win_probability),
+            "rules": self.rules or main.Rules(),
+            "budget": None if budget is None else (budget.soft, budget.hard, budget.overrun),
+        }
+
+    def checkpoint(self):
+        """Saves progress, replacing the previous checkpoint only once the new one is fully written"""
+        if self.path is None:
+            return
+        checkpoint = {
+            "seeds": self.seeds,
+            "setup": self._setup(),
+            "next_seed_index": self.next_seed_index,
+            "stats": self.stats,
+            "wins": self.wins,
+            "budget": self.budget,
+            # The game holds a reference to self.stats and self.budget, pickling them together keeps it
+            "game": self.game,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    @property
+    def done(self):
+        return self.game is None and self.next_seed_index == len(self.seeds)
+
+    def _new_game(self, seed, finished=None):
+        """Starts the game for a seed, resetting a finished game in place if there is one"""
+        if finished is not None:
+            finished.reset(seed)
+            return finished
+        game = main.Game(seed=seed, stats=self.stats, rules=self.rules, budget=self.budget)
+        for name, player_obj in self.players:
+            game.add_player(name, player_obj)
+        return game
+
+    def run(self):
+        """Runs the remaining games, returning the stats and win counts for the whole range"""
+        with main.logger.disabled():
+            games_since_checkpoint = 0
+            finished = None
+            while not self.done:
+                if self.game is None:
+                    self.game = self._new_game(self.seeds[self.next_seed_index], finished)
+                    self.next_seed_index += 1
+
+                turns = 0
+                while not self.game.step(self.policy):
+                    turns += 1
+                    if turns % self.checkpoint_turns == 0:
+                        self.checkpoint()
+
+                winner = self.game.winner or self.policy.leader(self.game)
+                self.wins[winner.seat] = self.wins.get(winner.seat, 0) + 1
+                finished, self.game = self.game, None
+
+                games_since_checkpoint += 1
+                if games_since_checkpoint == self.checkpoint_games:
+                    self.checkpoint()
+                    games_since_checkpoint = 0
+
+            self.checkpoint()
+
+        return self.stats, self.wins
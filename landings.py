@@ -1,27 +1,91 @@
 import random
 
+# Kinds of board position, saying what happens on landing there
+PLAIN = 0  # Nothing happens, Go, Jail and Free Parking
+PROPERTY = 1
+CHANCE = 2
+COMMUNITY_CHEST = 3
+GO_TO_JAIL = 4
+TAX = 5
+
 
 class LandingsBase:
     """Base class for a Monopoly Board Position"""
 
+    kind = PLAIN
     name = None
     is_utility = False
     is_railroad = False
+    is_property = False
+    price = None
+    group = None
 
     def __str__(self):
         return f"<{self.name}>"
 
 
+class PropertyBase(LandingsBase):
+    """Base class for a Monopoly Board Position that can be bought and charges rent"""
+
+    # Color groups
+    BROWN = "Brown"
+    LIGHT_BLUE = "Light Blue"
+    PINK = "Pink"
+    ORANGE = "Orange"
+    RED = "Red"
+    YELLOW = "Yellow"
+    GREEN = "Green"
+    DARK_BLUE = "Dark Blue"
+    RAILROAD = "Railroad"
+    UTILITY = "Utility"
+
+    kind = PROPERTY
+    is_property = True
+    house_cost = None
+    rent = ()  # Rent with 0, 1, 2, 3 and 4 houses, followed by rent with a hotel
+
+
+class RailroadBase(PropertyBase):
+    """Base class for the railroads"""
+
+    is_railroad = True
+    price = 200
+    group = PropertyBase.RAILROAD
+    rent = (25, 50, 100, 200)  # Rent when the owner holds 1, 2, 3 or 4 railroads
+
+
+class UtilityBase(PropertyBase):
+    """Base class for the utilities"""
+
+    is_utility = True
+    price = 150
+    group = PropertyBase.UTILITY
+    rent = (4, 10)  # Dice total multiplier when the owner holds 1 or 2 utilities
+
+
 class DeckBase(LandingsBase):
     """Base class for Monopoly card sets"""
 
     name = None
     cards = []
 
-    def __init__(self, scramble=True):
+    def __init__(self, scramble=True, rng=random):
+        # Each deck gets its own copy of the cards, so card ownership is not shared between games.
+        # The class's cards are the template every copy is made from, in printed order.
+        self.all_cards = [CardBase(c.id, c.name, c.deck) for c in type(self).cards]
+        self.reset(scramble, rng)
+
+    def reset(self, scramble=True, rng=random):
+        """Gathers every card back into the pile, in printed order or shuffled, without making new cards"""
+        self.held = []  # Cards kept by players, out of the pile until they are used
+        for card in self.all_cards:
+            card.owner = None
         if scramble:
             # We don't scramble cards when we reload an old game.
-            self.cards = sorted(self.cards, key=lambda x: random.random())
+            random_value = rng.random
+            self.cards = sorted(self.all_cards, key=lambda x: random_value())
+        else:
+            self.cards = list(self.all_cards)
 
     def _get_top_card(self):
         """Returns the card on top of the pile"""
@@ -30,23 +94,24 @@ class DeckBase(LandingsBase):
     def place_card_at_bottom(self, card):
         """Place a card at the bottom of the pile"""
         card.owner = None
+        if card in self.held:
+            self.held.remove(card)
         self.cards.insert(0, card)
 
     def select_card(self):
         """Selects a card, placing the card at the bottom of the pile if the player does no keep the card"""
         card = self._get_top_card()
-
         if not card.id == self.GET_OUT_OF_JAIL_FREE:
             self.place_card_at_bottom(card)
+        else:
+            self.held.append(card)
 
         return card
 
 
 class CardBase:
 
-    id = None
-    name = None
-    owner = None
+    __slots__ = ("id", "name", "deck", "owner")
 
     def __init__(self, id_num, name, deck, owner=None):
         self.id = id_num
@@ -65,6 +130,7 @@ class CardBase:
 class Chance(DeckBase):
     """Class representing the Chance set of cards"""
 
+    kind = CHANCE
     ADVANCE_TO_GO = 0
     ADVANCE_TO_ILLINOIS = 1
     ADVANCE_TO_ST_CHARLES_PLACE = 2
@@ -152,6 +218,7 @@ class Chance(DeckBase):
 class CommunityChest(DeckBase):
     """Class representing the Community Chest set of cards"""
 
+    kind = COMMUNITY_CHEST
     ADVANCE_TO_GO = 0
     BANK_ERROR = 1
     DOCTOR_FEE = 2
@@ -210,139 +277,226 @@ class Go(LandingsBase):
     name = "Go"
 
 
-class MediterRaneanAvenue(LandingsBase):
+class MediterRaneanAvenue(PropertyBase):
     name = "Mediter-Ranean Avenue"
+    group = PropertyBase.BROWN
+    price = 60
+    house_cost = 50
+    rent = (2, 10, 30, 90, 160, 250)
 
 
-class BalticAvenue(LandingsBase):
+class BalticAvenue(PropertyBase):
     name = "Baltic Avenue"
+    group = PropertyBase.BROWN
+    price = 60
+    house_cost = 50
+    rent = (4, 20, 60, 180, 320, 450)
 
 
 class IncomeTax(LandingsBase):
+    kind = TAX
+    tax = 200
     name = "Income Tax"
 
 
-class ReadingRailroad(LandingsBase):
+class ReadingRailroad(RailroadBase):
     name = "Reading Railroad"
-    is_railroad = True
 
 
-class OrientalAvenue(LandingsBase):
+class OrientalAvenue(PropertyBase):
     name = "Oriental Avenue"
+    group = PropertyBase.LIGHT_BLUE
+    price = 100
+    house_cost = 50
+    rent = (6, 30, 90, 270, 400, 550)
 
 
-class VermontAvenue(LandingsBase):
+class VermontAvenue(PropertyBase):
     name = "Vermont Avenue"
+    group = PropertyBase.LIGHT_BLUE
+    price = 100
+    house_cost = 50
+    rent = (6, 30, 90, 270, 400, 550)
 
 
-class ConnecticutAvenue(LandingsBase):
+class ConnecticutAvenue(PropertyBase):
     name = "Connecticut Avenue"
+    group = PropertyBase.LIGHT_BLUE
+    price = 120
+    house_cost = 50
+    rent = (8, 40, 100, 300, 450, 600)
 
 
 class Jail(LandingsBase):
     name = "Jail"
 
 
-class StCharlesPlace(LandingsBase):
+class StCharlesPlace(PropertyBase):
     name = "St. Charles Place"
+    group = PropertyBase.PINK
+    price = 140
+    house_cost = 100
+    rent = (10, 50, 150, 450, 625, 750)
 
 
-class ElectricCompany(LandingsBase):
+class ElectricCompany(UtilityBase):
     name = "Electric Company"
-    is_utility = True
 
 
-class StatesAvenue(LandingsBase):
+class StatesAvenue(PropertyBase):
     name = "States Avenue"
+    group = PropertyBase.PINK
+    price = 140
+    house_cost = 100
+    rent = (10, 50, 150, 450, 625, 750)
 
 
-class VirginiaAvenue(LandingsBase):
+class VirginiaAvenue(PropertyBase):
     name = "Virginia Avenue"
+    group = PropertyBase.PINK
+    price = 160
+    house_cost = 100
+    rent = (12, 60, 180, 500, 700, 900)
 
 
-class PennsylvaniaRailroad(LandingsBase):
+class PennsylvaniaRailroad(RailroadBase):
     name = "Pennsylvania Railroad"
-    is_railroad = True
 
 
-class StJamesPlace(LandingsBase):
+class StJamesPlace(PropertyBase):
     name = "St. James Place"
+    group = PropertyBase.ORANGE
+    price = 180
+    house_cost = 100
+    rent = (14, 70, 200, 550, 750, 950)
 
 
-class TennesseeAvenue(LandingsBase):
+class TennesseeAvenue(PropertyBase):
     name = "Tennessee Avenue"
+    group = PropertyBase.ORANGE
+    price = 180
+    house_cost = 100
+    rent = (14, 70, 200, 550, 750, 950)
 
 
-class NewYorkAvenue(LandingsBase):
+class NewYorkAvenue(PropertyBase):
     name = "New York Avenue"
+    group = PropertyBase.ORANGE
+    price = 200
+    house_cost = 100
+    rent = (16, 80, 220, 600, 800, 1000)
 
 
 class FreeParking(LandingsBase):
     name = "Free Parking"
 
 
-class KentuckyAvenue(LandingsBase):
+class KentuckyAvenue(PropertyBase):
     name = "Kentucky Avenue"
+    group = PropertyBase.RED
+    price = 220
+    house_cost = 150
+    rent = (18, 90, 250, 700, 875, 1050)
 
 
-class IndianaAvenue(LandingsBase):
+class IndianaAvenue(PropertyBase):
     name = "Indiana Avenue"
+    group = PropertyBase.RED
+    price = 220
+    house_cost = 150
+    rent = (18, 90, 250, 700, 875, 1050)
 
 
-class IllinoisAvenue(LandingsBase):
+class IllinoisAvenue(PropertyBase):
     name = "Illinois Avenue"
+    group = PropertyBase.RED
+    price = 240
+    house_cost = 150
+    rent = (20, 100, 300, 750, 925, 1100)
 
 
-class BORailroad(LandingsBase):
+class BORailroad(RailroadBase):
     name = "B&O Railroad"
-    is_railroad = True
 
 
-class AtlanticAvenue(LandingsBase):
+class AtlanticAvenue(PropertyBase):
     name = "Atlantic Avenue"
+    group = PropertyBase.YELLOW
+    price = 260
+    house_cost = 150
+    rent = (22, 110, 330, 800, 975, 1150)
 
 
-class VentnorAvenue(LandingsBase):
+class VentnorAvenue(PropertyBase):
     name = "Ventnor Avenue"
+    group = PropertyBase.YELLOW
+    price = 260
+    house_cost = 150
+    rent = (22, 110, 330, 800, 975, 1150)
 
 
-class WaterWorks(LandingsBase):
+class WaterWorks(UtilityBase):
     name = "Water Works"
-    is_utility = True
 
 
-class MarvinGardens(LandingsBase):
+class MarvinGardens(PropertyBase):
     name = "Marvin Gardens"
+    group = PropertyBase.YELLOW
+    price = 280
+    house_cost = 150
+    rent = (24, 120, 360, 850, 1025, 1200)
 
 
 class GoToJail(LandingsBase):
+    kind = GO_TO_JAIL
     name = "Go To Jail"
 
 
-class PacificAvenue(LandingsBase):
+class PacificAvenue(PropertyBase):
     name = "Pacific Avenue"
+    group = PropertyBase.GREEN
+    price = 300
+    house_cost = 200
+    rent = (26, 130, 390, 900, 1100, 1275)
 
 
-class NorthCarolinaAvenue(LandingsBase):
+class NorthCarolinaAvenue(PropertyBase):
     name = "North Carolina Avenue"
+    group = PropertyBase.GREEN
+    price = 300
+    house_cost = 200
+    rent = (26, 130, 390, 900, 1100, 1275)
 
 
-class PennsylvaniaAvenue(LandingsBase):
+class PennsylvaniaAvenue(PropertyBase):
     name = "Pennsylvania Avenue"
+    group = PropertyBase.GREEN
+    price = 320
+    house_cost = 200
+    rent = (28, 150, 450, 1000, 1200, 1400)
 
 
-class ShortLine(LandingsBase):
+class ShortLine(RailroadBase):
     name = "Short Line"
-    is_railroad = True
 
 
-class ParkPlace(LandingsBase):
+class ParkPlace(PropertyBase):
     name = "Park Place"
+    group = PropertyBase.DARK_BLUE
+    price = 350
+    house_cost = 200
+    rent = (35, 175, 500, 1100, 1300, 1500)
 
 
 class LuxuryTax(LandingsBase):
+    kind = TAX
+    tax = 100
     name = "Luxury Tax"
 
 
-class Boardwalk(LandingsBase):
+class Boardwalk(PropertyBase):
     name = "Boardwalk"
+    group = PropertyBase.DARK_BLUE
+    price = 400
+    house_cost = 200
+    rent = (50, 200, 600, 1400, 1700, 2000)
@@ -0,0 +1,96 @@
+from array import array
+
+
+class InsufficientFunds(Exception):
+    """Raised when a batch of transfers would leave a player with negative cash"""
+
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls  # account -> amount they are short by
+        names = ", ".join(
+            f"{account.name} (short ${amount})" for account, amount in shortfalls.items()
+        )
+        super().__init__(f"Insufficient funds: {names}")
+
+
+class Ledger:
+    """
+    Moves cash between the bank and the players
+
+    Transfers are applied in batches: every payer in a batch is checked before any cash moves,
+    so a batch either applies in full or not at all, and a batch never creates or destroys money.
+    Pass journal=True to keep a record of every transfer, packed as integers.
+    """
+
+    BANK = 0  # Account number of the bank
+
+    def __init__(self, bank, journal=False):
+        self.accounts = [bank]
+        self._account_numbers = {bank: self.BANK}
+        self.journal = array("q") if journal else None
+        self.batch_count = 0
+
+    def reset(self):
+        """Forgets the transfers made so far, keeping the accounts open"""
+        if self.journal is not None:
+            del self.journal[:]
+        self.batch_count = 0
+
+    def open_account(self, account):
+        """Registers a player with the ledger, returning their account number"""
+        self._account_numbers[account] = len(self.accounts)
+        self.accounts.append(account)
+        return self._account_numbers[account]
+
+    def account_number(self, account):
+        return self._account_numbers[account]
+
+    def transfer_batch(self, transfers):
+        """
+        Applies a list of (payer, payee, amount) transfers as one atomic operation
+        Raises InsufficientFunds, without moving any cash, if a player cannot cover their net payments
+        """
+        balances = {}
+        for payer, payee, amount in transfers:
+            if amount < 0:
+                raise ValueError(f"Transfers must be positive, not ${amount}")
+            balances[payer] = balances.get(payer, 0) - amount
+            balances[payee] = balances.get(payee, 0) + amount
+
+        bank = self.accounts[self.BANK]
+        shortfalls = {
+            account: -(account.cash + change)
+            for account, change in balances.items()
+            if account is not bank and account.cash + change < 0
+        }
+        if shortfalls:
+            raise InsufficientFunds(shortfalls)
+
+        # Cash only moves between the bank and the players, so their total is the same after a batch.
+        # It isn't when cash is paid to or taken from an account the ledger doesn't hold
+        accounts = self.accounts
+        total = sum(account.cash for account in accounts)
+        for account, change in balances.items():
+            account.cash += change
+        if sum(account.cash for account in accounts) != total:
+            for account, change in balances.items():
+                account.cash -= change
+            raise ValueError("Transfer batch moves cash in or out of the bank and players")
+
+        if self.journal is not None:
+            numbers = self._account_numbers
+            for payer, payee, amount in transfers:
+                self.journal.extend(
+                    (self.batch_count, numbers[payer], numbers[payee], amount)
+                )
+        self.batch_count += 1
+
+    def transfer(self, payer, payee, amount):
+        """Applies a single transfer"""
+        self.transfer_batch([(payer, payee, amount)])
+
+    def entries(self):
+        """Yields every journaled transfer as a (batch, payer account, payee account, amount) tuple"""
+        if self.journal is None:
+            return
+        for i in range(0, len(self.journal), 4):
+            yield tuple(self.journal[i : i + 4])
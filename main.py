@@ -1,14 +1,64 @@
-import uuid
+import contextlib
+import contextvars
+import itertools
 import random
+from typing import Any, NamedTuple
+
+import auctions
+import events
 import landings
+import ledger
+import properties
+
+
+# The game and player whose turn is running, kept per thread so games can run concurrently
+current_game = contextvars.ContextVar("current_game", default=None)
+current_player = contextvars.ContextVar("current_player", default=None)
+logging_enabled = contextvars.ContextVar("logging_enabled", default=True)
 
 
 class Logger:
 
-    player = None
+    @property
+    def enabled(self):
+        """Whether messages are printed in this context, turn off for batch runs"""
+        return logging_enabled.get()
+
+    @enabled.setter
+    def enabled(self, enabled):
+        logging_enabled.set(enabled)
+
+    @contextlib.contextmanager
+    def disabled(self):
+        """Turns logging off in this context until the block exits"""
+        token = logging_enabled.set(False)
+        try:
+            yield
+        finally:
+            logging_enabled.reset(token)
+
+    @property
+    def player(self):
+        """The player whose turn is running in this context"""
+        return current_player.get()
+
+    @player.setter
+    def player(self, player):
+        current_player.set(player)
+
+    @property
+    def game(self):
+        """The game whose turn is running in this context"""
+        return current_game.get()
 
     def log(self, msg):
+        if not self.enabled:
+            return
         msg = f"[{self.player.name}] {msg}" if self.player else "t" + msg
+        # Seeded games are told apart by their seed, as games running concurrently log together
+        game = self.game
+        if game is not None and game.seed is not None:
+            msg = f"[seed {game.seed}] {msg}"
         print(msg)
 
 
@@ -26,9 +76,12 @@ class Dice:
         0  # Number of times player has attempted to roll a double to leave jail
     )
 
+    def __init__(self, rng=random):
+        self.rng = rng
+
     def roll(self):
         """Roll 2 Dice"""
-        self.die1, self.die2 = random.randint(1, 6), random.randint(1, 6)
+        self.die1, self.die2 = self.rng.randint(1, 6), self.rng.randint(1, 6)
         log(f"Dice rolled: {self.die1} + {self.die2} = {self.total}")
 
     @property
@@ -99,12 +152,14 @@ class Board:
     LUXERY_TAX = 38
     BOARDWALK = 39
 
-    chance = landings.Chance()
-    community_chest = landings.CommunityChest()
+    # The board every game shares: its landings are never changed, the decks here are just the landings
+    # and stay in printed order, each game plays with its own shuffled decks
+    chance = landings.Chance(scramble=False)
+    community_chest = landings.CommunityChest(scramble=False)
     landings = {
         GO: landings.Go(),
         MEDITIRANEAN_AVE: landings.MediterRaneanAvenue(),
-        COMMUNITY_CHEST_1: landings.CommunityChest(),
+        COMMUNITY_CHEST_1: community_chest,
         BALTIC_AVE: landings.BalticAvenue(),
         INCOME_TAX: landings.IncomeTax(),
         READING_RAILROAD: landings.ReadingRailroad(),
@@ -144,6 +199,10 @@ class Board:
         BOARDWALK: landings.Boardwalk(),
     }
     bord_len = len(landings) - 1
+    kinds = tuple(landing.kind for landing in landings.values())  # The kind of each position, see landings.PLAIN
+
+    rent_table = properties.build_rent_table(landings)
+    groups = properties.build_groups(landings)
 
     # Landings for which no action is needed on landing
     NO_ACTION = [
@@ -157,8 +216,23 @@ class Board:
     LEAVE_JAIL_PAY = "pay"
     LEAVE_JAIL_ROLL = "roll"
 
+    def __init__(self, rng=random):
+        # Every game plays with its own shuffled decks
+        self.chance = landings.Chance(rng=rng)
+        self.community_chest = landings.CommunityChest(rng=rng)
+
+    def reset(self, rng=random):
+        """Shuffles every card back into the decks, as a new board with the same rng would"""
+        self.chance.reset(rng=rng)
+        self.community_chest.reset(rng=rng)
+
     def advance(self, current_position, roll_value):
-        """Calculate the players new position based on their dice roll"""
+        """Calculate the players new position based on their dice roll, as a (position id, landing) pair"""
+        next_position, passed_go = self.next_position(current_position, roll_value)
+        return (next_position, self.landings[next_position]), passed_go
+
+    def next_position(self, current_position, roll_value):
+        """Calculate the players new position id based on their dice roll, and whether they passed go"""
         if not 2 <= roll_value <= 12:
             raise ValueError(
                 f"You cannot roll a value of {roll_value}. Only 2-12 are valid values."
@@ -170,7 +244,7 @@ class Board:
             passed_go = True
             next_position = next_position - self.bord_len - 1
 
-        return (next_position, self.landings[next_position]), passed_go
+        return next_position, passed_go
 
     def next_utility(self, position):
         """Return the next utility after the players current position"""
@@ -198,32 +272,61 @@ class Board:
 
     def get_cards_by_owner(self, player):
         chance_cards = [
-            c for c in self.chance.cards if c.owner and c.owner.id == player.id
+            c for c in self.chance.cards + self.chance.held if c.owner and c.owner.id == player.id
         ]
         community_chest_cards = [
-            c for c in self.community_chest.cards if c.owner and c.owner.id == player.id
+            c
+            for c in self.community_chest.cards + self.community_chest.held
+            if c.owner and c.owner.id == player.id
         ]
         return chance_cards + community_chest_cards
 
 
+_player_ids = itertools.count(1)  # Player ids are unique within the process
+
+
 class PlayerBase:
     """Base Class for a Monopoly player"""
 
     game = None
     id = None
-    position = None
+    position_id = 0  # The position the player is on
     name = None
     dice = None
     cash = None
+    seat = None
+    bankrupt = False
     __in_jail = False
 
     def __init__(self, name, game):
         self.game = game
-        self.id = uuid.uuid4()
-        self.position = (0, Board.landings[0])
+        self.id = next(_player_ids)
+        self.position_id = 0
         self.name = name
-        self.dice = Dice()
-        self.cash = self.game.bank.withdraw(1500)
+        self.dice = Dice(game.rng)
+        self.cash = self.game.bank.withdraw(self.game.rules.starting_cash)
+
+    def reset(self):
+        """
+        Returns the player to the start of a game when their game is reset, with the starting cash from the bank
+        Extend this method to clear anything else the player keeps for one game.
+        """
+        self.position_id = 0
+        self.dice.rng = self.game.rng
+        self.dice.reset()
+        self.dice.jail_roll_count = 0
+        self.cash = self.game.bank.withdraw(self.game.rules.starting_cash)
+        self.bankrupt = False
+        self.__in_jail = False
+
+    @property
+    def position(self):
+        """The player's position as a (position id, landing) pair, the game itself only keeps position_id"""
+        return self.position_id, Board.landings[self.position_id]
+
+    @position.setter
+    def position(self, position):
+        self.position_id = position[0]
 
     @property
     def in_jail(self):
@@ -255,6 +358,34 @@ class PlayerBase:
         """Extend this method to return one of the 3 LEAVE_JAIL_OPTIONS to choose how you want to leave jail"""
         raise NotImplementedError
 
+    def buy_property_option(self, landing):
+        """Extend this method to return True if you want to buy the unowned landing you are on"""
+        raise NotImplementedError
+
+    def build_option(self):
+        """Extend this method to return the positions you want to build a house on this turn, in order"""
+        return []
+
+    def trade_option(self):
+        """Extend this method to return the trades you want to propose this turn, see trading.Trade"""
+        return []
+
+    def accept_trade_option(self, trade):
+        """Extend this method to return True if you accept a trade another player proposes to you"""
+        return False
+
+    def bid_option(self, landing):
+        """Extend this method to return the most you will pay for a landing being auctioned, 0 to not bid"""
+        return 0
+
+    @classmethod
+    def bid_options(cls, players, landing):
+        """
+        Returns the bids of several players of this class in an auction, as their bid_option()s would
+        Extend this method to make every bid in one go, for example in one request to a bot.
+        """
+        return [player.bid_option(landing) for player in players]
+
     def withdraw(self, amount):
         """
         Attempt to withdraw money from the users cash
@@ -274,18 +405,58 @@ class DefaultPlayer(PlayerBase):
 
     def leave_jail_option(self):
         if len(self.get_out_of_jail_free_cards) > 0:
-            return game.board.LEAVE_JAIL_USE_CARD
+            return self.game.board.LEAVE_JAIL_USE_CARD
         elif self.cash >= 1000:
-            return game.board.LEAVE_JAIL_PAY
+            return self.game.board.LEAVE_JAIL_PAY
         else:
-            return game.board.LEAVE_JAIL_ROLL
+            return self.game.board.LEAVE_JAIL_ROLL
+
+    def buy_property_option(self, landing):
+        # Buy anything that leaves $200 on hand for rent
+        return self.cash - landing.price >= 200
+
+    def bid_option(self, landing):
+        # Bid up to the price, keeping $200 on hand for rent
+        return max(0, min(landing.price, self.cash - 200))
+
+    def build_option(self):
+        # Build one house at a time on each monopoly while keeping $500 on hand
+        game_properties = self.game.properties
+        cash = self.cash
+        houses, hotels = self.game.bank.houses, self.game.bank.hotels
+        build = []
+        for position in game_properties.owned_by(self):
+            if not game_properties.can_build(position):
+                continue
+
+            house_cost = self.game.board.landings[position].house_cost
+            hotel = game_properties.houses[position] == properties.HOTEL - 1
+            if cash - house_cost < 500 or (hotels if hotel else houses) == 0:
+                continue
+
+            build.append(position)
+            cash -= house_cost
+            if hotel:
+                hotels -= 1
+            else:
+                houses -= 1
+        return build
 
 
 class Bank:
     """Bank object for tracking cash-flow, houses, and hotels"""
 
-    def __init__(self):
-        self.cash = 20580
+    HOUSES = 32
+    HOTELS = 12
+
+    def __init__(self, cash=20580):
+        self.reset(cash)
+
+    def reset(self, cash=20580):
+        """Returns the bank to the start of a game"""
+        self.cash = cash
+        self.houses = self.HOUSES
+        self.hotels = self.HOTELS
 
     def withdraw(self, amount):
         """Withdraw money from the bank"""
@@ -296,23 +467,324 @@ class Bank:
         """Deposit money in the bank"""
         self.cash += amount
 
+    def take_houses(self, count):
+        """Take houses from the bank's supply"""
+        if count > self.houses:
+            raise ValueError(f"The bank only has {self.houses} houses left")
+        self.houses -= count
+
+    def take_house(self):
+        """Take a house from the bank's supply"""
+        self.take_houses(1)
+
+    def return_houses(self, count):
+        """Return houses to the bank's supply"""
+        self.houses += count
+
+    def take_hotel(self):
+        """Take a hotel from the bank's supply"""
+        if not self.hotels:
+            raise ValueError("The bank has no hotels left")
+        self.hotels -= 1
+
+    def return_hotel(self):
+        """Return a hotel to the bank's supply"""
+        self.hotels += 1
+
+
+class PlayerBankrupt(Exception):
+    """Raised when the current player goes bankrupt, ending their turn"""
+
+
+class TerminationPolicy:
+    """
+    Decides when a batch-run game can stop before a single player is left
+
+    max_turns stops the game after that many player turns. Nothing else makes a game end,
+    players who never buy can go round the board forever, so there is a cap unless max_turns=None is asked for.
+    win_probability stops the game once any player's estimated chance of winning reaches it,
+    estimated as their share of the total net worth still in the game.
+    """
+
+    MAX_TURNS = 2000
+
+    def __init__(self, max_turns=MAX_TURNS, win_probability=None):
+        self.max_turns = max_turns
+        self.win_probability = win_probability
+
+    @staticmethod
+    def win_probabilities(game):
+        """Returns each remaining player's estimated chance of winning"""
+        net_worths = [game.net_worth(p) for p in game.players]
+        total = sum(net_worths)
+        if not total:
+            return [1 / len(net_worths)] * len(net_worths)
+        return [worth / total for worth in net_worths]
+
+    def leader(self, game):
+        """Returns the player most likely to win"""
+        probabilities = self.win_probabilities(game)
+        return game.players[probabilities.index(max(probabilities))]
+
+    def should_stop(self, game):
+        if self.max_turns is not None and game.turn_count >= self.max_turns:
+            return True
+        if self.win_probability is not None:
+            return max(self.win_probabilities(game)) >= self.win_probability
+        return False
+
+
+class Rules:
+    """House rules, which can be varied between games"""
+
+    def __init__(
+        self, jail_fine=50, go_salary=200, starting_cash=1500, bank_cash=20580, auction=None, doubles=False
+    ):
+        if auction is not None and auction not in auctions.AUCTION_MODES:
+            raise ValueError(f"Unknown auction mode {auction!r}")
+        self.jail_fine = jail_fine
+        self.go_salary = go_salary
+        self.starting_cash = starting_cash
+        self.bank_cash = bank_cash
+        self.auction = auction  # How a property nobody buys is auctioned, one of auctions.AUCTION_MODES, or None for no auction
+        # Whether doubles roll again, going to jail on the third in a turn. Off, a turn is a single roll,
+        # as the landing probabilities model it
+        self.doubles = doubles
+
+    def values(self):
+        """Returns the rules as a tuple of (name, value) pairs"""
+        return tuple(sorted(vars(self).items()))
+
+    def __repr__(self):
+        return f"Rules({', '.join(f'{name}={value}' for name, value in self.values())})"
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.values() == other.values()
+
+    def __hash__(self):
+        return hash(self.values())
+
+
+class Decision(NamedTuple):
+    """
+    A decision a turn is waiting on: player.hook(*args) is called to make it
+    player is a player class when several of its players bid at once with bid_options().
+    Inside the game decisions are passed around as plain (player, hook, args) tuples.
+    """
+
+    player: Any
+    hook: str
+    args: tuple
+
+
+class Turn:
+    """
+    A player's turn, run as a state machine that stops at every decision and carries on once it is made
+
+    The turn starts in the JAIL phase, then goes to ROLL, MOVE, RESOLVE and DOUBLES until it is DONE.
+    With the doubles rule, doubles go back to ROLL and rolling them 3 times in a turn sends the player to jail,
+    leaving jail by rolling doubles doesn't earn another roll. Trading and building are part of resolving each roll.
+    run() plays the phases as a generator, so where a phase stopped for a decision is kept in it, not on a thread.
+
+    advance() runs the turn up to the next decision and returns it, make it and pass the choice to the
+    next advance(). Nothing waits on a player in between, so a caller can keep many turns going at once.
+    Get a turn from Game.begin_turn(), Game.take_turn() instead plays a whole turn, deciding as it goes.
+    """
+
+    JAIL = "jail"
+    ROLL = "roll"
+    MOVE = "move"
+    RESOLVE = "resolve"
+    DOUBLES = "doubles"
+    DONE = "done"
+
+    MAX_DOUBLES = 3  # Doubles in a turn that send the player to jail
+
+    doubles = 0  # Doubles rolled this turn
+    decision = None  # The decision the turn is waiting on
+    _steps = None
+
+    def __init__(self, game, player):
+        self.game = game
+        self.player = player
+        self.phase = self.JAIL
+
+    def advance(self, choice=None):
+        """
+        Runs the turn until it needs a decision, returning the Decision, or None once the turn is over
+        Pass the choice made for the last decision returned.
+        """
+        if self.phase == self.DONE:
+            raise ValueError("The turn is over")
+        if self._steps is None:
+            self._steps = self.run()
+        elif self.decision is None:
+            raise ValueError("The turn is not waiting on a decision")
+
+        game = self.game
+        game.current_player = self.player
+        game_token = current_game.set(game)
+        player_token = current_player.set(self.player)
+        try:
+            self.decision = Decision(*self._steps.send(choice))
+        except StopIteration:
+            self.decision = None
+        except PlayerBankrupt:
+            log("Player is out of the game")
+            self.decision = None
+            self.phase = self.DONE
+        finally:
+            current_player.reset(player_token)
+            current_game.reset(game_token)
+
+        if self.decision is None:
+            game._end_turn(self.player)
+        return self.decision
+
+    def run(self):
+        """Runs the turn's phases in order, a generator of the (player, hook, args) decisions they need"""
+        game = self.game
+        player = self.player
+        dice = player.dice
+        log(f"Starting position: {game.board.landings[player.position_id]}")
+
+        # A player in jail chooses how to leave, their turn ends if they stay
+        if player.in_jail:
+            log("Player is in Jail")
+            # Player must now choose between paying $50, using a get out of jail free card, or trying to roll a double
+            if not game._leave_jail((yield player, "leave_jail_option", ())):
+                self.phase = self.DONE
+                return
+
+        while True:
+            # Roll the dice, unless leaving jail already rolled them
+            self.phase = self.ROLL
+            rolled_doubles = False
+            if not dice.active:
+                dice.roll()
+                if game.events.handlers[events.Rolled]:
+                    game.events.emit(events.Rolled(player, dice.die1, dice.die2))
+                if game.rules.doubles and dice.die1 == dice.die2:
+                    self.doubles += 1
+                    if self.doubles == self.MAX_DOUBLES:
+                        log(f"Rolled doubles {self.MAX_DOUBLES} times, going to Jail")
+                        game._go_to_jail()
+                        break
+                    rolled_doubles = True
+
+            # Move the player's piece by the dice
+            self.phase = self.MOVE
+            if game._advance_position(dice.total):
+                log(f"Passed go, collecting ${game.rules.go_salary}")
+                game._collect_go_salary()
+
+            # Carry out the landing, then let the player trade and build
+            self.phase = self.RESOLVE
+            card = game._resolve_landing(player.position_id)
+
+            # Cards may have moved the player, buy or pay rent on the property they ended up on
+            position_id = player.position_id
+            if game.board.kinds[position_id] == landings.PROPERTY:
+                if game.properties.owners[position_id] is None:
+                    yield from game._offer_property(position_id)
+                else:
+                    game._charge_rent(position_id, card)
+
+            # Trade with the other players, before building so any completed groups can be built on
+            for trade in (yield player, "trade_option", ()):
+                yield from game._offer_trade(trade)
+
+            # Build on any monopolies the player wants to improve
+            for build_position_id in (yield player, "build_option", ()):
+                game._build_house(build_position_id)
+
+            # Roll again after doubles, unless the roll ended up in jail
+            self.phase = self.DOUBLES
+            if not rolled_doubles or player.in_jail:
+                break
+            log("Rolled doubles, rolling again")
+            dice.reset()
+
+        self.phase = self.DONE
+
 
 class Game:
     """Gameplay class handling player turns"""
 
-    players = []
-    board = Board()
-    bank = Bank()
+    players = None
+    eliminated = None
+    rules = None
+    board = None
+    bank = None
+    properties = None
+    ledger = None
+    events = None
     current_player = None
     logger = None
+    stats = None
+    trace = None
+    budget = None
+    seed = None
+    turn_card = None  # The card drawn during the current turn
+    turn_count = 0
+    stopped_early = False
+
+    def __init__(self, seed=None, journal=False, stats=None, trace=None, rules=None, budget=None):
+        # Seeded games are repeatable, unseeded games share the global random generator
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else random
+        self.rules = rules or Rules()
+        self.players = []
+        self.eliminated = []
+        self.board = Board(self.rng)
+        self.bank = Bank(self.rules.bank_cash)
+        self.properties = properties.Properties(self.board, self.bank)
+        self.ledger = ledger.Ledger(self.bank, journal=journal)
+        self.events = events.EventBus()
+
+        self.stats = stats
+        if stats is not None:
+            self.events.subscribe(events.Moved, stats.record_landing)
+            self.events.subscribe(events.CardDrawn, stats.record_card)
+        self.trace = trace
+        self.budget = budget  # A DecisionBudget timing the players' decisions
+
+    def reset(self, seed=None):
+        """
+        Starts the game over with a new seed, keeping its players, rules and subscribers
+
+        Everything is reset in place rather than made again, which is cheaper when playing many short games.
+        A reset game plays exactly as a new Game(seed) with the same players added in the same order would.
+        """
+        self.seed = seed
+        if seed is None:
+            self.rng = random
+        elif self.rng is random:
+            self.rng = random.Random(seed)
+        else:
+            self.rng.seed(seed)
+        self.board.reset(self.rng)
+        self.bank.reset(self.rules.bank_cash)
+        self.properties.reset()
+        self.ledger.reset()
+        self.turn_card = None
+        self.turn_count = 0
+        self.stopped_early = False
+        self.current_player = None
+
+        self.players = sorted(self.players + self.eliminated, key=lambda p: p.seat)
+        self.eliminated = []
+        for player in self.players:
+            player.reset()
 
     def _advance_position(self, roll_value):
         """Advances a players position based on a spin of the dice"""
-        self.current_player.position, passed_go = self.board.advance(
-            self.current_player.position[0], roll_value
-        )
+        player = self.current_player
+        player.position_id, passed_go = self.board.next_position(player.position_id, roll_value)
 
-        log(f"Position advanced to: {self.current_player.position}")
+        log(f"Position advanced to: {self.board.landings[player.position_id]}")
+        if self.events.handlers[events.Moved]:
+            self.events.emit(events.Moved(player, player.position_id, False))
         if passed_go:
             log("Passed GO!")
 
@@ -322,15 +794,17 @@ class Game:
         """Changes a player to a new position specified"""
         passed_go = (
             True
-            if self.current_player.position[0] > position_id
+            if self.current_player.position_id > position_id
             and not backwards_movement
             or position_id == 0
             else False
         )
-        self.current_player.position = (position_id, self.board.landings[position_id])
+        self.current_player.position_id = position_id
+        if self.events.handlers[events.Moved]:
+            self.events.emit(events.Moved(self.current_player, position_id, backwards_movement))
 
         log(
-            f"Position moved {'backwards ' if backwards_movement else ''}to: {self.current_player.position}"
+            f"Position moved {'backwards ' if backwards_movement else ''}to: {self.board.landings[position_id]}"
         )
         if passed_go:
             log("Passed GO!")
@@ -339,15 +813,328 @@ class Game:
 
     def _bank_collect(self, amount):
         """Collects money from the Bank"""
-        self.bank.withdraw(amount)
-        self.current_player.cash += amount
+        self.ledger.transfer(self.bank, self.current_player, amount)
+        if self.events.handlers[events.Payment]:
+            self.events.emit(events.Payment(self.bank, self.current_player, amount))
         log(
             f"${amount} deposited from the bank - cash on hand now ${self.current_player.cash}"
         )
 
+    def _collect_go_salary(self):
+        """Collects the Go salary for the current player"""
+        if self.events.handlers[events.PassedGo]:
+            self.events.emit(events.PassedGo(self.current_player))
+        self._bank_collect(self.rules.go_salary)
+
+    def _emit_payments(self, transfers):
+        if self.events.handlers[events.Payment]:
+            for payer, payee, amount in transfers:
+                self.events.emit(events.Payment(payer, payee, amount))
+
+    def net_worth(self, player):
+        """Returns the player's cash plus the price of their properties and buildings"""
+        worth = player.cash
+        for position in self.properties.owned_by(player):
+            landing = self.board.landings[position]
+            worth += landing.price + self.properties.houses[position] * (
+                landing.house_cost or 0
+            )
+        return worth
+
+    def _raise_cash(self, player, amount):
+        """
+        Sells the player's buildings back to the bank at half price until they have the amount on hand
+        Returns True if the player now has enough cash
+        """
+        owned = self.properties.owned_by(player)
+        owned.sort(key=lambda p: self.properties.houses[p], reverse=True)
+        for position in owned:
+            if player.cash >= amount:
+                break
+            buildings = self.properties.clear_buildings(position)
+            if buildings:
+                value = buildings * self.board.landings[position].house_cost // 2
+                self.ledger.transfer(self.bank, player, value)
+                self._emit_payments([(self.bank, player, value)])
+                log(f"{player.name} sold {buildings} buildings on {self.board.landings[position]} for ${value}")
+
+        return player.cash >= amount
+
+    def _declare_bankruptcy(self, player, creditor):
+        """Hands everything the player owns to their creditor, and removes them from the game"""
+        log(f"{player.name} is bankrupt!")
+        self._raise_cash(player, float("inf"))
+        if player.cash:
+            self._emit_payments([(player, creditor, player.cash)])
+            self.ledger.transfer(player, creditor, player.cash)
+
+        new_owner = None if creditor is self.bank else creditor
+        for position in self.properties.owned_by(player):
+            self.properties.set_owner(position, new_owner)
+        for card in self.board.get_cards_by_owner(player):
+            if new_owner:
+                card.owner = new_owner
+            elif card.deck_code_name == "community_chest":
+                self.board.community_chest.place_card_at_bottom(card)
+            else:
+                self.board.chance.place_card_at_bottom(card)
+
+        player.bankrupt = True
+        self.players.remove(player)
+        self.eliminated.append(player)
+
+    def forfeit(self, player):
+        """
+        Removes a player from the game, their assets go back to the bank
+        Raises PlayerBankrupt to end the turn if it is theirs
+        """
+        log(f"{player.name} forfeits the game")
+        self._declare_bankruptcy(player, self.bank)
+        if player is self.current_player:
+            raise PlayerBankrupt()
+
+    def _answer(self, steps):
+        """
+        Runs steps, a generator of (player, hook, args) decisions, to the end, making each decision as it comes up
+        Returns what the generator returns.
+        """
+        send = steps.send
+        budget = self.budget
+        choice = None
+        try:
+            while True:
+                player, hook, args = send(choice)
+                if budget is None:
+                    choice = getattr(player, hook)(*args)
+                else:
+                    choice = budget.decide(self, player, hook, args)
+        except StopIteration as stop:
+            return stop.value
+
+    def propose_trade(self, trade):
+        """
+        Offers a trade from the current player to another, carrying it out if they accept
+        Returns True if the trade was accepted
+        """
+        return self._answer(self._offer_trade(trade))
+
+    def _offer_trade(self, trade):
+        """propose_trade(), as a generator of the partner's decision"""
+        proposer, partner = trade.proposer, trade.partner
+        if proposer is not self.current_player:
+            raise ValueError(f"Only {self.current_player.name} can propose trades this turn")
+        if partner is proposer or partner not in self.players:
+            raise ValueError(f"{partner.name} cannot trade with {proposer.name}")
+
+        for giver, cash, positions, cards in (
+            (proposer, trade.give_cash, trade.give_properties, trade.give_cards),
+            (partner, trade.take_cash, trade.take_properties, trade.take_cards),
+        ):
+            if cash < 0 or cash > giver.cash:
+                raise ValueError(f"{giver.name} cannot pay ${cash}")
+            for position in positions:
+                landing = self.board.landings[position]
+                if self.properties.owner(position) is not giver:
+                    raise ValueError(f"{giver.name} does not own {landing}")
+                if any(self.properties.houses[p] for p in self.board.groups[landing.group]):
+                    raise ValueError(f"Buildings in the {landing.group} group must be sold before trading {landing}")
+            for card in cards:
+                if card.owner is not giver:
+                    raise ValueError(f"{giver.name} does not hold {card.name}")
+
+        if not (yield partner, "accept_trade_option", (trade,)) or partner.bankrupt:
+            log(f"{partner.name} declined {trade}")
+            return False
+
+        transfers = [(proposer, partner, trade.give_cash), (partner, proposer, trade.take_cash)]
+        transfers = [t for t in transfers if t[2]]
+        self.ledger.transfer_batch(transfers)
+        self._emit_payments(transfers)
+        for receiver, positions, cards in (
+            (partner, trade.give_properties, trade.give_cards),
+            (proposer, trade.take_properties, trade.take_cards),
+        ):
+            for position in positions:
+                self.properties.set_owner(position, receiver)
+            for card in cards:
+                card.owner = receiver
+
+        log(f"{partner.name} accepted {trade}")
+        if self.events.handlers[events.Traded]:
+            self.events.emit(events.Traded(trade))
+        return True
+
+    def _settle(self, transfers):
+        """
+        Applies a batch of (payer, payee, amount) transfers
+        A payer who comes up short sells buildings, and goes bankrupt if that is still not enough
+        """
+        while transfers:
+            try:
+                self.ledger.transfer_batch(transfers)
+                self._emit_payments(transfers)
+                break
+            except ledger.InsufficientFunds as error:
+                shortfalls = error.shortfalls
+
+            for debtor, shortfall in shortfalls.items():
+                if self._raise_cash(debtor, debtor.cash + shortfall):
+                    continue
+
+                # A debtor owing a single player goes bankrupt to them, anyone else to the bank
+                creditors = {payee for payer, payee, _ in transfers if payer is debtor}
+                creditor = creditors.pop() if len(creditors) == 1 else self.bank
+                self._declare_bankruptcy(debtor, creditor)
+                transfers = [t for t in transfers if debtor is not t[0] and debtor is not t[1]]
+
+        if self.current_player.bankrupt:
+            raise PlayerBankrupt()
+
+    def _bank_pay(self, amount):
+        """Pays money from the current player to the Bank"""
+        self._settle([(self.current_player, self.bank, amount)])
+        log(
+            f"${amount} paid to the bank - cash on hand now ${self.current_player.cash}"
+        )
+
+    def _pay_player(self, owner, amount):
+        """Pays money from the current player to another player"""
+        self._settle([(self.current_player, owner, amount)])
+        log(f"${amount} paid to {owner.name} - their cash on hand now ${owner.cash}")
+
+    def _pay_each_player(self, amount):
+        """Pays money from the current player to every other player, all at once"""
+        others = [p for p in self.players if p is not self.current_player]
+        self._settle([(self.current_player, p, amount) for p in others])
+        log(f"${amount} paid to each of {len(others)} players")
+
+    def _collect_from_each_player(self, amount):
+        """Collects money from every other player for the current player, all at once"""
+        others = [p for p in self.players if p is not self.current_player]
+        self._settle([(p, self.current_player, amount) for p in others])
+        log(f"${amount} collected from each of {len(others)} players")
+
+    def _buy_property(self, position_id):
+        """Buys a property from the bank for the current player"""
+        landing = self.board.landings[position_id]
+        self._bank_pay(landing.price)
+        self.properties.set_owner(position_id, self.current_player)
+        log(f"Bought {landing} for ${landing.price}")
+
+    def _land_on_property(self, position_id, card=None):
+        """
+        Offers an unowned property to the current player, or charges rent if another player owns it
+        Pass the card that moved the player here, if any, as some cards change the rent due
+        """
+        if self.properties.owners[position_id] is None:
+            self._answer(self._offer_property(position_id))
+        else:
+            self._charge_rent(position_id, card)
+
+    def _offer_property(self, position_id):
+        """Offers an unowned property to the current player, a generator of the decisions to buy it or bid for it"""
+        landing = self.board.landings[position_id]
+        if (
+            self.current_player.cash >= landing.price
+            and (yield self.current_player, "buy_property_option", (landing,))
+        ):
+            self._buy_property(position_id)
+        elif self.rules.auction is not None:
+            yield from self._hold_auction(position_id)
+
+    def _charge_rent(self, position_id, card=None):
+        """Charges the current player rent on an owned property, unless they own it"""
+        owner = self.properties.owners[position_id]
+        if owner is self.current_player:
+            return
+
+        card_id = card.id if card and card.deck_code_name == "chance" else None
+        if card_id == landings.Chance.ADVANCE_TO_NEAREST_UTILITY:
+            # Throw the dice and pay 10 times the amount thrown
+            dice = self.current_player.dice
+            dice.roll()
+            rent = 10 * dice.total
+        else:
+            rent = self.properties.rent(position_id, self.current_player.dice.total)
+            if card_id == landings.Chance.ADVANCE_TO_NEAREST_RAILROAD:
+                rent *= 2
+
+        log(f"{self.board.landings[position_id]} is owned by {owner.name}, rent is ${rent}")
+        self._pay_player(owner, rent)
+
+    def _bids(self, landing):
+        """
+        Generates the decisions for every player's bid for a landing, returning the (player, bid) pairs
+        starting with the current player and going round the table
+        Players of the same class bid together through bid_options(), unless the decision budget times each bid
+        """
+        seat = self.current_player.seat
+        bidders = sorted(self.players, key=lambda p: (p.seat < seat, p.seat))
+        if self.budget is not None:
+            bids = []
+            for player in bidders:
+                bids.append((player, (yield player, "bid_option", (landing,))))
+            return bids
+
+        by_class = {}
+        for player in bidders:
+            by_class.setdefault(type(player), []).append(player)
+        bids = {}
+        for player_class, players in by_class.items():
+            class_bids = yield player_class, "bid_options", (players, landing)
+            for player, bid in zip(players, class_bids):
+                bids[player] = bid
+        return [(p, bids[p]) for p in bidders]
+
+    def _auction(self, position_id):
+        """Auctions a property the current player didn't buy to every player, the winner pays the bank"""
+        self._answer(self._hold_auction(position_id))
+
+    def _hold_auction(self, position_id):
+        """_auction(), as a generator of the bidders' decisions"""
+        landing = self.board.landings[position_id]
+        # A bid the bidder can't cover, or that isn't a whole number of dollars, is no bid
+        bids = [
+            (player, bid if isinstance(bid, int) and 0 < bid <= player.cash else 0)
+            for player, bid in (yield from self._bids(landing))
+        ]
+        winner, price = auctions.resolve(bids, self.rules.auction)
+        if winner is None:
+            log(f"Nobody bid for {landing}")
+            return
+
+        self.ledger.transfer(winner, self.bank, price)
+        self._emit_payments([(winner, self.bank, price)])
+        self.properties.set_owner(position_id, winner)
+        log(f"{winner.name} won {landing} at auction for ${price}")
+        if self.events.handlers[events.AuctionWon]:
+            self.events.emit(events.AuctionWon(winner, position_id, price))
+
+    def _build_house(self, position_id):
+        """Builds a house, or a hotel on a property with 4 houses, for the current player"""
+        landing = self.board.landings[position_id]
+        if self.properties.owner(position_id) is not self.current_player:
+            raise ValueError(f"You cannot build on {landing}, you don't own it")
+        if self.current_player.cash < landing.house_cost:
+            raise ValueError(f"You cannot afford to build on {landing}")
+
+        self.properties.build(position_id)
+        self._bank_pay(landing.house_cost)
+        log(f"Built on {landing}, it now has {self.properties.houses[position_id]} buildings")
+
+    def _pay_repairs(self, per_house, per_hotel):
+        """Pays the bank for repairs on each of the current player's houses and hotels"""
+        houses, hotels = self.properties.building_counts(self.current_player)
+        amount = houses * per_house + hotels * per_hotel
+        log(f"Repairs on {houses} houses and {hotels} hotels cost ${amount}")
+        self._bank_pay(amount)
+
     def add_player(self, name, player_obj):
         """Adds a player to the game"""
-        self.players.append(player_obj(name, self))
+        player = player_obj(name, self)
+        player.seat = len(self.players)
+        self.ledger.open_account(player)
+        self.players.append(player)
 
     def _leave_jail(self, selected_option):
         log(f"Player chooses to exit Jail with the option: '{selected_option}'")
@@ -370,91 +1157,81 @@ class Game:
                 )
 
         elif selected_option == self.board.LEAVE_JAIL_PAY:
-            cash = self.current_player.withdraw(50)
-            self.bank.deposit(cash)
+            self._bank_pay(self.rules.jail_fine)
             self.current_player.in_jail = False
 
         elif selected_option == self.board.LEAVE_JAIL_ROLL:
             dice = self.current_player.dice
             dice.roll()
+            if self.events.handlers[events.Rolled]:
+                self.events.emit(events.Rolled(self.current_player, dice.die1, dice.die2))
             if not dice.same:
                 # The player did not roll a double and remains in jail
                 dice.jail_roll_count += 1
                 if dice.jail_roll_count == 3:
-                    # If this is the 3rd try at rolling a double, player is forced to pay $50 and use the roll
+                    # If this is the 3rd try at rolling a double, player is forced to pay the fine and use the roll
                     log(
-                        "This was your 3rd roll attempt to leave Jail via rolling, you must now pay $50 and move on"
+                        "This was your 3rd roll attempt to leave Jail via rolling,"
+                        f" you must now pay ${self.rules.jail_fine} and move on"
                     )
-                    cash = self.current_player.withdraw(50)
-                    self.bank.deposit(cash)
+                    self._bank_pay(self.rules.jail_fine)
                     self.current_player.in_jail = False
                 else:
                     return False
             else:
                 self.current_player.in_jail = False
 
+        if self.events.handlers[events.JailExited]:
+            self.events.emit(events.JailExited(self.current_player, selected_option))
         return True
 
-    def run_turn(self):
-        """Runs the run_turn for the current player"""
-        # TODO split out this code and write tests for all of it
+    def _go_to_jail(self):
+        """Sends the current player to jail"""
+        self._move_position(self.board.JAIL)
+        self.current_player.in_jail = True
+        if self.events.handlers[events.JailEntered]:
+            self.events.emit(events.JailEntered(self.current_player))
 
-        log(f"Starting position: {self.current_player.position[1]}")
-
-        # If the player is in jail, attempt to leave
-        if self.current_player.in_jail:
-            log(f"Player is in Jail")
-
-            # Player must now choose between paying $50, using a get out of jail free card, or trying to roll a double
-            leave_jail_option = self.current_player.leave_jail_option()
-            if not self._leave_jail(leave_jail_option):
-                # Player remains in jail and ends turn
-                return
-
-        # roll dice
-        if not self.current_player.dice.active:
-            self.current_player.dice.roll()
-
-        # move players piece
-        passed_go = self._advance_position(self.current_player.dice.total)
-
-        if passed_go:
-            log("Passed go, collecting $200")
-            self._bank_collect(200)
-
-        # take action based on where the player landed
-        position_id, position = self.current_player.position
+    def _resolve_landing(self, position_id):
+        """
+        Carries out what happens on landing on a position other than a property, returning the card drawn if any
+        Cards may move the player on, to a property, to jail or to a position carried out in turn
+        """
+        kind = self.board.kinds[position_id]
+        card = None
 
-        if isinstance(position, landings.Chance):
+        if kind == landings.CHANCE:
             # PlayerBase landed on Chance, pick a card and act on its instructions
-            card = position.select_card()
+            card = self.turn_card = self.board.chance.select_card()
             log(f"Selected Chance card: '{card.name}'")
+            if self.events.handlers[events.CardDrawn]:
+                self.events.emit(events.CardDrawn(self.current_player, card))
 
             if card.id == landings.Chance.ADVANCE_TO_GO:
                 self._move_position(Board.GO)
-                self._bank_collect(200)
+                self._collect_go_salary()
 
             elif card.id == landings.Chance.ADVANCE_TO_ILLINOIS:
                 passed_go = self._move_position(Board.ILLINOIS_AVE)
                 if passed_go:
-                    self._bank_collect(200)
+                    self._collect_go_salary()
 
             elif card.id == landings.Chance.ADVANCE_TO_ST_CHARLES_PLACE:
                 passed_go = self._move_position(Board.ST_CHARLES_PLACE)
                 if passed_go:
-                    self._bank_collect(200)
+                    self._collect_go_salary()
 
             elif card.id == landings.Chance.ADVANCE_TO_NEAREST_UTILITY:
-                nearest_utility = game.board.next_utility(position_id)
+                nearest_utility = self.board.next_utility(position_id)
                 passed_go = self._move_position(nearest_utility)
                 if passed_go:
-                    self._bank_collect(200)
+                    self._collect_go_salary()
 
             elif card.id == landings.Chance.ADVANCE_TO_NEAREST_RAILROAD:
-                nearest_railroad = game.board.next_railroad(position_id)
+                nearest_railroad = self.board.next_railroad(position_id)
                 passed_go = self._move_position(nearest_railroad)
                 if passed_go:
-                    self._bank_collect(200)
+                    self._collect_go_salary()
 
             elif card.id == landings.Chance.BANKS_PAYS_DIVIDEND:
                 self._bank_collect(50)
@@ -475,27 +1252,24 @@ class Game:
                 self._move_position(go_back_to, backwards_movement=True)
 
             elif card.id == landings.Chance.GO_TO_JAIL:
-                self._move_position(Board.JAIL)
-                self.current_player.in_jail = True
+                self._go_to_jail()
 
             elif card.id == landings.Chance.GENERAL_REPAIRS:
-                pass
-                # TODO write code to remove value from user based on houses/hotels
+                self._pay_repairs(25, 100)
 
             elif card.id == landings.Chance.POOR_TAX:
-                self._bank_collect(15)
+                self._bank_pay(15)
 
             elif card.id == landings.Chance.TRIP_TO_READING_RAILROAD:
                 passed_go = self._move_position(Board.READING_RAILROAD)
                 if passed_go:
-                    self._bank_collect(200)
+                    self._collect_go_salary()
 
             elif card.id == landings.Chance.TRIP_TO_BOARDWALK:
                 self._move_position(Board.BOARDWALK)
 
             elif card.id == landings.Chance.CHAIRMAN_OF_THE_BOARD:
-                pass
-                # TODO pay each player 50
+                self._pay_each_player(50)
 
             elif card.id == landings.Chance.BUILDING_LOAN_LOAN:
                 self._bank_collect(150)
@@ -503,20 +1277,22 @@ class Game:
             elif card.id == landings.Chance.WON_CROSSWORD_COMPETITION:
                 self._bank_collect(100)
 
-        elif isinstance(position, landings.CommunityChest):
+        elif kind == landings.COMMUNITY_CHEST:
             # PlayerBase landed on Community Chest, pick a card and act on its instructions
-            card = position.select_card()
+            card = self.turn_card = self.board.community_chest.select_card()
             log(f"Selected Community Chest card: '{card.name}'")
+            if self.events.handlers[events.CardDrawn]:
+                self.events.emit(events.CardDrawn(self.current_player, card))
 
             if card.id == landings.CommunityChest.ADVANCE_TO_GO:
                 self._move_position(Board.GO)
-                self._bank_collect(200)
+                self._collect_go_salary()
 
             elif card.id == landings.CommunityChest.BANK_ERROR:
                 self._bank_collect(200)
 
             elif card.id == landings.CommunityChest.DOCTOR_FEE:
-                self.bank.deposit(self.current_player.withdraw(50))
+                self._bank_pay(50)
 
             elif card.id == landings.CommunityChest.STOCK_SALE:
                 self._bank_collect(50)
@@ -525,12 +1301,10 @@ class Game:
                 card.owner = self.current_player
 
             elif card.id == landings.CommunityChest.GO_TO_JAIL:
-                self._move_position(Board.JAIL)
-                self.current_player.in_jail = True
+                self._go_to_jail()
 
             elif card.id == landings.CommunityChest.OPERA_NIGHT:
-                # Collect $50 from each player
-                pass
+                self._collect_from_each_player(50)
 
             elif card.id == landings.CommunityChest.HOLIDAY_FUND:
                 self._bank_collect(50)
@@ -539,38 +1313,58 @@ class Game:
                 self._bank_collect(20)
 
             elif card.id == landings.CommunityChest.BIRTHDAY:
-                # Collect 10 from each player
-                pass
+                self._collect_from_each_player(10)
 
             elif card.id == landings.CommunityChest.LIFE_INSURANCE:
                 self._bank_collect(100)
 
             elif card.id == landings.CommunityChest.HOSPITAL_FEES:
-                self.bank.deposit(self.current_player.withdraw(50))
+                self._bank_pay(50)
 
             elif card.id == landings.CommunityChest.SCHOOL_FEES:
-                pass
+                self._bank_pay(50)
 
             elif card.id == landings.CommunityChest.CONSULT:
-                pass
+                self._bank_collect(25)
 
             elif card.id == landings.CommunityChest.STREET_REPAIRS:
-                pass
+                self._pay_repairs(40, 115)
 
             elif card.id == landings.CommunityChest.BEAUTY_CONTEST:
-                pass
+                self._bank_collect(10)
 
             elif card.id == landings.CommunityChest.INHERITANCE:
-                pass
+                self._bank_collect(100)
 
-        elif isinstance(position, landings.GoToJail):
+        elif kind == landings.GO_TO_JAIL:
             # Player landed on "Go to jail", place player in jail and place them in jailed status
-            _ = self._move_position(self.board.JAIL)
-            self.current_player.in_jail = True
+            self._go_to_jail()
 
-        # Take action based on where the player landed
-        if position_id in self.board.NO_ACTION:
-            pass
+        elif kind == landings.TAX:
+            landing = self.board.landings[position_id]
+            log(f"Paying {landing}")
+            self._bank_pay(landing.tax)
+
+        # A card that moves the player lands them on a new position, which may be a tax or another card
+        player = self.current_player
+        if card is not None and player.position_id != position_id and not player.in_jail:
+            if self.board.kinds[player.position_id] != landings.PROPERTY:
+                card = self._resolve_landing(player.position_id) or card
+
+        return card
+
+    def run_turn(self):
+        """Runs the current player's turn from start to end, making each decision as it comes up"""
+        self._answer(Turn(self, self.current_player).run())
+
+    def begin_turn(self, player):
+        """
+        Starts a turn for the player that stops at each decision for the caller to make, see Turn
+        take_turn() plays a whole turn instead, making the decisions as they come up.
+        """
+        self.current_player = player
+        self.turn_card = None
+        return Turn(self, player)
 
     def play(self):
         """Runs the Monopoly game"""
@@ -582,19 +1376,90 @@ class Game:
         ]:
             first_round = False
 
+            for player in list(self.players):
+                if not player.bankrupt:
+                    self.take_turn(player)
+
+            if self.winner:
+                log(f"{self.winner.name} wins!")
+                if self.stats is not None:
+                    self.stats.record_game(self)
+                if self.trace is not None:
+                    self.trace.record_game(self)
+                return
+
+    @property
+    def winner(self):
+        """The last player standing, or None while the game is still going"""
+        return self.players[0] if len(self.players) == 1 else None
+
+    def take_turn(self, player):
+        """Runs a turn for the player"""
+        self.current_player = player
+
+        # pre turn setup
+        game_token = current_game.set(self)
+        player_token = current_player.set(player)
+        self.turn_card = None
+
+        # take turn
+        try:
+            self.run_turn()
+        except PlayerBankrupt:
+            log("Player is out of the game")
+        finally:
+            # post turn teardown
+            current_player.reset(player_token)
+            current_game.reset(game_token)
+
+        self._end_turn(player)
+
+    def _end_turn(self, player):
+        """Records a finished turn"""
+        if self.trace is not None:
+            self.trace.record_turn(self, player)
+        player.dice.reset()
+        self.turn_count += 1
+        if self.stats is not None:
+            self.stats.record_turn(self, player)
+
+    @property
+    def next_player(self):
+        """The player whose turn is next, following the current player round the table"""
+        if self.current_player is not None:
             for player in self.players:
-                self.current_player = player
+                if player.seat > self.current_player.seat:
+                    return player
+        return self.players[0]
+
+    def step(self, policy):
+        """
+        Runs the next player's turn
+        Returns True once the game is over, either won or stopped by the termination policy
+        """
+        self.take_turn(self.next_player)
 
-                # pre turn setup
-                logger.player = self.current_player
+        if not self.winner:
+            if not policy.should_stop(self):
+                return False
+            self.stopped_early = True
 
-                # take turn
-                self.run_turn()
+        if self.stats is not None:
+            self.stats.record_game(self)
+        if self.trace is not None:
+            self.trace.record_game(self)
+        return True
 
-                # post turn teardown
-                logger.player = None
-                self.current_player.dice.reset()
+    def run(self, policy=None):
+        """
+        Runs the game without prompting until one player is left, or the termination policy stops it early
+        Returns the winner, or the most likely winner if the game was stopped early
+        """
+        policy = policy or TerminationPolicy()
+        while not self.step(policy):
+            pass
 
+        return self.winner or policy.leader(self)
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+
+import landings
+import main
+
+BOARD_SIZE = len(main.Board.landings)
+
+# States a player can be in at the start of a turn: on a position, or in jail having failed 0, 1 or 2 rolls
+JAIL_ATTEMPTS = 3
+STATES = BOARD_SIZE + JAIL_ATTEMPTS
+
+
+def state(position, jail_attempts=None):
+    """Returns the state of a player on a position, or in jail having failed jail_attempts rolls to leave"""
+    return position if jail_attempts is None else BOARD_SIZE + jail_attempts
+
+
+class LandingProbabilities:
+    """
+    Chances of a player landing on each position within a number of turns
+
+    Turns are modelled as the game plays them: a roll of 2d6, then any Chance, Community Chest or
+    Go To Jail move. Cards are assumed equally likely to be on top of their deck. A position counts as
+    landed on when a piece stops on it, whether by the dice or by a card, or is sent to it in jail.
+    A player in jail either rolls for a double, paying after their third failed roll, or always pays,
+    following jail_policy.
+
+    Results are memoized per (start state, horizon) in a cache of the cache_size most recently used.
+    A miss works up a table of every state's results from the longest horizon still fully cached,
+    so a bot asking about growing horizons only pays for one more turn each time.
+    """
+
+    def __init__(self, jail_policy=main.Board.LEAVE_JAIL_ROLL, cache_size=4096):
+        if jail_policy not in (main.Board.LEAVE_JAIL_ROLL, main.Board.LEAVE_JAIL_PAY):
+            raise ValueError(f"Jail policy must be to roll or pay, not {jail_policy!r}")
+        self.jail_policy = jail_policy
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (state, horizon) -> tuple of probabilities per position
+        self._frequencies = None
+
+        board = main.Board()
+        self._outcomes = [self._turn_outcomes(board, s) for s in range(STATES)]
+
+    @staticmethod
+    def _resolve(board, position):
+        """Returns the (probability, positions landed on, end state) outcomes of landing on a position"""
+        landing = board.landings[position]
+        jailed = ((1, (position, board.JAIL), state(board.JAIL, 0)),)
+
+        if position == board.GO_TO_JAIL:
+            return jailed
+
+        if isinstance(landing, landings.Chance):
+            destinations = {
+                landings.Chance.ADVANCE_TO_GO: board.GO,
+                landings.Chance.ADVANCE_TO_ILLINOIS: board.ILLINOIS_AVE,
+                landings.Chance.ADVANCE_TO_ST_CHARLES_PLACE: board.ST_CHARLES_PLACE,
+                landings.Chance.ADVANCE_TO_NEAREST_UTILITY: board.next_utility(position),
+                landings.Chance.ADVANCE_TO_NEAREST_RAILROAD: board.next_railroad(position),
+                landings.Chance.GO_BACK_THREE: position - 3,
+                landings.Chance.TRIP_TO_READING_RAILROAD: board.READING_RAILROAD,
+                landings.Chance.TRIP_TO_BOARDWALK: board.BOARDWALK,
+            }
+            deck = landings.Chance
+        elif isinstance(landing, landings.CommunityChest):
+            destinations = {landings.CommunityChest.ADVANCE_TO_GO: board.GO}
+            deck = landings.CommunityChest
+        else:
+            return ((1, (position,), position),)
+
+        outcomes = []
+        for card in deck.cards:
+            if card.id == deck.GO_TO_JAIL:
+                outcomes.extend(jailed)
+            elif card.id in destinations:
+                # Moving onto another card square draws from that deck in turn
+                destination = destinations[card.id]
+                for p, landed, end in LandingProbabilities._resolve(board, destination):
+                    outcomes.append((p, (position,) + landed, end))
+            else:
+                outcomes.append((1, (position,), position))
+        return [(p / len(deck.cards), landed, end) for p, landed, end in outcomes]
+
+    def _turn_outcomes(self, board, start):
+        """Returns the (probability, positions landed on, end state) outcomes of a turn from a state, merged"""
+        merged = {}
+        for die1 in range(1, 7):
+            for die2 in range(1, 7):
+                if start < BOARD_SIZE:
+                    position = start
+                elif self.jail_policy == board.LEAVE_JAIL_PAY or die1 == die2 or start == STATES - 1:
+                    # Out of jail, moving by the roll that got them out
+                    position = board.JAIL
+                else:
+                    key = ((), start + 1)
+                    merged[key] = merged.get(key, 0) + 1 / 36
+                    continue
+
+                for p, landed, end in self._resolve(board, (position + die1 + die2) % BOARD_SIZE):
+                    key = (tuple(sorted(set(landed))), end)
+                    merged[key] = merged.get(key, 0) + p / 36
+
+        return [(p, landed, end) for (landed, end), p in merged.items()]
+
+    def within(self, start, horizon, jail_attempts=None):
+        """
+        Returns the probability of landing on each position at least once within horizon turns
+        from a start position, or from jail having failed jail_attempts rolls to leave
+        """
+        return self._row(state(start, jail_attempts), horizon)
+
+    def landing(self, position, start, horizon, jail_attempts=None):
+        """Returns the probability of landing on a position at least once within horizon turns"""
+        return self._row(state(start, jail_attempts), horizon)[position]
+
+    def landing_frequencies(self, tolerance=1e-12):
+        """
+        Returns the long-run chance of landing on each position in a turn, whatever the start
+        These are the landings per turn of a player who has been going round the board for a while.
+        """
+        if self._frequencies is None:
+            # The distribution of states at the start of a turn converges on the chain's stationary one
+            distribution = [1 / STATES] * STATES
+            change = 1
+            while change > tolerance:
+                after = [0.0] * STATES
+                for s, p_state in enumerate(distribution):
+                    for p, _, end in self._outcomes[s]:
+                        after[end] += p_state * p
+                change = max(abs(a - b) for a, b in zip(after, distribution))
+                distribution = after
+
+            frequencies = [0.0] * BOARD_SIZE
+            for s, p_state in enumerate(distribution):
+                for p, landed, _ in self._outcomes[s]:
+                    for position in landed:
+                        frequencies[position] += p_state * p
+            self._frequencies = tuple(frequencies)
+        return self._frequencies
+
+    def _row(self, start, horizon):
+        key = (start, horizon)
+        cache = self._cache
+        row = cache.get(key)
+        if row is not None:
+            cache.move_to_end(key)
+            return row
+        if horizon <= 0:
+            return (0.0,) * BOARD_SIZE
+
+        # Work up in a local table from the longest horizon with every state's row still cached
+        known = horizon - 1
+        while known > 0 and not all((s, known) in cache for s in range(STATES)):
+            known -= 1
+        level = [cache[(s, known)] for s in range(STATES)] if known else [(0.0,) * BOARD_SIZE] * STATES
+
+        for shorter in range(known + 1, horizon + 1):
+            level = [self._turn(s, level) for s in range(STATES)]
+            if STATES * (horizon - shorter + 1) <= self.cache_size:
+                # Keep whole levels only while they fit, so they aren't evicted before they are used
+                for s, row in enumerate(level):
+                    cache[(s, shorter)] = row
+                    cache.move_to_end((s, shorter))
+
+        cache[key] = level[start]
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return level[start]
+
+    def _turn(self, start, after):
+        """Returns a state's row for one more turn, given every state's row for the turns after it"""
+        probabilities = [0.0] * BOARD_SIZE
+        for p, landed, end in self._outcomes[start]:
+            end_row = after[end]
+            for position in range(BOARD_SIZE):
+                probabilities[position] += p if position in landed else p * end_row[position]
+        return tuple(probabilities)
@@ -0,0 +1,233 @@
+HOTEL = 5  # A hotel is stored as a 5th "house" on a property
+
+
+def build_rent_table(board_landings):
+    """
+    Precompute the rent for every property in every state it can be in
+
+    The table is keyed by (position, houses, monopoly, railroads owned, utilities owned).
+    Utility entries hold the multiplier to apply to the dice total rather than a dollar amount.
+    """
+    table = {}
+    for position, landing in board_landings.items():
+        if not landing.is_property:
+            continue
+
+        if landing.is_railroad:
+            for railroads, rent in enumerate(landing.rent, start=1):
+                table[(position, 0, False, railroads, 0)] = rent
+
+        elif landing.is_utility:
+            for utilities, multiplier in enumerate(landing.rent, start=1):
+                table[(position, 0, False, 0, utilities)] = multiplier
+
+        else:
+            for houses, rent in enumerate(landing.rent):
+                table[(position, houses, False, 0, 0)] = rent
+                # An unimproved property in a completed color group charges double rent
+                table[(position, houses, True, 0, 0)] = rent * 2 if houses == 0 else rent
+
+    return table
+
+
+def build_groups(board_landings):
+    """Returns a dict of color group to the positions in that group"""
+    groups = {}
+    for position, landing in board_landings.items():
+        if landing.is_property:
+            groups.setdefault(landing.group, []).append(position)
+    return {group: tuple(positions) for group, positions in groups.items()}
+
+
+class Properties:
+    """
+    Tracks property ownership for a single game, and resolves the rent due on landing
+
+    Monopolies and railroad/utility counts are updated as ownership changes,
+    so that rent is a single lookup in the board's precomputed rent table.
+    Each player's house and hotel totals are likewise kept up to date as buildings change hands with the bank.
+    """
+
+    def __init__(self, board, bank):
+        self.board = board
+        self.bank = bank
+        self.owners = [None] * len(board.landings)
+        self.houses = [0] * len(board.landings)
+        self.monopoly = [False] * len(board.landings)
+        self._group_counts = {}  # (player id, group) -> number of properties owned in the group
+        self.railroad_counts = {}  # player id -> number of railroads owned
+        self.utility_counts = {}  # player id -> number of utilities owned
+        self.house_counts = {}  # player id -> number of houses owned
+        self.hotel_counts = {}  # player id -> number of hotels owned
+        self.ownership_changes = 0  # Counts every change of owner, so strategies can tell when to look again
+
+    def reset(self):
+        """Returns every property to the bank with no buildings, as at the start of a game"""
+        size = len(self.board.landings)
+        self.owners[:] = [None] * size
+        self.houses[:] = [0] * size
+        self.monopoly[:] = [False] * size
+        self._group_counts.clear()
+        self.railroad_counts.clear()
+        self.utility_counts.clear()
+        self.house_counts.clear()
+        self.hotel_counts.clear()
+        # Counted on rather than restarted, a change seen before the reset must not look current
+        self.ownership_changes += 1
+
+    def owner(self, position):
+        """Returns the player owning the property, or None if the bank still owns it"""
+        return self.owners[position]
+
+    def owned_by(self, player):
+        """Returns the positions owned by the player"""
+        return [p for p, owner in enumerate(self.owners) if owner is player]
+
+    def _update_counts(self, player, position, change):
+        """Apply an ownership change of +1/-1 for the player to the incremental counters"""
+        landing = self.board.landings[position]
+
+        if landing.is_railroad:
+            self.railroad_counts[player.id] = (
+                self.railroad_counts.get(player.id, 0) + change
+            )
+        elif landing.is_utility:
+            self.utility_counts[player.id] = (
+                self.utility_counts.get(player.id, 0) + change
+            )
+
+        key = (player.id, landing.group)
+        count = self._group_counts.get(key, 0) + change
+        self._group_counts[key] = count
+
+        positions = self.board.groups[landing.group]
+        has_monopoly = count == len(positions)
+        if has_monopoly or change < 0:
+            # Only the group being changed can gain or lose its monopoly
+            for p in positions:
+                self.monopoly[p] = has_monopoly
+
+    def set_owner(self, position, player):
+        """Changes the owner of a property, pass None to return the property to the bank"""
+        landing = self.board.landings[position]
+        if not landing.is_property:
+            raise ValueError(f"{landing} cannot be owned")
+
+        if self.houses[position]:
+            raise ValueError(f"Buildings on {landing} must be sold before it changes owner")
+
+        previous_owner = self.owners[position]
+        if previous_owner is not None:
+            self._update_counts(previous_owner, position, -1)
+
+        self.owners[position] = player
+        if player is not None:
+            self._update_counts(player, position, +1)
+        self.ownership_changes += 1
+
+    def group_count(self, player, group):
+        """Returns the number of properties the player owns in the color group"""
+        return self._group_counts.get((player.id, group), 0)
+
+    def has_monopoly(self, player, group):
+        """Returns True if the player owns every property in the color group"""
+        return self.group_count(player, group) == len(self.board.groups[group])
+
+    def rent(self, position, dice_total=None):
+        """Returns the rent owed for landing on an owned property"""
+        owner = self.owners[position]
+        if owner is None:
+            return 0
+
+        landing = self.board.landings[position]
+        if landing.is_railroad:
+            key = (position, 0, False, self.railroad_counts[owner.id], 0)
+        elif landing.is_utility:
+            key = (position, 0, False, 0, self.utility_counts[owner.id])
+            return self.board.rent_table[key] * dice_total
+        else:
+            key = (position, self.houses[position], self.monopoly[position], 0, 0)
+
+        return self.board.rent_table[key]
+
+    def building_counts(self, player):
+        """Returns the number of houses and hotels the player owns"""
+        return self.house_counts.get(player.id, 0), self.hotel_counts.get(player.id, 0)
+
+    def can_build(self, position):
+        """Returns True if a house, or a hotel on a property with 4 houses, can be built on the property"""
+        owner = self.owners[position]
+        houses = self.houses[position]
+        if owner is None or not self.monopoly[position] or houses == HOTEL:
+            return False
+        if not self.board.landings[position].house_cost:
+            # Railroads and utilities can't be built on
+            return False
+
+        # Houses must be built evenly across a color group
+        group = self.board.groups[self.board.landings[position].group]
+        if any(self.houses[p] < houses for p in group):
+            return False
+
+        return self.bank.hotels > 0 if houses == HOTEL - 1 else self.bank.houses > 0
+
+    def build(self, position):
+        """Adds a house to the property, or upgrades 4 houses to a hotel, taking the building from the bank"""
+        if not self.can_build(position):
+            raise ValueError(f"You cannot build on {self.board.landings[position]}")
+
+        owner_id = self.owners[position].id
+        if self.houses[position] == HOTEL - 1:
+            self.bank.take_hotel()
+            self.bank.return_houses(HOTEL - 1)
+            self.house_counts[owner_id] -= HOTEL - 1
+            self.hotel_counts[owner_id] = self.hotel_counts.get(owner_id, 0) + 1
+        else:
+            self.bank.take_house()
+            self.house_counts[owner_id] = self.house_counts.get(owner_id, 0) + 1
+
+        self.houses[position] += 1
+
+    def sell(self, position):
+        """Sells a house, or breaks a hotel back down to 4 houses, returning the building to the bank"""
+        houses = self.houses[position]
+        if houses == 0:
+            raise ValueError(f"There are no buildings on {self.board.landings[position]}")
+
+        # Houses must be sold evenly across a color group
+        group = self.board.groups[self.board.landings[position].group]
+        if any(self.houses[p] > houses for p in group):
+            raise ValueError(f"Sell the other buildings in the {self.board.landings[position].group} group first")
+
+        owner_id = self.owners[position].id
+        if houses == HOTEL:
+            # Breaking down a hotel needs 4 houses from the bank
+            self.bank.take_houses(HOTEL - 1)
+            self.bank.return_hotel()
+            self.hotel_counts[owner_id] -= 1
+            self.house_counts[owner_id] = self.house_counts.get(owner_id, 0) + HOTEL - 1
+        else:
+            self.bank.return_houses(1)
+            self.house_counts[owner_id] -= 1
+
+        self.houses[position] -= 1
+
+    def clear_buildings(self, position):
+        """
+        Returns every building on the property to the bank at once, without breaking hotels down into houses
+        Returns the number of buildings cleared, counting a hotel as 5
+        """
+        houses = self.houses[position]
+        if not houses:
+            return 0
+
+        owner_id = self.owners[position].id
+        if houses == HOTEL:
+            self.bank.return_hotel()
+            self.hotel_counts[owner_id] -= 1
+        else:
+            self.bank.return_houses(houses)
+            self.house_counts[owner_id] -= houses
+
+        self.houses[position] = 0
+        return houses
@@ -0,0 +1,131 @@
+import math
+
+import main
+
+DICE_PAIRS = [(die1, die2) for die1 in range(1, 7) for die2 in range(1, 7)]
+
+
+class LikelihoodRatio:
+    """The likelihood ratio of a game, nominal over biased probability, kept as a log to avoid underflow"""
+
+    def __init__(self):
+        self.log_ratio = 0.0
+
+    def multiply(self, nominal, biased):
+        self.log_ratio += math.log(nominal) - math.log(biased)
+
+    @property
+    def ratio(self):
+        return math.exp(self.log_ratio)
+
+
+class BiasedDice(main.Dice):
+    """Dice that roll each of the 36 pairs with the given weights, rather than uniformly"""
+
+    def __init__(self, rng, pair_weights, likelihood_ratio):
+        super().__init__(rng)
+        total = sum(pair_weights)
+        self.probabilities = [w / total for w in pair_weights]
+        self.cumulative_weights = []
+        running = 0
+        for w in pair_weights:
+            running += w
+            self.cumulative_weights.append(running)
+        self.likelihood_ratio = likelihood_ratio
+
+    def roll(self):
+        """Roll 2 Dice"""
+        (index,) = self.rng.choices(range(36), cum_weights=self.cumulative_weights)
+        self.die1, self.die2 = DICE_PAIRS[index]
+        self.likelihood_ratio.multiply(1 / 36, self.probabilities[index])
+        main.log(f"Dice rolled: {self.die1} + {self.die2} = {self.total}")
+
+
+def doubles_bias(weight):
+    """Returns pair weights making each double `weight` times as likely as any other pair"""
+    return [weight if die1 == die2 else 1 for die1, die2 in DICE_PAIRS]
+
+
+def bias_deck(deck, card_id, top_probability, rng, likelihood_ratio):
+    """
+    Moves a card to the top of a freshly shuffled deck with probability top_probability
+    Otherwise the card stays where the shuffle put it, so it can still end up anywhere.
+    """
+    cards = deck.cards
+    n = len(cards)
+    index = [c.id for c in cards].index(card_id)
+    if rng.random() < top_probability:
+        cards.append(cards.pop(index))
+        index = n - 1
+
+    # Cards are drawn from the end of the list
+    biased = top_probability + (1 - top_probability) / n if index == n - 1 else (1 - top_probability) / n
+    likelihood_ratio.multiply(1 / n, biased)
+
+
+class Estimate:
+    """An estimated probability, with a confidence interval"""
+
+    def __init__(self, probability, standard_error, z, samples, effective_samples):
+        self.probability = probability
+        self.standard_error = standard_error
+        self.low = probability - z * standard_error
+        self.high = probability + z * standard_error
+        self.samples = samples
+        self.effective_samples = effective_samples  # How many unweighted games the samples are worth
+
+    def __repr__(self):
+        return f"Estimate({self.probability:.6g}, {self.low:.6g} to {self.high:.6g}, {self.samples} games)"
+
+
+class ImportanceSampler:
+    """
+    Estimates the probability of rare events by playing games with biased dice and decks
+
+    Each game is weighted by its likelihood ratio, the probability of its dice rolls and card order
+    under the real rules over their probability under the bias, which keeps the estimate unbiased.
+    Bias towards the event being studied and it shows up often enough to estimate with far fewer games.
+
+    event is a function of a finished game, returning True if the event happened.
+    dice_weights is 36 weights for the dice pairs, in DICE_PAIRS order, e.g. from doubles_bias().
+    card_bias is a dict of (deck code name, card id) to the probability of moving that card to the top of its deck.
+    """
+
+    def __init__(self, players, event, policy, dice_weights=None, card_bias=None):
+        self.players = players
+        self.event = event
+        self.policy = policy
+        self.dice_weights = dice_weights
+        self.card_bias = card_bias or {}
+
+    def play(self, seed):
+        """Plays a biased game, returning whether the event happened and the game's likelihood ratio"""
+        likelihood_ratio = LikelihoodRatio()
+        game = main.Game(seed=seed)
+        for name, player_obj in self.players:
+            game.add_player(name, player_obj)
+
+        if self.dice_weights is not None:
+            for player in game.players:
+                player.dice = BiasedDice(game.rng, self.dice_weights, likelihood_ratio)
+
+        decks = {"chance": game.board.chance, "community_chest": game.board.community_chest}
+        for (deck_code_name, card_id), top_probability in self.card_bias.items():
+            bias_deck(decks[deck_code_name], card_id, top_probability, game.rng, likelihood_ratio)
+
+        game.run(self.policy)
+        return self.event(game), likelihood_ratio.ratio
+
+    def estimate(self, seeds, z=1.96):
+        """Plays a game for each seed, returning the estimated probability with a confidence interval"""
+        with main.logger.disabled():
+            outcomes = [self.play(seed) for seed in seeds]
+
+        weights = [ratio for _, ratio in outcomes]
+        values = [ratio if happened else 0.0 for happened, ratio in outcomes]
+        n = len(values)
+        mean = sum(values) / n
+        variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+        weight_squares = sum(w * w for w in weights)
+        effective_samples = sum(weights) ** 2 / weight_squares if weight_squares else 0.0
+        return Estimate(mean, math.sqrt(variance / n), z, n, effective_samples)
@@ -0,0 +1,193 @@
+import math
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of values, using Welford's online algorithm"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared differences from the mean
+        self.min = None
+        self.max = None
+
+    def push(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def merge(self, other):
+        """Combines another RunningStats into this one, as if it had seen both streams"""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class Histogram:
+    """Counts of values in fixed-width bins, with values outside the range counted in the first/last bin"""
+
+    def __init__(self, low, high, bins):
+        self.low = low
+        self.high = high
+        self.width = (high - low) / bins
+        self.counts = [0] * bins
+
+    def push(self, value, count=1):
+        index = int((value - self.low) // self.width)
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += count
+
+    def merge(self, other):
+        if (other.low, other.high, len(other.counts)) != (
+            self.low,
+            self.high,
+            len(self.counts),
+        ):
+            raise ValueError("Only histograms with the same bins can be merged")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of a stream of values, accurate to a relative error (DDSketch)
+
+    Values are counted in logarithmically sized buckets, so memory grows with the
+    range of the values seen rather than how many there are, and sketches merge exactly.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}  # bucket -> count
+        self.negative = {}  # bucket -> count, for the absolute value of negative values
+        self.zero_count = 0
+        self.count = 0
+
+    def _bucket(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, bucket):
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def push(self, value):
+        self.count += 1
+        if value > 0:
+            bucket = self._bucket(value)
+            self.positive[bucket] = self.positive.get(bucket, 0) + 1
+        elif value < 0:
+            bucket = self._bucket(-value)
+            self.negative[bucket] = self.negative.get(bucket, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def quantile(self, q):
+        """Returns the approximate value below which q (0-1) of the values fall"""
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self._value(bucket)
+        seen += self.zero_count
+        if seen > rank:
+            return 0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self._value(bucket)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same accuracy can be merged")
+        for bucket, count in other.positive.items():
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        for bucket, count in other.negative.items():
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+
+class GameStats:
+    """
+    Aggregates statistics over any number of games in constant memory
+
+    Pass an instance to Game(stats=...) for every game in a run. Stats gathered by
+    separate workers can be combined with merge().
+    """
+
+    def __init__(self, board_size=40, turn_bins=50, turns_per_bin=10):
+        self.tile_landings = [0] * board_size
+        self.card_draws = {}  # (deck code name, card id) -> count
+        self.turns_per_bin = turns_per_bin
+        self.cash_by_turn = [RunningStats() for _ in range(turn_bins)]
+        self.cash = QuantileSketch()
+        self.jail_turns = Histogram(0, 4, 4)
+        self.game_turns = RunningStats()
+        self.game_turns_quantiles = QuantileSketch()
+        self.games = 0
+        self._turns_in_jail = {}  # player id -> turns spent in jail so far, for the game in progress
+
+    def record_landing(self, event):
+        """Subscribed to Moved events, whenever a player's piece lands on a position"""
+        self.tile_landings[event.position_id] += 1
+
+    def record_card(self, event):
+        """Subscribed to CardDrawn events, whenever a card is drawn"""
+        key = (event.card.deck_code_name, event.card.id)
+        self.card_draws[key] = self.card_draws.get(key, 0) + 1
+
+    def record_turn(self, game, player):
+        """Called at the end of each player turn"""
+        index = min(game.turn_count // self.turns_per_bin, len(self.cash_by_turn) - 1)
+        self.cash_by_turn[index].push(player.cash)
+        self.cash.push(player.cash)
+
+        if player.in_jail and not player.bankrupt:
+            self._turns_in_jail[player.id] = self._turns_in_jail.get(player.id, 0) + 1
+        elif player.id in self._turns_in_jail:
+            self.jail_turns.push(self._turns_in_jail.pop(player.id))
+
+    def record_game(self, game):
+        """Called once a game has finished"""
+        self.games += 1
+        self.game_turns.push(game.turn_count)
+        self.game_turns_quantiles.push(game.turn_count)
+        self._turns_in_jail = {}
+
+    def merge(self, other):
+        """Combines the stats gathered by another GameStats into this one"""
+        self.tile_landings = [a + b for a, b in zip(self.tile_landings, other.tile_landings)]
+        for key, count in other.card_draws.items():
+            self.card_draws[key] = self.card_draws.get(key, 0) + count
+        for mine, theirs in zip(self.cash_by_turn, other.cash_by_turn):
+            mine.merge(theirs)
+        self.cash.merge(other.cash)
+        self.jail_turns.merge(other.jail_turns)
+        self.game_turns.merge(other.game_turns)
+        self.game_turns_quantiles.merge(other.game_turns_quantiles)
+        self.games += other.games
@@ -0,0 +1,312 @@
+import functools
+import sqlite3
+import struct
+from array import array
+
+import landings
+from traces import CARD_NONE, COMMUNITY_CHEST_OFFSET, card_code
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lineups (id INTEGER PRIMARY KEY, strategies TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS lineup_seats (
+    lineup_id INTEGER,
+    seat INTEGER,
+    strategy TEXT,
+    PRIMARY KEY (lineup_id, seat)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    seed INTEGER,
+    turns INTEGER,
+    winner_seat INTEGER,
+    winner_strategy TEXT,
+    stopped_early INTEGER,
+    lineup_id INTEGER,
+    results BLOB
+);
+CREATE TABLE IF NOT EXISTS counts (
+    game_id INTEGER,
+    seat INTEGER,
+    kind INTEGER,
+    id INTEGER,
+    count INTEGER,
+    PRIMARY KEY (game_id, seat, kind, id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS lineup_seats_strategy ON lineup_seats (strategy, lineup_id, seat);
+CREATE INDEX IF NOT EXISTS games_seed ON games (seed);
+CREATE INDEX IF NOT EXISTS games_turns ON games (turns);
+CREATE INDEX IF NOT EXISTS games_winner ON games (winner_strategy, winner_seat);
+CREATE INDEX IF NOT EXISTS games_lineup ON games (lineup_id);
+CREATE INDEX IF NOT EXISTS counts_count ON counts (kind, id, count);
+"""
+
+BOARD_SIZE = 40
+CARDS = COMMUNITY_CHEST_OFFSET + len(landings.CommunityChest.cards)
+COUNTS = BOARD_SIZE + CARDS  # Counts per seat, tiles first and then cards
+
+# Kinds of count in the counts table
+TILE = 0  # Turns a seat ended on a tile
+CARD = 1  # Draws of a card by a seat
+
+# Whether each seat went bankrupt and their final cash are packed into one blob per game
+RESULT = struct.Struct("=?q")
+
+
+@functools.lru_cache
+def _results_struct(num_seats):
+    return struct.Struct("=" + RESULT.format[1:] * num_seats)
+
+
+def _seat_result(results, seat):
+    """Returns whether a seat went bankrupt and their final cash from a game's packed results"""
+    return RESULT.unpack_from(results, RESULT.size * seat)
+
+
+class GameSummary:
+    """What the trace store keeps about a finished game"""
+
+    def __init__(self, seed, turns, winner_seat, stopped_early, players):
+        self.seed = seed
+        self.turns = turns
+        self.winner_seat = winner_seat
+        self.stopped_early = stopped_early
+        self.players = players  # (seat, strategy, bankrupt, cash) for each player, in seat order
+        # Every seat's turns ending on each tile followed by draws of each card, seat after seat
+        self.counts = array("I")
+
+    def count_turn(self, seat, position, card):
+        """Counts where a player's turn ended, and the card they drew"""
+        counts = self.counts
+        offset = seat * COUNTS
+        if len(counts) <= offset:
+            counts.extend(bytes(offset + COUNTS - len(counts)))
+        counts[offset + position] += 1
+        if card != CARD_NONE:
+            counts[offset + BOARD_SIZE + card] += 1
+
+    def count_rows(self, game_id):
+        """Returns the (game_id, seat, kind, id, count) rows of the counts that aren't 0"""
+        rows = []
+        for index, count in enumerate(self.counts):
+            if count:
+                seat, index = divmod(index, COUNTS)
+                if index < BOARD_SIZE:
+                    rows.append((game_id, seat, TILE, index, count))
+                else:
+                    rows.append((game_id, seat, CARD, index - BOARD_SIZE, count))
+        return rows
+
+    def pack_results(self):
+        """Returns whether each seat went bankrupt and their final cash, packed as the store keeps them"""
+        results = []
+        for _, _, bankrupt, cash in self.players:
+            results += (bankrupt, cash or 0)
+        return _results_struct(len(self.players)).pack(*results)
+
+    @classmethod
+    def from_turns(cls, seed, turns, strategies, winner_seat, stopped_early=False):
+        """
+        Builds a summary from an event log, such as a game read back from an archive
+        strategies is the strategy name for each seat
+        """
+        final_cash = {}
+        for seat, _, _, _, cash, _, _ in turns:
+            final_cash[seat] = cash
+        # Bankrupt players hand over all their cash
+        players = [
+            (seat, strategy, seat != winner_seat and final_cash.get(seat, 0) <= 0, final_cash.get(seat))
+            for seat, strategy in enumerate(strategies)
+        ]
+        summary = cls(seed, len(turns), winner_seat, stopped_early, players)
+        for seat, _, _, position, _, _, card in turns:
+            summary.count_turn(seat, position, card)
+        return summary
+
+
+class SummaryRecorder:
+    """
+    Builds a GameSummary of every game it is passed to as Game(trace=...)
+    Summaries collect in self.summaries, ready for TraceStore.ingest()
+    """
+
+    def __init__(self):
+        self.summaries = []
+        self._summary = None
+
+    def record_turn(self, game, player):
+        if self._summary is None:
+            self._summary = GameSummary(game.seed, 0, None, False, [])
+        self._summary.count_turn(player.seat, player.position_id, card_code(game.turn_card))
+
+    def record_game(self, game):
+        summary = self._summary or GameSummary(game.seed, 0, None, False, [])
+        winner = game.winner
+        summary.turns = game.turn_count
+        summary.winner_seat = winner.seat if winner else None
+        summary.stopped_early = game.stopped_early
+        summary.players = [
+            (p.seat, type(p).__name__, p.bankrupt, p.cash)
+            for p in sorted(game.players + game.eliminated, key=lambda p: p.seat)
+        ]
+        self.summaries.append(summary)
+        self._summary = None
+
+
+class TraceStore:
+    """
+    A SQLite database of finished games, indexed for finding games worth a closer look
+
+    Ingest summaries in bulk with ingest(), then search with find_games().
+    The strategies at each seat are kept as a lineup, shared by every game with the same seating,
+    and each seat's tile and card counts that aren't 0 are rows of the counts table,
+    indexed by what was counted, so a search joins the games, lineup seats and counts through indexes.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.executescript(SCHEMA)
+        self.lineups = {
+            tuple(strategies.split(",")): lineup_id
+            for lineup_id, strategies in self.connection.execute("SELECT id, strategies FROM lineups")
+        }
+
+    def _lineup(self, strategies):
+        lineup_id = self.lineups.get(strategies)
+        if lineup_id is None:
+            lineup_id = self.connection.execute(
+                "INSERT INTO lineups (strategies) VALUES (?)", (",".join(strategies),)
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO lineup_seats VALUES (?, ?, ?)",
+                [(lineup_id, seat, strategy) for seat, strategy in enumerate(strategies)],
+            )
+            self.lineups[strategies] = lineup_id
+        return lineup_id
+
+    def ingest(self, summaries):
+        """Adds game summaries to the store in a single transaction, returning the new game ids"""
+        games, counts = [], []
+        with self.connection:
+            (next_id,) = self.connection.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM games"
+            ).fetchone()
+            first_id = next_id
+            for summary in summaries:
+                strategies = tuple(strategy for _, strategy, _, _ in summary.players)
+                winner_seat = summary.winner_seat
+                games.append(
+                    (
+                        next_id,
+                        summary.seed,
+                        summary.turns,
+                        winner_seat,
+                        strategies[winner_seat] if winner_seat is not None else None,
+                        summary.stopped_early,
+                        self._lineup(strategies),
+                        summary.pack_results(),
+                    )
+                )
+                counts += summary.count_rows(next_id)
+                next_id += 1
+
+            self.connection.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)", games)
+            self.connection.executemany("INSERT INTO counts VALUES (?, ?, ?, ?, ?)", counts)
+        return list(range(first_id, next_id))
+
+    def find_games(
+        self,
+        strategy=None,
+        won=None,
+        seed=None,
+        min_turns=None,
+        max_turns=None,
+        cards=None,
+        min_card_draws=1,
+        tile=None,
+        min_tile_landings=1,
+    ):
+        """
+        Returns the ids of games in which a player matches every condition given
+
+        strategy: the player's strategy class name
+        won: True for players who won, False for players who lost
+        cards: a card code, or list of card codes, the player drew at least min_card_draws times in total
+        tile: a position the player ended at least min_tile_landings turns on
+
+        e.g. games where DefaultPlayer lost after drawing either Go to Jail card twice:
+            find_games(strategy="DefaultPlayer", won=False, min_card_draws=2, cards=[
+                Chance.GO_TO_JAIL, COMMUNITY_CHEST_OFFSET + CommunityChest.GO_TO_JAIL,
+            ])
+        """
+        joins, conditions, group = [], [], ""
+        join_params, params, group_params = [], [], []
+        if seed is not None:
+            conditions.append("g.seed = ?")
+            params.append(seed)
+        if min_turns is not None:
+            conditions.append("g.turns >= ?")
+            params.append(min_turns)
+        if max_turns is not None:
+            conditions.append("g.turns <= ?")
+            params.append(max_turns)
+
+        if strategy is not None or won is not None or cards is not None or tile is not None:
+            # Every seat of the game the player could be in
+            joins.append("JOIN lineup_seats s ON s.lineup_id = g.lineup_id")
+            if strategy is not None:
+                conditions.append("s.strategy = ?")
+                params.append(strategy)
+            if won:
+                conditions.append("g.winner_seat = s.seat")
+                if strategy is not None:
+                    conditions.append("g.winner_strategy = ?")
+                    params.append(strategy)
+            elif won is not None:
+                conditions.append("g.winner_seat IS NOT s.seat")
+            if tile is not None:
+                joins.append(
+                    "JOIN counts t ON t.game_id = g.id AND t.seat = s.seat"
+                    " AND t.kind = ? AND t.id = ? AND t.count >= ?"
+                )
+                join_params += (TILE, tile, min_tile_landings)
+            if cards is not None:
+                cards = [cards] if isinstance(cards, int) else list(cards)
+                joins.append(
+                    "JOIN counts c ON c.game_id = g.id AND c.seat = s.seat"
+                    f" AND c.kind = ? AND c.id IN ({', '.join('?' * len(cards))})"
+                )
+                join_params += (CARD, *cards)
+                group = " GROUP BY g.id, s.seat HAVING SUM(c.count) >= ?"
+                group_params.append(min_card_draws)
+
+        query = "SELECT DISTINCT g.id FROM games g " + " ".join(joins)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += group + " ORDER BY g.id"
+        return [row[0] for row in self.connection.execute(query, join_params + params + group_params)]
+
+    def game(self, game_id):
+        """Returns the stored row for a game as a dict, with its players as (seat, strategy, bankrupt, cash)"""
+        cursor = self.connection.execute(
+            "SELECT g.*, l.strategies FROM games g JOIN lineups l ON l.id = g.lineup_id WHERE g.id = ?",
+            (game_id,),
+        )
+        names = [d[0] for d in cursor.description]
+        row = cursor.fetchone()
+        if not row:
+            return None
+        game = dict(zip(names, row))
+        results = game.pop("results")
+        strategies = game.pop("strategies").split(",")
+        del game["lineup_id"]
+        game["players"] = [
+            (seat, strategy) + _seat_result(results, seat)
+            for seat, strategy in enumerate(strategies)
+        ]
+        return game
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,188 @@
+import copyreg
+import functools
+import re
+
+import main
+import properties
+
+# A strategy is written as a decision per line, each a list of clauses tried in order, the last without a condition:
+#
+#   leave_jail: card if cards > 0; pay if cash >= 1000; roll
+#   buy: yes if cash - price >= 200; no
+#   build: cash - house_cost >= 500
+#   bid: price if cash - price >= 200; cash - 200 if cash > 200; 0
+#
+# leave_jail chooses card, pay or roll, buy chooses yes or no and bid an amount, which can be worked out.
+# build is a single condition, checked for each property that can be built on in turn:
+# cash is then what's left after paying for the buildings before it.
+# Conditions compare whole numbers with + - * // ( ) and combine with and, or and not.
+# Decisions not given are made as DefaultPlayer makes them, lines starting with # are ignored.
+#
+# Names that can be used in every decision
+NAMES = {
+    "cash": "self.cash",
+    "cards": "len(self.get_out_of_jail_free_cards)",  # Get Out of Jail Free cards held
+    "jail_rolls": "self.dice.jail_roll_count",  # Failed rolls to leave jail
+    "players": "len(self.game.players)",  # Players left in the game
+    "turn": "self.game.turn_count",
+}
+# Names for the property on offer in buy and bid
+LANDING_NAMES = {
+    "price": "landing.price",
+    "owned": "self.game.properties.group_count(self, landing.group)",  # Properties already held in its group
+    "group_size": "len(self.game.board.groups[landing.group])",
+}
+# Names for the property considered in build
+BUILD_NAMES = {
+    "cash": "cash",
+    "house_cost": "house_cost",
+    "houses": "houses",  # Buildings on it already, 5 for a hotel
+}
+
+DECISIONS = {
+    # decision: (method, arguments, names, choices)
+    "leave_jail": (
+        "leave_jail_option",
+        "self",
+        NAMES,
+        {
+            "card": repr(main.Board.LEAVE_JAIL_USE_CARD),
+            "pay": repr(main.Board.LEAVE_JAIL_PAY),
+            "roll": repr(main.Board.LEAVE_JAIL_ROLL),
+        },
+    ),
+    "buy": ("buy_property_option", "self, landing", {**NAMES, **LANDING_NAMES}, {"yes": "True", "no": "False"}),
+    "bid": ("bid_option", "self, landing", {**NAMES, **LANDING_NAMES}, {}),
+    "build": ("build_option", "self", {**NAMES, **BUILD_NAMES}, {}),
+}
+
+TOKEN = re.compile(r"\s*(?:(\d+)|([A-Za-z_]\w*)|(>=|<=|==|!=|//|[-+*()<>]))")
+KEYWORDS = {"and", "or", "not"}
+
+BUILD_TEMPLATE = """
+def build_option(self):
+    game_properties = self.game.properties
+    cash = self.cash
+    houses_left, hotels_left = self.game.bank.houses, self.game.bank.hotels
+    build = []
+    for position in game_properties.owned_by(self):
+        if not game_properties.can_build(position):
+            continue
+        house_cost = self.game.board.landings[position].house_cost
+        houses = game_properties.houses[position]
+        hotel = houses == HOTEL - 1
+        if (hotels_left if hotel else houses_left) == 0 or not ({condition}):
+            continue
+        build.append(position)
+        cash -= house_cost
+        if hotel:
+            hotels_left -= 1
+        else:
+            houses_left -= 1
+    return build
+"""
+
+
+def _expression(text, decision, names, choices=None):
+    """Translates an expression of the strategy language to Python, checking every name in it"""
+    source = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Can't read {text[position:]!r} in {decision}")
+        number, name, operator = match.groups()
+        if name is not None:
+            if name in KEYWORDS:
+                source.append(name)
+            elif choices and name in choices:
+                source.append(choices[name])
+            elif name in names:
+                source.append(f"({names[name]})")
+            else:
+                raise ValueError(f"Unknown name {name!r} in {decision}")
+        else:
+            source.append(number or operator)
+        position = match.end()
+    if not source:
+        raise ValueError(f"Missing expression in {decision}")
+    return " ".join(source)
+
+
+def _decision_source(decision, text):
+    """Returns the Python source of the method making a decision"""
+    method, arguments, names, choices = DECISIONS[decision]
+    if decision == "build":
+        return BUILD_TEMPLATE.format(condition=_expression(text, decision, names))
+
+    clauses = [clause.strip() for clause in text.split(";")]
+    *conditional, default = clauses
+    if re.search(r"\bif\b", default):
+        raise ValueError(f"The last clause of {decision} must be unconditional, not {default!r}")
+
+    def choice(text):
+        # Choices are one of a decision's words, or an amount for bids
+        if choices and text.strip() not in choices:
+            raise ValueError(f"{decision} must choose one of {', '.join(choices)}, not {text.strip()!r}")
+        return _expression(text, decision, names, choices)
+
+    source = choice(default)
+    for clause in reversed(conditional):
+        then, found, condition = clause.partition(" if ")
+        if not found:
+            raise ValueError(f"Expected 'choice if condition' in {decision}, not {clause!r}")
+        source = f"({choice(then)} if ({_expression(condition, decision, names)}) else {source})"
+    return f"def {method}({arguments}):\n    return {source}\n"
+
+
+class StrategyType(type):
+    """The type of compiled strategies, so they can be pickled by their source"""
+
+
+copyreg.pickle(StrategyType, lambda cls: (compile_strategy, (cls.strategy, cls.__name__)))
+
+
+def compile_strategy(strategy, name="CompiledPlayer"):
+    """
+    Compiles a strategy written in the strategy language into a player class
+
+    Each decision becomes a method of plain Python, compiled once, so the compiled player decides
+    as fast as a hand-written one. Compiling the same strategy again returns the same class,
+    and the classes pickle by their strategy, so they can be sent to worker processes.
+    Raises ValueError if the strategy can't be compiled.
+    """
+    return _compile(strategy, name)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(strategy, name):
+    namespace = {"HOTEL": properties.HOTEL, "__builtins__": {"len": len}}
+    methods = {}
+    for number, line in enumerate(strategy.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        decision, found, text = line.partition(":")
+        decision = decision.strip()
+        if not found or decision not in DECISIONS:
+            raise ValueError(f"Line {number} should start with one of {', '.join(DECISIONS)} and a colon")
+        method = DECISIONS[decision][0]
+        if method in methods:
+            raise ValueError(f"{decision} is given twice")
+        source = _decision_source(decision, text)
+        try:
+            exec(compile(source, f"<strategy {name}: {decision}>", "exec"), namespace)
+        except SyntaxError as error:
+            raise ValueError(f"Can't compile {decision}: {error.msg}") from None
+        methods[method] = namespace.pop(method)
+
+    return StrategyType(name, (main.DefaultPlayer,), {**methods, "strategy": strategy})
+
+
+DEFAULT_STRATEGY = """
+leave_jail: card if cards > 0; pay if cash >= 1000; roll
+buy: yes if cash - price >= 200; no
+build: cash - house_cost >= 500
+bid: price if cash - price >= 200; cash - 200 if cash > 200; 0
+"""  # DefaultPlayer, written in the strategy language
@@ -0,0 +1,67 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import cluster
+import jobs
+import main
+import strategies
+
+
+def grid_rules(grid):
+    """
+    Returns Rules for every combination of the values in the grid
+    e.g. grid_rules({"jail_fine": [50, 100], "go_salary": [200, 400]}) gives 4 variants
+    """
+    names = sorted(grid)
+    return [
+        main.Rules(**dict(zip(names, values)))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def grid_strategies(template, grid, name="CompiledPlayer"):
+    """
+    Returns a compiled strategy for every combination of the values in the grid, filled into the template
+    e.g. grid_strategies("leave_jail: pay if cash >= {fine_cash}; roll", {"fine_cash": range(0, 2000, 10)})
+    gives 200 variants, see strategies for the strategy language
+    """
+    names = sorted(grid)
+    return [
+        strategies.compile_strategy(template.format(**dict(zip(names, values))), name)
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def _run_shard(seeds, players, policy, rules):
+    return jobs.SimulationJob(None, seeds, players, policy, rules=rules).run()
+
+
+def sweep(grid, seeds, players, policy=None, shard_size=100, workers=None):
+    """
+    Plays the same seeds under every combination of house rules in the grid
+    Returns a dict of Rules to the merged stats and win counts of its games
+
+    Every variant plays the same seeds, so each variant's games see the same dice and card shuffles
+    unless the rules send them down a different path. Comparing variants on common random numbers
+    like this needs far fewer games than comparing independent runs.
+    Shards of every variant are spread over a pool of worker processes, pass workers=0 to run in this process.
+    """
+    variants = grid_rules(grid)
+    shards = [seeds[i : i + shard_size] for i in range(0, len(seeds), shard_size)]
+    tasks = [(rules, shard) for rules in variants for shard in shards]
+
+    if workers == 0:
+        results = [_run_shard(shard, players, policy, rules) for rules, shard in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_shard, shard, players, policy, rules)
+                for rules, shard in tasks
+            ]
+            results = [future.result() for future in futures]
+
+    # Results are merged in shard order, so the outcome doesn't depend on how the shards were scheduled
+    return {
+        rules: cluster.merge_results(results[i * len(shards) : (i + 1) * len(shards)])
+        for i, rules in enumerate(variants)
+    }
@@ -1,8 +1,37 @@
+import multiprocessing
+import os
+import pickle
+import random
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from unittest import mock
 
+import archive
+import auctions
+import bots
+import budgets
+import cache
+import cluster
+import env
+import events
+import jobs
 import main
 import landings
+import ledger
+import probabilities
+import properties
+import rare
+import stats
+import store
+import strategies
+import sweep
+import traces
+import trading
 
 
 @pytest.fixture
@@ -13,6 +42,13 @@ def game():
     return game
 
 
+@pytest.fixture
+def quiet():
+    """Turns off logging for the test"""
+    with main.logger.disabled():
+        yield
+
+
 @pytest.fixture
 def game_2_players():
     game = main.Game()
@@ -142,6 +178,22 @@ class TestBoard:
         assert position[0] == board.READING_RAILROAD
         assert position[1] == board.landings[board.READING_RAILROAD]
 
+    def test_board_kinds(self, board):
+        """Verify every position's kind matches its landing"""
+        assert len(board.kinds) == len(board.landings)
+        assert board.kinds[board.CHANCE_2] == landings.CHANCE
+        assert board.kinds[board.COMMUNITY_CHEST_3] == landings.COMMUNITY_CHEST
+        assert board.kinds[board.GO_TO_JAIL] == landings.GO_TO_JAIL
+        assert board.kinds[board.INCOME_TAX] == board.kinds[board.LUXERY_TAX] == landings.TAX
+        assert board.kinds[board.FREE_PARKING] == landings.PLAIN
+        for position, landing in board.landings.items():
+            assert (board.kinds[position] == landings.PROPERTY) == landing.is_property
+
+    def test_board_next_position(self, board):
+        """Verify next_position() moves by position id alone, wrapping past go"""
+        assert board.next_position(board.GO, 5) == (board.READING_RAILROAD, False)
+        assert board.next_position(board.PARK_PLACE, 4) == (board.MEDITIRANEAN_AVE, True)
+
     def test_board_advance_next_utility(self, board):
         """Verify the next_utility() function returns the right utility"""
         assert board.next_utility(board.BALTIC_AVE) == board.ELECTRIC_COMPANY
@@ -389,6 +441,1504 @@ class TestGame:
         assert game.current_player.dice.jail_roll_count == 1
         assert game.current_player.in_jail is True
 
+    def test_reset_replays_seed(self, quiet):
+        """Verify a reset game plays exactly as a new game with the same seed and players"""
+        player_objs = [main.DefaultPlayer, trading.TradingPlayer, main.DefaultPlayer]
+
+        def new_game(seed):
+            game = main.Game(seed=seed, journal=True)
+            for i, player_obj in enumerate(player_objs):
+                game.add_player(f"Player{i}", player_obj)
+            return game
+
+        def result(game):
+            game.run(main.TerminationPolicy(max_turns=300))
+            seats = sorted(game.players + game.eliminated, key=lambda p: p.seat)
+            return (
+                [(p.cash, p.position[0], p.bankrupt, p.in_jail) for p in seats],
+                [owner and owner.seat for owner in game.properties.owners],
+                game.turn_count,
+                game.bank.cash,
+                game.ledger.journal.tolist(),
+            )
+
+        game = new_game(0)
+        result(game)
+        players = list(game.players + game.eliminated)
+        for seed in range(1, 6):
+            game.reset(seed)
+            assert result(game) == result(new_game(seed))
+        assert sorted(game.players + game.eliminated, key=lambda p: p.seat) == sorted(players, key=lambda p: p.seat)
+
+    def test_reset_returns_cards(self):
+        """Verify a reset gathers every card back into the decks, with no owners"""
+        game = main.Game(seed=1)
+        game.add_player("TestPlayer", main.DefaultPlayer)
+        card = game.board.chance.select_card()
+        card.owner = game.players[0]
+
+        game.reset(1)
+
+        assert len(game.board.chance.cards) == len(landings.Chance.cards)
+        assert game.board.chance.held == []
+        assert all(c.owner is None for c in game.board.chance.cards + game.board.community_chest.cards)
+        assert [c.id for c in game.board.chance.cards] == [c.id for c in main.Game(seed=1).board.chance.cards]
+
+
+class TestBankruptcy:
+
+    @pytest.fixture
+    def game(self):
+        game = main.Game(seed=1)
+        for name in ["TestPlayer1", "TestPlayer2", "TestPlayer3"]:
+            game.add_player(name, main.PlayerBase)
+        game.current_player = game.players[0]
+        return game
+
+    def test_bankrupt_to_player(self, game):
+        """Verify a player who cannot pay rent hands everything to the owner and leaves the game"""
+        player1, player2, player3 = game.players
+        game.properties.set_owner(game.board.BALTIC_AVE, player1)
+        game.properties.set_owner(game.board.BOARDWALK, player2)
+        player1.cash = 20
+
+        with pytest.raises(main.PlayerBankrupt):
+            game._land_on_property(game.board.BOARDWALK)
+
+        assert player1.bankrupt is True
+        assert game.players == [player2, player3]
+        assert game.eliminated == [player1]
+        assert player2.cash == 1520
+        assert game.properties.owner(game.board.BALTIC_AVE) is player2
+
+    def test_sell_buildings_before_bankruptcy(self, game):
+        """Verify a player short of cash sells buildings at half price rather than going bankrupt"""
+        player1 = game.current_player
+        for position in game.board.groups[landings.PropertyBase.DARK_BLUE]:
+            game.properties.set_owner(position, player1)
+        game.properties.build(game.board.PARK_PLACE)
+        player1.cash = 0
+
+        game._bank_pay(50)
+
+        assert player1.bankrupt is False
+        assert player1.cash == 50
+        assert game.properties.houses[game.board.PARK_PLACE] == 0
+        assert game.bank.houses == main.Bank.HOUSES
+
+    def test_bankrupt_other_player_on_collect(self, game):
+        """Verify a player who cannot pay the current player is eliminated without ending the turn"""
+        player1, player2, player3 = game.players
+        player3.cash = 5
+
+        game._collect_from_each_player(10)
+
+        assert game.players == [player1, player2]
+        assert player1.cash == 1500 + 10 + 5
+        assert game.winner is None
+
+    def test_run_until_winner(self, quiet):
+        """Verify a batch run plays until one player is left"""
+        game = main.Game(seed=4)
+        game.add_player("TestPlayer1", main.DefaultPlayer)
+        game.add_player("TestPlayer2", main.DefaultPlayer)
+        winner = game.run(main.TerminationPolicy(max_turns=5000))
+
+        assert winner in game.players + game.eliminated
+        assert game.winner is winner or game.stopped_early
+
+    def test_run_max_turns(self, quiet):
+        """Verify the termination policy stops a game after the max number of turns"""
+        game = main.Game(seed=4)
+        game.add_player("TestPlayer1", main.DefaultPlayer)
+        game.add_player("TestPlayer2", main.DefaultPlayer)
+        game.run(main.TerminationPolicy(max_turns=10))
+
+        assert game.stopped_early is True
+        assert game.turn_count == 10
+
+    def test_win_probability_threshold(self, game):
+        """Verify the termination policy stops a game once one player is far enough ahead"""
+        game.players[0].cash = 8000
+        policy = main.TerminationPolicy(win_probability=0.7)
+
+        assert policy.should_stop(game) is True
+        assert policy.leader(game) is game.players[0]
+
+
+class TestStats:
+
+    def test_running_stats_merge(self):
+        """Verify merging running stats matches gathering them over the whole stream"""
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5]
+        whole, first, second = stats.RunningStats(), stats.RunningStats(), stats.RunningStats()
+        for v in values:
+            whole.push(v)
+        for v in values[:4]:
+            first.push(v)
+        for v in values[4:]:
+            second.push(v)
+
+        first.merge(second)
+
+        assert first.count == whole.count
+        assert first.mean == pytest.approx(whole.mean)
+        assert first.variance == pytest.approx(whole.variance)
+        assert (first.min, first.max) == (1, 9)
+
+    def test_quantile_sketch_accuracy(self):
+        """Verify sketch quantiles are within the relative accuracy, including negative values"""
+        sketch = stats.QuantileSketch(relative_accuracy=0.01)
+        for v in range(-500, 1501):
+            sketch.push(v)
+
+        assert sketch.quantile(0.5) == pytest.approx(500, rel=0.01)
+        assert sketch.quantile(0.1) == pytest.approx(-300, rel=0.01)
+        assert sketch.quantile(1) == pytest.approx(1500, rel=0.01)
+
+    def test_game_stats_merge(self, quiet):
+        """Verify stats gathered by separate workers merge into the stats of a single run"""
+        whole, first, second = stats.GameStats(), stats.GameStats(), stats.GameStats()
+        for seed, worker_stats in [(1, first), (2, second)]:
+            for game_stats in (whole, worker_stats):
+                game = main.Game(seed=seed, stats=game_stats)
+                game.add_player("TestPlayer1", main.DefaultPlayer)
+                game.add_player("TestPlayer2", main.DefaultPlayer)
+                game.run(main.TerminationPolicy(max_turns=200))
+
+        first.merge(second)
+
+        assert first.games == whole.games == 2
+        assert first.tile_landings == whole.tile_landings
+        assert first.card_draws == whole.card_draws
+        assert first.jail_turns.counts == whole.jail_turns.counts
+        assert first.game_turns.mean == pytest.approx(whole.game_turns.mean)
+        assert sum(whole.tile_landings) > 0
+
+
+class TestTraces:
+
+    def test_trace_columns(self, quiet, tmp_path):
+        """Verify every turn is recorded as a row, growing the columns past their initial capacity"""
+        pytest.importorskip("numpy")
+        writer = traces.TraceWriter(tmp_path, capacity=8)
+        game = main.Game(seed=3, trace=writer)
+        game.add_player("TestPlayer1", main.DefaultPlayer)
+        game.add_player("TestPlayer2", main.DefaultPlayer)
+        game.run(main.TerminationPolicy(max_turns=50))
+        writer.close()
+
+        trace = traces.read_trace(tmp_path)
+
+        assert len(trace["game"]) == game.turn_count == 50
+        assert set(trace["game"]) == {0}
+        assert set(trace["seed"]) == {3}
+        assert list(trace["player"][:4]) == [0, 1, 0, 1]
+        assert ((trace["die1"] >= 0) & (trace["die1"] <= 6)).all()
+        assert ((trace["position"] >= 0) & (trace["position"] < 40)).all()
+        assert trace["cash"][-1] == game.players[1].cash
+
+    def test_card_code(self):
+        """Verify card codes are unique across both decks"""
+        chance = landings.Chance(scramble=False)
+        community_chest = landings.CommunityChest(scramble=False)
+        codes = {traces.card_code(c) for c in chance.cards + community_chest.cards}
+
+        assert len(codes) == len(chance.cards) + len(community_chest.cards)
+        assert traces.card_code(None) == traces.CARD_NONE
+
+
+class TestArchive:
+
+    def test_encode_decode_game(self):
+        """Verify a game's turns survive packing, including jail, cards and cash going down"""
+        turns = [
+            (0, 3, 4, 7, 1500, False, 3),
+            (1, 6, 6, 12, 1500, False, traces.CARD_NONE),
+            (0, 2, 5, 14, 1360, False, traces.CARD_NONE),
+            (1, 5, 6, 10, 1450, True, traces.COMMUNITY_CHEST_OFFSET + 5),
+            (0, 0, 0, 5, 1560, False, traces.CARD_NONE),
+        ]
+
+        data = archive.encode_game(turns)
+
+        assert archive.decode_game(data) == turns
+        assert len(data) < 10 * len(turns)
+
+    def test_archive_random_access(self, quiet, tmp_path):
+        """Verify games played into an archive can be read back in any order"""
+        path = tmp_path / "games.arc"
+        writer = archive.ArchiveWriter(path, block_size=512)
+        games = {}
+        for seed in range(5):
+            game = main.Game(seed=seed, trace=writer)
+            game.add_player("TestPlayer1", main.DefaultPlayer)
+            game.add_player("TestPlayer2", main.DefaultPlayer)
+            game.run(main.TerminationPolicy(max_turns=100))
+            games[seed] = game
+        writer.close()
+
+        reader = archive.ArchiveReader(path)
+
+        assert sorted(reader.games()) == list(range(5))
+        assert reader.seeds == {game_id: game_id for game_id in range(5)}
+        for seed in [3, 0, 4]:
+            turns = reader.read_game(seed)
+            assert len(turns) == games[seed].turn_count
+            seat, _, _, position, cash, _, _ = turns[-1]
+            player = [p for p in games[seed].players + games[seed].eliminated if p.seat == seat][0]
+            assert (position, cash) == (player.position[0], player.cash)
+        reader.close()
+
+    def test_unseeded_and_repeated_seeds(self, quiet, tmp_path):
+        """Verify unseeded games and games sharing a seed each get their own id, and duplicate ids are refused"""
+        path = tmp_path / "games.arc"
+        writer = archive.ArchiveWriter(path)
+        for seed in [None, None, 7, 7]:
+            game = main.Game(seed=seed, trace=writer)
+            game.add_player("TestPlayer1", main.DefaultPlayer)
+            game.add_player("TestPlayer2", main.DefaultPlayer)
+            game.run(main.TerminationPolicy(max_turns=20))
+        with pytest.raises(ValueError):
+            writer.add_game(0, [])
+        writer.close()
+
+        reader = archive.ArchiveReader(path)
+        assert reader.games() == [0, 1, 2, 3]
+        assert reader.seeds == {0: -1, 1: -1, 2: 7, 3: 7}
+        assert all(len(reader.read_game(game_id)) == 20 for game_id in reader.games())
+        reader.close()
+
+
+class TestTraceStore:
+
+    @pytest.fixture
+    def trace_store(self):
+        trace_store = store.TraceStore()
+        yield trace_store
+        trace_store.close()
+
+    def test_ingest_and_find(self, trace_store):
+        """Verify games can be found by the strategy, result and card draws of a player"""
+        go_to_jail = [
+            landings.Chance.GO_TO_JAIL,
+            traces.COMMUNITY_CHEST_OFFSET + landings.CommunityChest.GO_TO_JAIL,
+        ]
+        jailed_twice = store.GameSummary(
+            1, 40, 1, False, [(0, "DefaultPlayer", True, 0), (1, "OtherPlayer", False, 3000)]
+        )
+        jailed_twice.count_turn(0, main.Board.JAIL, go_to_jail[0])
+        jailed_twice.count_turn(0, main.Board.JAIL, go_to_jail[1])
+        jailed_once = store.GameSummary(
+            2, 60, 1, False, [(0, "DefaultPlayer", True, 0), (1, "OtherPlayer", False, 3000)]
+        )
+        jailed_once.count_turn(0, main.Board.JAIL, go_to_jail[0])
+        won = store.GameSummary(
+            3, 80, 0, False, [(0, "DefaultPlayer", False, 3000), (1, "OtherPlayer", True, 0)]
+        )
+        won.count_turn(0, main.Board.JAIL, go_to_jail[0])
+        won.count_turn(0, main.Board.JAIL, go_to_jail[0])
+
+        ids = trace_store.ingest([jailed_twice, jailed_once, won])
+        found = trace_store.find_games(
+            strategy="DefaultPlayer", won=False, cards=go_to_jail, min_card_draws=2
+        )
+
+        assert found == [ids[0]]
+        assert trace_store.find_games(min_turns=50) == ids[1:]
+        assert trace_store.find_games(tile=main.Board.JAIL, min_tile_landings=2) == [ids[0], ids[2]]
+        assert trace_store.game(ids[2])["winner_strategy"] == "DefaultPlayer"
+
+    def test_record_and_ingest_games(self, quiet, trace_store):
+        """Verify summaries recorded during play match the games played"""
+        recorder = store.SummaryRecorder()
+        for seed in range(3):
+            game = main.Game(seed=seed, trace=recorder)
+            game.add_player("TestPlayer1", main.DefaultPlayer)
+            game.add_player("TestPlayer2", main.DefaultPlayer)
+            game.run(main.TerminationPolicy(max_turns=100))
+
+        ids = trace_store.ingest(recorder.summaries)
+
+        assert trace_store.find_games(seed=2) == [ids[2]]
+        assert trace_store.game(ids[2])["turns"] == game.turn_count
+        assert trace_store.find_games(strategy="DefaultPlayer") == ids
+        assert [seat for seat, _, _, _ in trace_store.game(ids[2])["players"]] == [0, 1]
+
+    def test_many_lineups(self, trace_store):
+        """Verify a search by a player's counts stays one query however many seatings are stored"""
+        summaries = []
+        for i in range(3000):
+            summary = store.GameSummary(
+                i, 10, 0, False, [(seat, f"Player{i}_{seat}", seat != 0, 0) for seat in range(4)]
+            )
+            summary.count_turn(i % 4, main.Board.JAIL, traces.CARD_NONE)
+            summaries.append(summary)
+        ids = trace_store.ingest(summaries)
+
+        assert trace_store.find_games(tile=main.Board.JAIL, won=True) == ids[::4]
+        assert trace_store.find_games(strategy="Player5_1", tile=main.Board.JAIL) == [ids[5]]
+
+    def test_ingest_matches_summaries(self, quiet, trace_store):
+        """Verify every game recorded is ingested with the tile counts and winner it was played with"""
+        recorder = store.SummaryRecorder()
+        for seed in range(20):
+            game = main.Game(seed=seed, trace=recorder)
+            for i in range(4):
+                game.add_player(f"TestPlayer{i}", main.DefaultPlayer)
+            game.run(main.TerminationPolicy(max_turns=200))
+        ids = trace_store.ingest(recorder.summaries)
+        ids += trace_store.ingest(recorder.summaries)
+
+        jail_landings = [
+            max(summary.counts[seat * store.COUNTS + main.Board.JAIL] for seat in range(4))
+            for summary in recorder.summaries
+        ] * 2
+        for landings_needed in (1, 2, 5):
+            expected = [i for i, n in zip(ids, jail_landings) if n >= landings_needed]
+            found = trace_store.find_games(
+                strategy="DefaultPlayer", tile=main.Board.JAIL, min_tile_landings=landings_needed
+            )
+            assert found == expected
+        assert ids == list(range(1, 41))
+        assert trace_store.find_games(strategy="TestPlayer0") == []
+        assert trace_store.find_games(won=True) == [
+            i for i, summary in zip(ids, recorder.summaries * 2) if summary.winner_seat is not None
+        ]
+
+
+class TestJobs:
+
+    PLAYERS = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+
+    def test_resume_matches_uninterrupted_run(self, tmp_path):
+        """Verify a job stopped mid-game resumes to exactly the results of an uninterrupted run"""
+        policy = main.TerminationPolicy(max_turns=300)
+        whole = jobs.SimulationJob(tmp_path / "whole.pkl", range(6), self.PLAYERS, policy)
+        expected_stats, expected_wins = whole.run()
+
+        path = tmp_path / "resumed.pkl"
+        job = jobs.SimulationJob(
+            path, range(6), self.PLAYERS, policy, checkpoint_games=1, checkpoint_turns=50
+        )
+        take_turn = main.Game.take_turn
+        turns = []
+
+        def crash(game, player):
+            turns.append(player)
+            if len(turns) == 800:
+                raise KeyboardInterrupt()
+            take_turn(game, player)
+
+        with mock.patch("main.Game.take_turn", crash):
+            with pytest.raises(KeyboardInterrupt):
+                job.run()
+
+        resumed = jobs.SimulationJob(path, range(6), self.PLAYERS, policy)
+        assert resumed.game is not None
+        resumed_stats, resumed_wins = resumed.run()
+
+        assert resumed.done
+        assert resumed_wins == expected_wins
+        assert resumed_stats.games == expected_stats.games == 6
+        assert resumed_stats.game_turns.mean == expected_stats.game_turns.mean
+        assert resumed_stats.card_draws == expected_stats.card_draws
+        assert resumed_stats.jail_turns.counts == expected_stats.jail_turns.counts
+
+    def test_checkpoint_for_other_seeds(self, tmp_path):
+        """Verify a checkpoint is not resumed for a different range of seeds"""
+        path = tmp_path / "job.pkl"
+        jobs.SimulationJob(path, range(1), self.PLAYERS, main.TerminationPolicy(max_turns=10)).run()
+
+        with pytest.raises(ValueError):
+            jobs.SimulationJob(path, range(2), self.PLAYERS, main.TerminationPolicy(max_turns=10))
+
+    def test_checkpoint_for_other_setup(self, tmp_path):
+        """Verify a checkpoint is only resumed with the players, policy, rules and budget it was run with"""
+        path = tmp_path / "job.pkl"
+        policy = main.TerminationPolicy(max_turns=10)
+        budget = budgets.DecisionBudget(soft=1)
+        jobs.SimulationJob(path, range(2), self.PLAYERS, policy, budget=budget).run()
+
+        for players, other_policy, rules, other_budget in [
+            (self.PLAYERS[:1], policy, None, budget),
+            (self.PLAYERS, main.TerminationPolicy(max_turns=20), None, budget),
+            (self.PLAYERS, policy, main.Rules(go_salary=400), budget),
+            (self.PLAYERS, policy, None, budgets.DecisionBudget(soft=2)),
+            (self.PLAYERS, policy, None, None),
+        ]:
+            with pytest.raises(ValueError):
+                jobs.SimulationJob(path, range(2), players, other_policy, rules=rules, budget=other_budget)
+
+        resumed_budget = budgets.DecisionBudget(soft=1)
+        jobs.SimulationJob(path, range(2), self.PLAYERS, policy, rules=main.Rules(), budget=resumed_budget)
+        assert resumed_budget.latencies.keys() == budget.latencies.keys() == {"DefaultPlayer"}
+        assert resumed_budget.latency_stats["DefaultPlayer"].count == budget.latency_stats["DefaultPlayer"].count
+
+
+class TestResultCache:
+
+    PLAYERS = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+
+    def test_cached_run(self, tmp_path):
+        """Verify a repeated run comes from the cache without playing any games"""
+        result_cache = cache.ResultCache(tmp_path)
+        policy = main.TerminationPolicy(max_turns=50)
+
+        game_stats, wins = result_cache.run(self.PLAYERS, range(3), policy)
+        with mock.patch("jobs.SimulationJob.run") as mock_run:
+            cached_stats, cached_wins = result_cache.run(self.PLAYERS, range(3), policy)
+
+        mock_run.assert_not_called()
+        assert cached_wins == wins
+        assert cached_stats.tile_landings == game_stats.tile_landings
+
+    def test_key_changes(self, tmp_path):
+        """Verify the key changes with the strategies, rules, turn and auction code, policy and seeds"""
+        result_cache = cache.ResultCache(tmp_path)
+        key = result_cache.key(self.PLAYERS, range(3))
+
+        class CautiousPlayer(main.DefaultPlayer):
+            def buy_property_option(self, landing):
+                return False
+
+        assert result_cache.key(self.PLAYERS, range(3)) == key
+        assert result_cache.key(self.PLAYERS, range(4)) != key
+        assert result_cache.key(self.PLAYERS[:1] + [("TestPlayer2", CautiousPlayer)], range(3)) != key
+        assert result_cache.key(self.PLAYERS, range(3), main.TerminationPolicy(max_turns=9)) != key
+        with mock.patch("cache.rules_fingerprint", return_value="edited landings.py"):
+            assert result_cache.key(self.PLAYERS, range(3)) != key
+
+        source = cache._source
+        for edited in (main.Turn, auctions):
+            with mock.patch("cache._source", lambda obj: "edited" if obj is edited else source(obj)):
+                assert result_cache.key(self.PLAYERS, range(3)) != key
+
+    def test_key_runtime_classes(self, tmp_path):
+        """Verify compiled strategies are keyed by their strategy, and bot players by the bot's command"""
+        result_cache = cache.ResultCache(tmp_path)
+        default = strategies.compile_strategy(strategies.DEFAULT_STRATEGY)
+        cautious = strategies.compile_strategy("buy: no")
+        key = result_cache.key([("TestPlayer1", default)], range(3))
+
+        recompiled = strategies.compile_strategy(strategies.DEFAULT_STRATEGY)
+        assert result_cache.key([("TestPlayer1", recompiled)], range(3)) == key
+        assert result_cache.key([("TestPlayer1", cautious)], range(3)) != key
+
+        bot_keys = []
+        for code in ("pass", "pass", "print()"):
+            bot = bots.BotProcess([sys.executable, "-c", code])
+            try:
+                bot_keys.append(result_cache.key([("TestPlayer1", bot.player_class())], range(3)))
+            finally:
+                bot.close()
+        assert bot_keys[0] == bot_keys[1] != bot_keys[2]
+
+    def test_evict_least_recently_used(self, tmp_path):
+        """Verify the least recently used results are removed once the cache is over its size limit"""
+        result_cache = cache.ResultCache(tmp_path, max_bytes=2500)
+        result_cache.put("a", b"a" * 1000)
+        result_cache.put("b", b"b" * 1000)
+        os.utime(tmp_path / "a.pkl", (0, 0))
+        os.utime(tmp_path / "b.pkl", (1, 1))
+        result_cache.get("a")
+
+        result_cache.put("c", b"c" * 1000)
+
+        assert result_cache.get("a") is not None
+        assert result_cache.get("b") is None
+        assert result_cache.get("c") is not None
+
+
+class TestCluster:
+
+    PLAYERS = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+
+    def test_sharded_run_matches_single_process(self):
+        """Verify shards run by several local workers merge to the result of a single process run"""
+        policy = main.TerminationPolicy(max_turns=100)
+        expected_stats, expected_wins = jobs.SimulationJob(None, range(12), self.PLAYERS, policy).run()
+
+        coordinator = cluster.Coordinator(range(12), self.PLAYERS, policy, shard_size=2)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(coordinator.run()))
+        thread.start()
+
+        # A worker that dies holding a shard, which must be handed to another worker
+        with socket.create_connection(coordinator.address) as failed_worker:
+            assert cluster.recv_message(failed_worker)[0] == "shard"
+
+        workers = [
+            multiprocessing.Process(target=cluster.run_worker, args=coordinator.address)
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        thread.join(timeout=60)
+        for worker in workers:
+            worker.join(timeout=10)
+
+        game_stats, wins = results[0]
+        assert coordinator.retries == 1
+        assert wins == expected_wins
+        assert game_stats.games == 12
+        assert game_stats.tile_landings == expected_stats.tile_landings
+        assert game_stats.game_turns.mean == pytest.approx(expected_stats.game_turns.mean)
+
+
+class TestTermination:
+
+    def test_default_turn_cap(self, quiet):
+        """Verify games where nobody buys still end when run without a policy"""
+
+        class NeverBuys(main.DefaultPlayer):
+            def buy_property_option(self, landing):
+                return False
+
+        game = main.Game(seed=1)
+        game.add_player("TestPlayer1", NeverBuys)
+        game.add_player("TestPlayer2", NeverBuys)
+        game.run()
+
+        assert game.stopped_early
+        assert game.turn_count == main.TerminationPolicy.MAX_TURNS
+        assert main.TerminationPolicy(max_turns=None).max_turns is None
+
+
+class TestRules:
+
+    def test_rules_applied(self):
+        """Verify house rules change the starting cash, bank, jail fine and Go salary"""
+        rules = main.Rules(jail_fine=100, go_salary=400, starting_cash=1000, bank_cash=10000)
+        game = main.Game(rules=rules)
+        game.add_player("TestPlayer", main.PlayerBase)
+        game.current_player = game.players[0]
+
+        assert game.current_player.cash == 1000
+        assert game.bank.cash == 9000
+
+        game.current_player.in_jail = True
+        game._leave_jail(game.board.LEAVE_JAIL_PAY)
+        assert game.current_player.cash == 900
+
+        game.current_player.position = (game.board.BOARDWALK, game.board.landings[game.board.BOARDWALK])
+        game.current_player.dice.die1, game.current_player.dice.die2 = 1, 2
+        with mock.patch.object(game.board.community_chest, "select_card"):
+            game.run_turn()
+        assert game.current_player.cash == 1300
+
+    def test_sweep_grid(self):
+        """Verify a sweep runs every variant over the same seeds, matching separate runs"""
+        players = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+        policy = main.TerminationPolicy(max_turns=50)
+
+        results = sweep.sweep(
+            {"go_salary": [200, 400], "jail_fine": [50]}, range(4), players, policy, shard_size=3, workers=0
+        )
+
+        assert list(results) == [
+            main.Rules(go_salary=200, jail_fine=50),
+            main.Rules(go_salary=400, jail_fine=50),
+        ]
+        rules = main.Rules(go_salary=400)
+        expected_stats, expected_wins = jobs.SimulationJob(None, range(4), players, policy, rules=rules).run()
+        game_stats, wins = results[rules]
+        assert wins == expected_wins
+        assert game_stats.tile_landings == expected_stats.tile_landings
+        assert game_stats.cash.count == expected_stats.cash.count
+
+
+class TestImportanceSampling:
+
+    players = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+
+    @staticmethod
+    def on_electric_company(game):
+        return game.players[0].position[0] == game.board.ELECTRIC_COMPANY
+
+    def test_biased_dice_weights(self):
+        """Verify biased dice multiply the likelihood ratio by nominal over biased probability"""
+        likelihood_ratio = rare.LikelihoodRatio()
+        dice = rare.BiasedDice(random.Random(1), rare.doubles_bias(5), likelihood_ratio)
+        dice.roll()
+
+        # 6 doubles with weight 5 and 30 other pairs with weight 1
+        biased = 5 / 60 if dice.die1 == dice.die2 else 1 / 60
+        assert likelihood_ratio.ratio == pytest.approx((1 / 36) / biased)
+
+    def test_unbiased_estimate(self):
+        """
+        Verify the biased estimate of landing on Electric Company in the first turn agrees with the exact answer
+        A double six, or a 7 onto Chance and advance to the nearest utility
+        """
+        exact = 1 / 36 + 6 / 36 / 16
+        weights = [10 if pair == (6, 6) else 3 if sum(pair) == 7 else 1 for pair in rare.DICE_PAIRS]
+        sampler = rare.ImportanceSampler(
+            self.players,
+            self.on_electric_company,
+            main.TerminationPolicy(max_turns=1),
+            dice_weights=weights,
+            card_bias={("chance", landings.Chance.ADVANCE_TO_NEAREST_UTILITY): 0.5},
+        )
+        estimate = sampler.estimate(range(2000))
+
+        assert estimate.low < exact < estimate.high
+        assert estimate.effective_samples < estimate.samples
+
+        plain = rare.ImportanceSampler(
+            self.players, self.on_electric_company, main.TerminationPolicy(max_turns=1)
+        ).estimate(range(2000))
+        assert plain.effective_samples == pytest.approx(2000)
+        assert estimate.standard_error < plain.standard_error
+
+
+class TestConcurrency:
+
+    players = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+
+    def play(self, seed):
+        game = main.Game(seed=seed)
+        for name, player_obj in self.players:
+            game.add_player(name, player_obj)
+        # Threads start with logging on, whatever the thread starting them has
+        with main.logger.disabled():
+            winner = game.run(main.TerminationPolicy(max_turns=200))
+        return winner.seat, game.turn_count, [p.cash for p in game.players]
+
+    def test_threaded_games_match_serial(self, quiet):
+        """Verify games run on a thread pool give the same results as games run one after another"""
+        expected = [self.play(seed) for seed in range(8)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(self.play, range(8))) == expected
+
+    def test_logging_switch_per_context(self):
+        """Verify turning logging off only applies to the thread doing it, until it turns it back"""
+        def run_job():
+            jobs.SimulationJob(None, range(2), self.players, main.TerminationPolicy(max_turns=20)).run()
+            return main.logger.enabled
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert [executor.submit(run_job) for _ in range(2)][1].result()
+        assert main.logger.enabled
+
+        with main.logger.disabled():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                assert executor.submit(lambda: main.logger.enabled).result()
+            assert not main.logger.enabled
+        assert main.logger.enabled
+
+    def test_context_during_turn(self):
+        """Verify the current game and player are only set while a turn is running"""
+        game = main.Game(seed=1)
+        game.add_player("TestPlayer1", main.DefaultPlayer)
+        seen = []
+
+        def run_turn():
+            seen.append((main.logger.game, main.logger.player))
+
+        with mock.patch.object(game, "run_turn", run_turn):
+            game.take_turn(game.players[0])
+
+        assert seen == [(game, game.players[0])]
+        assert main.logger.game is None
+        assert main.logger.player is None
+
+    def test_log_names_game(self, capsys):
+        """Verify messages logged during a seeded game's turn name the game and the player"""
+        game = main.Game(seed=7)
+        game.add_player("TestPlayer1", main.DefaultPlayer)
+        game.take_turn(game.players[0])
+        main.log("Between turns")
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].startswith("[seed 7] [TestPlayer1] ")
+        assert lines[-1] == "tBetween turns"
+
+
+class TestEvents:
+
+    def test_events_emitted(self, game):
+        """Verify a roll onto Go To Jail emits the roll, both moves and entering jail, in order"""
+        seen = []
+        for event_type in events.EVENT_TYPES:
+            game.events.subscribe(event_type, seen.append)
+
+        player = game.current_player
+        player.position = (20, game.board.landings[20])
+
+        def roll():
+            player.dice.die1, player.dice.die2 = 4, 6
+
+        with mock.patch.object(player.dice, "roll", roll):
+            game.run_turn()
+
+        assert seen == [
+            events.Rolled(player, 4, 6),
+            events.Moved(player, game.board.GO_TO_JAIL, False),
+            events.Moved(player, game.board.JAIL, False),
+            events.JailEntered(player),
+        ]
+
+    def test_payment_and_jail_exit(self, game):
+        """Verify paying to leave jail emits the payment to the bank and leaving jail"""
+        seen = []
+        game.events.subscribe(events.Payment, seen.append)
+        game.events.subscribe(events.JailExited, seen.append)
+
+        player = game.current_player
+        player.in_jail = True
+        game._leave_jail(game.board.LEAVE_JAIL_PAY)
+
+        assert seen == [
+            events.Payment(player, game.bank, 50),
+            events.JailExited(player, game.board.LEAVE_JAIL_PAY),
+        ]
+
+    def test_unsubscribe(self):
+        """Verify unsubscribed handlers are no longer called, and unknown event types are refused"""
+        bus = events.EventBus()
+        seen = []
+        bus.subscribe(events.PassedGo, seen.append)
+        bus.emit(events.PassedGo(None))
+        bus.unsubscribe(events.PassedGo, seen.append)
+        bus.emit(events.PassedGo(None))
+
+        assert seen == [events.PassedGo(None)]
+        assert bus.handlers[events.PassedGo] == ()
+        with pytest.raises(ValueError):
+            bus.subscribe(int, seen.append)
+
+
+class TestVectorEnv:
+
+    @pytest.fixture(autouse=True)
+    def numpy(self):
+        return pytest.importorskip("numpy")
+
+    def test_reset(self):
+        """Verify reset starts a game per seed with everyone on Go with their starting cash"""
+        vector_env = env.VectorEnv(3)
+        observations = vector_env.reset([1, 2, 3])
+
+        assert observations["position"].shape == (3, 4)
+        assert (observations["position"] == 0).all()
+        assert (observations["cash"] == 1500).all()
+        assert not observations["in_jail"].any()
+        assert [game.seed for game in vector_env.games] == [1, 2, 3]
+        with pytest.raises(ValueError):
+            vector_env.reset([1])
+
+    def test_step_repeatable(self, numpy):
+        """Verify the same seeds and actions give the same observations and rewards"""
+        results = []
+        for _ in range(2):
+            vector_env = env.VectorEnv(4, policy=main.TerminationPolicy(max_turns=40))
+            vector_env.reset(range(4))
+            for action in range(20):
+                observations, rewards, dones = vector_env.step([action % len(env.ACTIONS)] * 4)
+            results.append((observations["cash"].copy(), rewards, dones))
+
+        assert (results[0][0] == results[1][0]).all()
+        assert (results[0][1] == results[1][1]).all()
+
+    def test_auto_reset(self, numpy):
+        """Verify finished games are replaced by a game on the next seed, and the rewards add up to the final share"""
+        vector_env = env.VectorEnv(2, policy=main.TerminationPolicy(max_turns=8))
+        vector_env.reset([0, 1])
+        total = numpy.zeros(2)
+        dones = numpy.zeros(2, bool)
+        games = list(vector_env.games)
+        while not dones.all():
+            _, rewards, dones = vector_env.step([4, 4])
+            total += rewards
+
+        shares = [main.TerminationPolicy.win_probabilities(game)[0] for game in games]
+        assert total == pytest.approx([share - 0.25 for share in shares])
+        assert [game.seed for game in vector_env.games] == [2, 3]
+        assert (vector_env.observations["position"] == 0).all()
+
+    def test_agent_actions(self, game):
+        """Verify the agent's action picks how it leaves jail and whether it buys"""
+        agent = env.AgentPlayer("Agent", game)
+        landing = game.board.landings[game.board.BOARDWALK]
+
+        agent.action = 4
+        assert agent.leave_jail_option() == game.board.LEAVE_JAIL_PAY
+        assert agent.buy_property_option(landing)
+
+        agent.action = 2
+        assert agent.leave_jail_option() == game.board.LEAVE_JAIL_ROLL  # No card to use
+        assert not agent.buy_property_option(landing)
+
+
+class TestBots:
+
+    players = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", main.DefaultPlayer)]
+
+    @staticmethod
+    def write_bot(tmp_path, body):
+        path = tmp_path / "bot.py"
+        path.write_text("import json, sys, time\n" + body)
+        return [sys.executable, str(path)]
+
+    def play(self, seed, player_obj, max_turns):
+        game = main.Game(seed=seed)
+        game.add_player("TestPlayer1", player_obj)
+        game.add_player("TestPlayer2", main.DefaultPlayer)
+        with main.logger.disabled():
+            game.run(main.TerminationPolicy(max_turns=max_turns))
+        return game
+
+    def test_pipelined_decisions(self, quiet, tmp_path):
+        """Verify concurrent games share a bot process, with its choices applied"""
+        choices = {"leave_jail": "pay", "buy": False, "build": []}
+        command = self.write_bot(
+            tmp_path,
+            f"choices = {choices!r}\n"
+            "for line in sys.stdin:\n"
+            "    time.sleep(0.01)\n"
+            "    reply = [{'id': r['id'], 'choice': choices[r['decision']]} for r in json.loads(line)]\n"
+            "    print(json.dumps(reply), flush=True)\n",
+        )
+        bot = bots.BotProcess(command, timeout=5, max_in_flight=4)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                games = list(executor.map(lambda seed: self.play(seed, bot.player_class(), 40), range(8)))
+        finally:
+            bot.close()
+
+        assert bot.fallbacks == 0
+        for game in games:
+            remote = [p for p in game.players + game.eliminated if p.seat == 0][0]
+            assert not game.properties.owned_by(remote)
+
+    def test_batching(self, tmp_path):
+        """Verify requests made while the bot is busy are sent to it together as one line"""
+        go = tmp_path / "go"
+        # The bot holds its answer to the first line until told to go, and answers with each line's size
+        command = self.write_bot(
+            tmp_path,
+            "import os\n"
+            "for number, line in enumerate(sys.stdin):\n"
+            "    while number == 0 and not os.path.exists(%r):\n"
+            "        time.sleep(0.001)\n"
+            "    requests = json.loads(line)\n"
+            "    print(json.dumps([{'id': r['id'], 'choice': len(requests)} for r in requests]), flush=True)\n"
+            % str(go),
+        )
+        bot = bots.BotProcess(command, timeout=30, max_batches=1)
+
+        def wait_for(condition):
+            deadline = time.monotonic() + 30
+            while not condition():
+                assert time.monotonic() < deadline
+                time.sleep(0.001)
+
+        try:
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                first = executor.submit(bot.decide, "build", {})
+                wait_for(lambda: bot.batches == 1)
+                rest = [executor.submit(bot.decide, "build", {}) for _ in range(5)]
+                wait_for(lambda: len(bot._queue) == 5)
+                go.touch()
+                assert first.result() == 1
+                assert [future.result() for future in rest] == [5] * 5
+        finally:
+            bot.close()
+
+        assert bot.batches == 2
+        assert bot.requests == 6
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            "for line in sys.stdin:\n    pass\n",  # Never answers
+            "sys.exit(1)\n",  # Crashes
+            "for line in sys.stdin:\n    print('[{\"id\": \"garbage\"}]', flush=True)\n",
+        ],
+    )
+    def test_fallback_to_default(self, quiet, tmp_path, body):
+        """Verify a bot that doesn't answer, crashes or answers nonsense plays like DefaultPlayer"""
+        bot = bots.BotProcess(self.write_bot(tmp_path, body), timeout=0.05)
+        try:
+            game = self.play(3, bot.player_class(), 8)
+            expected = self.play(3, main.DefaultPlayer, 8)
+        finally:
+            bot.close()
+
+        assert bot.requests > 0
+        assert bot.fallbacks == bot.requests
+        assert [p.cash for p in game.players] == [p.cash for p in expected.players]
+        assert [p.position[0] for p in game.players] == [p.position[0] for p in expected.players]
+
+    def test_invalid_builds(self, game_2_players):
+        """Verify builds on properties the player doesn't own or can't build on yet are refused"""
+        game = game_2_players
+        player_obj = bots.RemotePlayer("Remote", game)
+        for position in (game.board.MEDITIRANEAN_AVE, game.board.BALTIC_AVE):
+            game.properties.set_owner(position, player_obj)
+
+        assert player_obj._valid_builds([game.board.MEDITIRANEAN_AVE, game.board.BALTIC_AVE])
+        assert not player_obj._valid_builds([game.board.MEDITIRANEAN_AVE, game.board.MEDITIRANEAN_AVE])
+        assert not player_obj._valid_builds([game.board.BOARDWALK])
+        assert not player_obj._valid_builds("build everything")
+        player_obj.cash = 10
+        assert not player_obj._valid_builds([game.board.MEDITIRANEAN_AVE])
+
+
+class TestBudgets:
+
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    @pytest.fixture
+    def clock(self):
+        return self.Clock()
+
+    @pytest.fixture
+    def slow_player(self, clock):
+        class SlowPlayer(main.DefaultPlayer):
+            def buy_property_option(self, landing):
+                clock.now += 2
+                return False
+
+        return SlowPlayer
+
+    def slow_game(self, slow_player, budget):
+        game = main.Game(budget=budget)
+        game.add_player("TestPlayer", slow_player)
+        game.current_player = game.players[0]
+        return game
+
+    def test_default_move(self, clock, slow_player):
+        """Verify a decision over the hard budget is replaced by DefaultPlayer's, and counted against the strategy"""
+        budget = budgets.DecisionBudget(soft=0.5, hard=1, clock=clock)
+        game = self.slow_game(slow_player, budget)
+        game._land_on_property(game.board.BOARDWALK)
+
+        assert game.properties.owner(game.board.BOARDWALK) is game.current_player
+        assert budget.soft_overruns == {"SlowPlayer": 1}
+        assert budget.hard_overruns == {"SlowPlayer": 1}
+        assert budget.latency_stats["SlowPlayer"].max == 2
+
+        game = self.slow_game(slow_player, budgets.DecisionBudget(soft=0.5, hard=3, clock=clock))
+        game._land_on_property(game.board.BOARDWALK)
+        assert game.properties.owner(game.board.BOARDWALK) is None
+
+    def test_forfeit(self, clock, slow_player):
+        """Verify a player going over the hard budget forfeits the game"""
+        budget = budgets.DecisionBudget(hard=1, overrun=budgets.FORFEIT, clock=clock)
+        game = self.slow_game(slow_player, budget)
+        player = game.current_player
+
+        with pytest.raises(main.PlayerBankrupt):
+            game._land_on_property(game.board.BOARDWALK)
+        assert player.bankrupt
+        assert game.eliminated == [player]
+        with pytest.raises(ValueError):
+            budgets.DecisionBudget(overrun="sulk")
+
+    def test_report(self):
+        """Verify the report has every strategy's win rate and latency, from every decision made"""
+        class Strategy(main.DefaultPlayer):
+            pass
+
+        players = [("TestPlayer1", main.DefaultPlayer), ("TestPlayer2", Strategy), ("TestPlayer3", Strategy)]
+        budget = budgets.DecisionBudget(soft=0)
+        _, wins = jobs.SimulationJob(
+            None, range(5), players, main.TerminationPolicy(max_turns=60), budget=budget
+        ).run()
+        rows = budget.report(players, wins)
+
+        assert [row["strategy"] for row in rows] == ["DefaultPlayer", "Strategy"]
+        assert [row["seats"] for row in rows] == [1, 2]
+        assert sum(row["win_rate"] for row in rows) == pytest.approx(1)
+        for row in rows:
+            assert row["decisions"] > 0
+            assert row["soft_overruns"] == row["decisions"]
+            assert 0 < row["p50"] <= row["p99"] <= row["max"] * 1.02
+
+
+class TestLandingProbabilities:
+
+    @pytest.fixture
+    def landing_probabilities(self):
+        return probabilities.LandingProbabilities()
+
+    def test_one_turn(self, landing_probabilities):
+        """Verify one turn's probabilities include card moves and being sent to jail"""
+        # A double six, or a 7 onto Chance and advance to the nearest utility
+        assert landing_probabilities.landing(12, 0, 1) == pytest.approx(1 / 36 + 6 / 36 / 16)
+        # Rolling 4, or 7 onto the first Chance, where 1 card of 16 goes back 3
+        assert landing_probabilities.landing(4, 0, 1) == pytest.approx(3 / 36 + 6 / 36 / 16)
+        # Rolling 4 onto Community Chest, or 7 onto Chance and going back 3 onto Community Chest
+        chest = len(landings.CommunityChest.cards)
+        assert landing_probabilities.landing(10, 29, 1) == pytest.approx(3 / 36 / chest + 6 / 36 * (1 / 16 + 1 / 16 / chest))
+        # Only a double leaves jail before the third failed roll
+        assert sum(landing_probabilities.within(10, 1, 0)) == pytest.approx(
+            1 / 6 + 6 / 36 * 2 / 16 + 2 / 36 / 16, abs=0.05
+        )
+        for s in range(probabilities.STATES):
+            assert sum(p for p, _, _ in landing_probabilities._outcomes[s]) == pytest.approx(1)
+
+    def test_matches_games(self, quiet, landing_probabilities):
+        """Verify the chance of landing on Jail within 3 turns matches played games"""
+
+        class RollingPlayer(main.DefaultPlayer):
+            def leave_jail_option(self):
+                return self.game.board.LEAVE_JAIL_ROLL
+
+        hits = 0
+        games = 3000
+        for seed in range(games):
+            game = main.Game(seed=seed)
+            game.add_player("TestPlayer1", RollingPlayer)
+            game.add_player("TestPlayer2", RollingPlayer)
+            landed = set()
+            game.events.subscribe(
+                events.Moved, lambda event: event.player.seat == 0 and landed.add(event.position_id)
+            )
+            for _ in range(6):
+                game.take_turn(game.next_player)
+            hits += game.board.JAIL in landed
+
+        assert hits / games == pytest.approx(landing_probabilities.landing(10, 0, 3), abs=0.04)
+
+    def test_cache_bounded(self):
+        """Verify the cache holds at most cache_size results, and evicted results are worked out again"""
+        landing_probabilities = probabilities.LandingProbabilities(cache_size=100)
+        expected = probabilities.LandingProbabilities().within(5, 10)
+
+        assert landing_probabilities.within(5, 10) == pytest.approx(expected)
+        assert len(landing_probabilities._cache) <= 100
+        assert landing_probabilities.within(5, 10) == pytest.approx(expected)
+        assert landing_probabilities.within(5, 0) == (0.0,) * probabilities.BOARD_SIZE
+        with pytest.raises(ValueError):
+            probabilities.LandingProbabilities(jail_policy="card")
+
+    def test_cached_lookup_fast(self, landing_probabilities):
+        """Verify a repeated question is answered from the cache, so bots can ask inside their decision loops"""
+        with mock.patch.object(landing_probabilities, "_turn", wraps=landing_probabilities._turn) as turn:
+            expected = landing_probabilities.landing(39, 5, 10)
+            worked_out = turn.call_count
+            for _ in range(1000):
+                assert landing_probabilities.landing(39, 5, 10) == expected
+            landing_probabilities.within(6, 10)
+
+        assert worked_out == probabilities.STATES * 10
+        assert turn.call_count == worked_out
+
+    def test_landing_frequencies(self, landing_probabilities):
+        """Verify the long-run landings per turn favour Jail, and count card moves as extra landings"""
+        frequencies = landing_probabilities.landing_frequencies()
+
+        assert max(frequencies) == frequencies[main.Board.JAIL]
+        assert frequencies[main.Board.ILLINOIS_AVE] > frequencies[main.Board.PARK_PLACE]
+        assert 1 < sum(frequencies) < 1.1
+
+
+class TestTrading:
+
+    @pytest.fixture
+    def traders(self):
+        game = main.Game(seed=1)
+        game.add_player("TestPlayer1", trading.TradingPlayer)
+        game.add_player("TestPlayer2", trading.TradingPlayer)
+        game.current_player = game.players[0]
+        return game
+
+    def test_trade_moves_assets(self, quiet, game_2_players):
+        """Verify an accepted trade swaps the cash, properties and cards on both sides"""
+        game = game_2_players
+        proposer, partner = game.players
+        card = game.board.chance.select_card()
+        while card.id != landings.Chance.GET_OUT_OF_JAIL_FREE:
+            card = game.board.chance.select_card()
+        card.owner = partner
+        game.properties.set_owner(main.Board.BOARDWALK, proposer)
+        game.properties.set_owner(main.Board.PARK_PLACE, partner)
+        partner.accept_trade_option = lambda trade: True
+        traded = []
+        game.events.subscribe(events.Traded, traded.append)
+
+        trade = trading.Trade(
+            proposer,
+            partner,
+            give_cash=100,
+            give_properties=[main.Board.BOARDWALK],
+            take_properties=[main.Board.PARK_PLACE],
+            take_cards=[card],
+        )
+        assert game.propose_trade(trade) is True
+
+        assert proposer.cash == 1400 and partner.cash == 1600
+        assert game.properties.owner(main.Board.BOARDWALK) is partner
+        assert game.properties.owner(main.Board.PARK_PLACE) is proposer
+        assert proposer.get_out_of_jail_free_cards == [card]
+        assert traded == [events.Traded(trade)]
+
+    def test_declined_and_invalid_trades(self, quiet, game_2_players):
+        """Verify a declined trade changes nothing, and a trade of what a player doesn't have is refused"""
+        game = game_2_players
+        proposer, partner = game.players
+        game.properties.set_owner(main.Board.BALTIC_AVE, partner)
+        game.properties.set_owner(main.Board.MEDITIRANEAN_AVE, proposer)
+        partner.accept_trade_option = lambda trade: False
+
+        assert game.propose_trade(
+            trading.Trade(proposer, partner, give_cash=500, take_properties=[main.Board.BALTIC_AVE])
+        ) is False
+        assert game.properties.owner(main.Board.BALTIC_AVE) is partner
+        assert proposer.cash == 1500
+
+        with pytest.raises(ValueError):
+            game.propose_trade(trading.Trade(proposer, partner, give_cash=5000))
+        with pytest.raises(ValueError):
+            game.propose_trade(trading.Trade(proposer, partner, give_properties=[main.Board.BOARDWALK]))
+        with pytest.raises(ValueError):
+            game.propose_trade(trading.Trade(partner, proposer, give_cash=1))
+
+        game.properties.set_owner(main.Board.BALTIC_AVE, proposer)
+        game.properties.build(main.Board.BALTIC_AVE)
+        game.properties.set_owner(main.Board.BOARDWALK, partner)
+        with pytest.raises(ValueError):
+            game.propose_trade(
+                trading.Trade(proposer, partner, give_properties=[main.Board.MEDITIRANEAN_AVE])
+            )
+
+    def test_income_table(self, game_2_players):
+        """Verify expected income doubles for a monopoly, and is landing frequency times rent"""
+        game = game_2_players
+        table = trading.income_table()
+        frequencies = probabilities.LandingProbabilities().landing_frequencies()
+        dark_blue = [main.Board.PARK_PLACE, main.Board.BOARDWALK]
+
+        assert table.portfolio(game, [main.Board.BOARDWALK]) == pytest.approx(frequencies[39] * 50)
+        assert table.portfolio(game, dark_blue) == pytest.approx(
+            2 * (table.portfolio(game, [main.Board.PARK_PLACE]) + table.portfolio(game, [main.Board.BOARDWALK]))
+        )
+        assert trading.income_table() is table
+
+    def test_traders_complete_monopoly(self, quiet, traders):
+        """Verify a trading player buys the last property of a group, for more than it earns the seller"""
+        proposer, partner = traders.players
+        traders.properties.set_owner(main.Board.ST_JAMES_PLACE, proposer)
+        traders.properties.set_owner(main.Board.TENNESSEE_AVE, proposer)
+        traders.properties.set_owner(main.Board.NEW_YORK_AVE, partner)
+
+        trades = proposer.trade_option()
+        assert [t.take_properties for t in trades] == [(main.Board.NEW_YORK_AVE,)]
+        assert traders.propose_trade(trades[0]) is True
+        assert traders.properties.has_monopoly(proposer, landings.PropertyBase.ORANGE)
+        assert proposer.cash < 1500 < partner.cash
+        # Nothing has changed hands since, so there is nothing more to offer
+        assert proposer.trade_option() == []
+
+    def test_trading_overhead(self, quiet):
+        """Verify trades are only valued when ownership or cash changes, not every turn of a trade-heavy game"""
+        value = trading.IncomeTable.value
+        valuations = [0]
+
+        def counted_value(table, *args, **kwargs):
+            valuations[0] += 1
+            return value(table, *args, **kwargs)
+
+        traded = []
+        turns = 0
+        with mock.patch.object(trading.IncomeTable, "value", counted_value):
+            for seed in range(30):
+                game = main.Game(seed=seed)
+                game.events.subscribe(events.Traded, traded.append)
+                for i in range(4):
+                    game.add_player(f"TestPlayer{i}", trading.TradingPlayer)
+                game.run(main.TerminationPolicy(max_turns=300))
+                turns += game.turn_count
+
+        assert len(traded) > 30
+        # Two valuations for each trade accepted, and a few more for offers, well under one a turn
+        assert valuations[0] < turns / 4
+
+
+class TestAuctions:
+
+    def test_resolve(self):
+        """Verify sealed bids pay their bid, ascending ones just over the runner up, and ties go to the first bidder"""
+        bids = [("a", 100), ("b", 180), ("c", 150)]
+
+        assert auctions.resolve(bids, auctions.SEALED_BID) == ("b", 180)
+        assert auctions.resolve(bids, auctions.ASCENDING) == ("b", 160)
+        assert auctions.resolve([("a", 100), ("b", 105)], auctions.ASCENDING) == ("b", 105)
+        assert auctions.resolve([("a", 100), ("b", 100)], auctions.ASCENDING) == ("a", 100)
+        assert auctions.resolve([("a", 100)], auctions.ASCENDING) == ("a", auctions.INCREMENT)
+        assert auctions.resolve([("a", 0), ("b", 0)], auctions.SEALED_BID) == (None, 0)
+        with pytest.raises(ValueError):
+            auctions.resolve(bids, "dutch")
+        with pytest.raises(ValueError):
+            main.Rules(auction="dutch")
+
+    def test_declined_property_auctioned(self, quiet):
+        """Verify a property the player lands on and doesn't buy goes to the highest bidder, who pays the bank"""
+
+        class NeverBuys(main.DefaultPlayer):
+            def buy_property_option(self, landing):
+                return False
+
+            def bid_option(self, landing):
+                return 0
+
+        class Bidder(main.DefaultPlayer):
+            asked = 0
+
+            def bid_option(self, landing):
+                Bidder.asked += 1
+                return 300 + self.seat
+
+        game = main.Game(seed=1, rules=main.Rules(auction=auctions.ASCENDING))
+        game.add_player("TestPlayer1", NeverBuys)
+        game.add_player("TestPlayer2", Bidder)
+        game.add_player("TestPlayer3", Bidder)
+        game.current_player = game.players[0]
+        game.current_player.position = (main.Board.BOARDWALK, main.Board.landings[main.Board.BOARDWALK])
+        won = []
+        game.events.subscribe(events.AuctionWon, won.append)
+        bank_cash = game.bank.cash
+
+        game._land_on_property(main.Board.BOARDWALK)
+
+        winner = game.players[2]
+        assert game.properties.owner(main.Board.BOARDWALK) is winner
+        assert winner.cash == 1500 - 302
+        assert game.bank.cash == bank_cash + 302
+        assert won == [events.AuctionWon(winner, main.Board.BOARDWALK, 302)]
+        assert Bidder.asked == 2
+
+    def test_games_with_auctions(self, quiet):
+        """Verify games play out under either auction mode, with every property bought or auctioned"""
+        for mode in auctions.AUCTION_MODES:
+            game = main.Game(seed=2, rules=main.Rules(auction=mode))
+            game.add_player("TestPlayer1", main.DefaultPlayer)
+            game.add_player("TestPlayer2", main.DefaultPlayer)
+            won = []
+            game.events.subscribe(events.AuctionWon, won.append)
+            game.run(main.TerminationPolicy(max_turns=500))
+
+            assert won
+            assert sum(p.cash for p in game.players + game.eliminated) + game.bank.cash == 20580
+
+    def test_bot_bids_batched(self, quiet, tmp_path):
+        """Verify every player a bot plays in an auction bids in a single request line"""
+        command = TestBots.write_bot(
+            tmp_path,
+            "for line in sys.stdin:\n"
+            "    reply = [{'id': r['id'], 'choice': 100 * r['state']['seat']} for r in json.loads(line)]\n"
+            "    print(json.dumps(reply), flush=True)\n",
+        )
+        bot = bots.BotProcess(command, timeout=5)
+        try:
+            game = main.Game(seed=1, rules=main.Rules(auction=auctions.SEALED_BID))
+            player_obj = bot.player_class()
+            for i in range(4):
+                game.add_player(f"TestPlayer{i}", player_obj)
+            game.current_player = game.players[1]
+            game.current_player.position = (main.Board.BOARDWALK, main.Board.landings[main.Board.BOARDWALK])
+            game._auction(main.Board.BOARDWALK)
+        finally:
+            bot.close()
+
+        assert bot.requests == 4
+        assert bot.batches == 1
+        assert game.properties.owner(main.Board.BOARDWALK) is game.players[3]
+        assert game.players[3].cash == 1500 - 300
+
+
+class TestStrategies:
+
+    def test_default_strategy(self, quiet):
+        """Verify DefaultPlayer written in the strategy language plays exactly as DefaultPlayer does"""
+        compiled = strategies.compile_strategy(strategies.DEFAULT_STRATEGY, "DefaultStrategy")
+
+        def play(player_obj, seed):
+            game = main.Game(seed=seed, rules=main.Rules(auction=auctions.SEALED_BID))
+            game.add_player("TestPlayer1", player_obj)
+            game.add_player("TestPlayer2", player_obj)
+            game.run(main.TerminationPolicy(max_turns=500))
+            return game.turn_count, [(p.seat, p.cash) for p in game.players + game.eliminated]
+
+        for seed in range(10):
+            assert play(compiled, seed) == play(main.DefaultPlayer, seed)
+
+    def test_decisions(self, game):
+        """Verify each clause's condition is checked in order, and unlisted decisions are DefaultPlayer's"""
+        player_obj = strategies.compile_strategy(
+            "leave_jail: card if cards > 0; pay if cash >= 1000 and not jail_rolls; roll\n"
+            "bid: price // 2 if owned + 1 == group_size; 0\n"
+        )("TestPlayer", game)
+        boardwalk = main.Board.landings[main.Board.BOARDWALK]
+
+        assert player_obj.leave_jail_option() == main.Board.LEAVE_JAIL_PAY
+        player_obj.dice.jail_roll_count = 1
+        assert player_obj.leave_jail_option() == main.Board.LEAVE_JAIL_ROLL
+        assert player_obj.bid_option(boardwalk) == 0
+        game.properties.set_owner(main.Board.PARK_PLACE, player_obj)
+        assert player_obj.bid_option(boardwalk) == 200
+        assert player_obj.buy_property_option(boardwalk) is True
+
+    @pytest.mark.parametrize(
+        "strategy",
+        [
+            "leave_jail: jump",
+            "buy: yes if cahs > 1; no",
+            "buy: yes if cash >; no",
+            "bid: 100 if cash > 500",
+            "sell: 1",
+            "bid: __import__",
+            "buy: yes\nbuy: no",
+        ],
+    )
+    def test_invalid_strategies(self, strategy):
+        """Verify a strategy that isn't valid is refused when it's compiled"""
+        with pytest.raises(ValueError):
+            strategies.compile_strategy(strategy)
+
+    def test_variants(self):
+        """Verify a grid of strategies compiles to a class per variant, each pickled by its strategy"""
+        variants = sweep.grid_strategies(
+            "leave_jail: pay if cash >= {cash}; roll\nbuy: yes if cash - price >= {reserve}; no",
+            {"cash": range(0, 2000, 100), "reserve": range(0, 500, 10)},
+        )
+
+        assert len(set(variants)) == 1000
+        assert pickle.loads(pickle.dumps(variants[7])) is variants[7]
+        assert strategies.compile_strategy(variants[7].strategy) is variants[7]
+
+
+class TestTurns:
+
+    @staticmethod
+    def new_game(rules=None, seed=1):
+        game = main.Game(seed=seed, rules=rules)
+        game.add_player("TestPlayer1", main.DefaultPlayer)
+        game.add_player("TestPlayer2", main.DefaultPlayer)
+        game.current_player = game.players[0]
+        return game
+
+    @staticmethod
+    def rolls(player, *pairs):
+        """Makes the player's dice roll the pairs given, in order"""
+        pairs = iter(pairs)
+
+        def roll():
+            player.dice.die1, player.dice.die2 = next(pairs)
+
+        return mock.patch.object(player.dice, "roll", roll)
+
+    def test_doubles_roll_again(self, quiet):
+        """Verify doubles roll again with the doubles rule, and a turn is a single roll without it"""
+        game = self.new_game(main.Rules(doubles=True))
+        player = game.current_player
+        with self.rolls(player, (3, 3), (2, 5)):
+            game.take_turn(player)
+        assert player.position_id == game.board.STATES_AVE
+
+        game = self.new_game()
+        player = game.current_player
+        with self.rolls(player, (3, 3), (2, 5)):
+            game.take_turn(player)
+        assert player.position_id == game.board.ORIENTAL_AVE
+
+    def test_three_doubles_jail(self, quiet):
+        """Verify rolling doubles 3 times in a turn goes straight to jail"""
+        game = self.new_game(main.Rules(doubles=True))
+        player = game.current_player
+        with self.rolls(player, (1, 1), (4, 4), (2, 2)):
+            game.take_turn(player)
+
+        assert player.position_id == game.board.JAIL
+        assert player.in_jail is True
+
+    def test_leaving_jail_with_doubles(self, quiet):
+        """Verify leaving jail by rolling doubles moves by that roll, without rolling again"""
+        game = self.new_game(main.Rules(doubles=True))
+        player = game.current_player
+        player.position_id = game.board.JAIL
+        player.in_jail = True
+        player.cash = 900  # Too little to pay, so DefaultPlayer rolls
+        with self.rolls(player, (3, 3), (2, 5)):
+            game.take_turn(player)
+
+        assert player.in_jail is False
+        assert player.position_id == game.board.ST_JAMES_PLACE
+
+    def test_taxes(self, quiet):
+        """Verify Income Tax and Luxury Tax are paid to the bank"""
+        game = self.new_game()
+        player = game.current_player
+        bank_cash = game.bank.cash
+        with self.rolls(player, (1, 3)):
+            game.take_turn(player)
+        assert player.cash == 1500 - 200
+
+        player.position_id = game.board.SHORTLINE
+        with self.rolls(player, (1, 2)):
+            game.take_turn(player)
+        assert player.cash == 1500 - 300
+        assert game.bank.cash == bank_cash + 300
+
+    def test_card_moves_onto_tax_and_cards(self, quiet):
+        """Verify a card moving the player carries out where they end up, a tax or another card"""
+        game = self.new_game()
+        player = game.current_player
+        chance = game.board.chance
+        go_back = [c for c in chance.cards if c.id == landings.Chance.GO_BACK_THREE][0]
+        chance.cards.remove(go_back)
+        chance.cards.append(go_back)
+        with self.rolls(player, (3, 4)):
+            game.take_turn(player)
+        assert player.position_id == game.board.INCOME_TAX
+        assert player.cash == 1500 - 200
+
+        chance.cards.remove(go_back)
+        chance.cards.append(go_back)
+        community_chest = game.board.community_chest
+        drawn = community_chest.cards[-1]
+        player.position_id = game.board.CHANCE_3 - 2
+        with self.rolls(player, (1, 1)):
+            game.take_turn(player)
+        assert game.turn_card is drawn
+
+    def test_turn_suspends_at_decisions(self, quiet):
+        """Verify turns run a decision at a time play as take_turn() does, interleaved across games"""
+        games = [self.new_game(seed=seed) for seed in range(3)]
+        expected = [self.new_game(seed=seed) for seed in range(3)]
+        decisions = []
+        for _ in range(40):
+            turns = [game.begin_turn(game.next_player) for game in games]
+            pending = [turn.advance() for turn in turns]
+            while any(pending):
+                for i, (turn, decision) in enumerate(zip(turns, pending)):
+                    if decision is not None:
+                        decisions.append(decision.hook)
+                        assert turn.phase != main.Turn.DONE
+                        pending[i] = turn.advance(getattr(decision.player, decision.hook)(*decision.args))
+            for turn in turns:
+                assert turn.phase == main.Turn.DONE
+            for game in expected:
+                game.take_turn(game.next_player)
+
+        assert {"buy_property_option", "trade_option", "build_option"} <= set(decisions)
+        for game, expected_game in zip(games, expected):
+            assert game.turn_count == expected_game.turn_count == 40
+            assert [(p.position_id, p.cash) for p in game.players] == [
+                (p.position_id, p.cash) for p in expected_game.players
+            ]
+            assert main.current_game.get() is None
+
+        with pytest.raises(ValueError):
+            turns[0].advance()
+
 
 class TestBank:
 
@@ -416,6 +1966,211 @@ class TestBank:
         assert bank_cash_old == bank.cash - amount
 
 
+class TestProperties:
+
+    def test_rent_table_street(self, game_2_players):
+        """Verify street rent is looked up by houses, doubling for an unimproved monopoly"""
+        game = game_2_players
+        board = game.board
+        player = game.current_player
+
+        game.properties.set_owner(board.MEDITIRANEAN_AVE, player)
+        assert game.properties.rent(board.MEDITIRANEAN_AVE) == 2
+
+        game.properties.set_owner(board.BALTIC_AVE, player)
+        assert game.properties.rent(board.MEDITIRANEAN_AVE) == 4
+
+        game.properties.houses[board.MEDITIRANEAN_AVE] = 3
+        assert game.properties.rent(board.MEDITIRANEAN_AVE) == 90
+
+    def test_monopoly_tracked_incrementally(self, game_2_players):
+        """Verify a color group's monopoly flag follows ownership changes"""
+        game = game_2_players
+        board = game.board
+        player1, player2 = game.players
+
+        for position in board.groups[landings.PropertyBase.DARK_BLUE]:
+            game.properties.set_owner(position, player1)
+
+        assert game.properties.has_monopoly(player1, landings.PropertyBase.DARK_BLUE)
+        assert game.properties.monopoly[board.PARK_PLACE] is True
+
+        game.properties.set_owner(board.BOARDWALK, player2)
+
+        assert not game.properties.has_monopoly(player1, landings.PropertyBase.DARK_BLUE)
+        assert game.properties.monopoly[board.PARK_PLACE] is False
+        assert game.properties.monopoly[board.BOARDWALK] is False
+
+    def test_rent_railroads_and_utilities(self, game_2_players):
+        """Verify railroad rent scales with railroads owned, and utilities multiply the dice"""
+        game = game_2_players
+        board = game.board
+        player = game.current_player
+
+        game.properties.set_owner(board.READING_RAILROAD, player)
+        game.properties.set_owner(board.SHORTLINE, player)
+        assert game.properties.rent(board.READING_RAILROAD) == 50
+
+        game.properties.set_owner(board.ELECTRIC_COMPANY, player)
+        assert game.properties.rent(board.ELECTRIC_COMPANY, 7) == 28
+        game.properties.set_owner(board.WATER_WORKS, player)
+        assert game.properties.rent(board.ELECTRIC_COMPANY, 7) == 70
+
+    def test_game_land_on_property_pays_rent(self, game_2_players):
+        """Verify landing on another player's property pays them rent"""
+        game = game_2_players
+        board = game.board
+        player1, player2 = game.players
+        game.properties.set_owner(board.BOARDWALK, player2)
+
+        player1_cash, player2_cash = player1.cash, player2.cash
+        game._land_on_property(board.BOARDWALK)
+
+        assert player1.cash == player1_cash - 50
+        assert player2.cash == player2_cash + 50
+
+    def test_game_land_on_property_buys(self):
+        """Verify landing on an unowned property lets the player buy it"""
+        game = main.Game()
+        game.add_player("TestPlayer", main.DefaultPlayer)
+        game.current_player = game.players[0]
+        bank_cash = game.bank.cash
+
+        game._land_on_property(game.board.BOARDWALK)
+
+        assert game.properties.owner(game.board.BOARDWALK) is game.current_player
+        assert game.current_player.cash == 1500 - 400
+        assert game.bank.cash == bank_cash + 400
+
+
+class TestBuildings:
+
+    @pytest.fixture
+    def game(self, game_2_players):
+        game = game_2_players
+        for position in game.board.groups[landings.PropertyBase.DARK_BLUE]:
+            game.properties.set_owner(position, game.current_player)
+        return game
+
+    def test_build_evenly(self, game):
+        """Verify houses must be built evenly across a color group"""
+        game._build_house(game.board.PARK_PLACE)
+
+        assert game.properties.can_build(game.board.PARK_PLACE) is False
+        assert game.properties.can_build(game.board.BOARDWALK) is True
+        with pytest.raises(ValueError):
+            game._build_house(game.board.PARK_PLACE)
+
+    def test_build_hotel_returns_houses(self, game):
+        """Verify building a hotel swaps the 4 houses on a property for a hotel from the bank"""
+        game.current_player.cash = 5000
+        for _ in range(4):
+            game._build_house(game.board.PARK_PLACE)
+            game._build_house(game.board.BOARDWALK)
+
+        assert game.bank.houses == main.Bank.HOUSES - 8
+        assert game.properties.building_counts(game.current_player) == (8, 0)
+
+        game._build_house(game.board.BOARDWALK)
+
+        assert game.bank.houses == main.Bank.HOUSES - 4
+        assert game.bank.hotels == main.Bank.HOTELS - 1
+        assert game.properties.building_counts(game.current_player) == (4, 1)
+        assert game.properties.rent(game.board.BOARDWALK) == 2000
+
+    def test_build_house_shortage(self, game):
+        """Verify nothing can be built once the bank runs out of houses"""
+        game.bank.houses = 0
+
+        assert game.properties.can_build(game.board.PARK_PLACE) is False
+
+    def test_sell_hotel(self, game):
+        """Verify selling a hotel breaks it down into 4 houses taken from the bank"""
+        game.properties.houses[game.board.PARK_PLACE] = properties.HOTEL
+        game.properties.hotel_counts[game.current_player.id] = 1
+        game.bank.hotels -= 1
+
+        game.properties.sell(game.board.PARK_PLACE)
+
+        assert game.bank.hotels == main.Bank.HOTELS
+        assert game.bank.houses == main.Bank.HOUSES - 4
+        assert game.properties.building_counts(game.current_player) == (4, 0)
+
+    def test_pay_repairs(self, game):
+        """Verify repair cards charge per house and per hotel owned"""
+        game.properties.house_counts[game.current_player.id] = 3
+        game.properties.hotel_counts[game.current_player.id] = 2
+        cash = game.current_player.cash
+
+        game._pay_repairs(40, 115)
+
+        assert game.current_player.cash == cash - 3 * 40 - 2 * 115
+
+
+class TestLedger:
+
+    @pytest.fixture
+    def game(self):
+        game = main.Game(journal=True)
+        for name in ["TestPlayer1", "TestPlayer2", "TestPlayer3"]:
+            game.add_player(name, main.PlayerBase)
+        game.current_player = game.players[0]
+        return game
+
+    def test_collect_from_each_player(self, game):
+        """Verify the current player collects from every other player in one batch"""
+        game._collect_from_each_player(10)
+
+        assert [p.cash for p in game.players] == [1520, 1490, 1490]
+        assert game.ledger.batch_count == 1
+
+    def test_transfer_batch_is_atomic(self, game):
+        """Verify no cash moves when any payer in a batch cannot cover their payment"""
+        game.players[2].cash = 30
+        bank_cash = game.bank.cash
+
+        with pytest.raises(ledger.InsufficientFunds) as error:
+            game.ledger.transfer_batch(
+                [(p, game.current_player, 50) for p in game.players[1:]]
+            )
+
+        assert error.value.shortfalls == {game.players[2]: 20}
+        assert [p.cash for p in game.players] == [1500, 1500, 30]
+        assert game.bank.cash == bank_cash
+
+    def test_transfer_batch_conserves_cash(self, game):
+        """Verify a batch moves cash without creating or destroying any"""
+        total = game.bank.cash + sum(p.cash for p in game.players)
+
+        game._pay_each_player(50)
+        game._bank_collect(200)
+        game._bank_pay(75)
+
+        assert game.bank.cash + sum(p.cash for p in game.players) == total
+
+    def test_transfer_batch_checks_total(self, game):
+        """Verify a batch paying a player from another game is refused, without moving any cash"""
+        outsider = main.PlayerBase("Outsider", main.Game())
+
+        with pytest.raises(ValueError):
+            game.ledger.transfer_batch([(game.players[1], game.current_player, 50), (game.bank, outsider, 100)])
+
+        assert [p.cash for p in game.players] == [1500, 1500, 1500]
+        assert outsider.cash == 1500
+        assert game.ledger.batch_count == 0
+
+    def test_journal(self, game):
+        """Verify the journal records each transfer by account number"""
+        game._bank_collect(200)
+        game._pay_each_player(50)
+
+        assert list(game.ledger.entries()) == [
+            (0, ledger.Ledger.BANK, 1, 200),
+            (1, 1, 2, 50),
+            (1, 1, 3, 50),
+        ]
+
+
 class TestPlayer:
 
     def test_player_get_out_of_jail_free_cards(self, game):
@@ -477,3 +2232,19 @@ class TestPlayer:
 
         assert returned_amount is None
         assert cash == game.current_player.cash
+
+    def test_player_position(self, game):
+        """Verify the position pair is a view of the player's position id"""
+        player = game.current_player
+        player.position_id = game.board.BOARDWALK
+        assert player.position == (game.board.BOARDWALK, game.board.landings[game.board.BOARDWALK])
+
+        player.position = (game.board.JAIL, game.board.landings[game.board.JAIL])
+        assert player.position_id == game.board.JAIL
+
+    def test_player_ids(self, game_2_players):
+        """Verify players get distinct integer ids"""
+        first, second = game_2_players.players
+
+        assert isinstance(first.id, int)
+        assert first.id != second.id
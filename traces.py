@@ -0,0 +1,143 @@
+import os
+
+try:
+    import numpy
+except ImportError:  # numpy is only needed for writing and reading traces
+    numpy = None
+
+import landings
+
+CARD_NONE = -1
+COMMUNITY_CHEST_OFFSET = len(landings.Chance.cards)
+
+# Column name -> numpy type, one .npy file is written per column
+COLUMNS = {
+    "game": "<i8",  # The game's number within the trace, in the order games finish
+    "seed": "<i8",  # The game's seed, -1 for unseeded games
+    "player": "<i1",  # The player's seat at the table
+    "die1": "<i1",
+    "die2": "<i1",
+    "position": "<i1",  # Position at the end of the turn
+    "cash": "<i4",  # Cash at the end of the turn
+    "in_jail": "|b1",
+    "card": "<i1",  # See card_code()
+}
+
+HEADER_SIZE = 128  # Fixed .npy header size, so the header can be rewritten in place as a column grows
+
+
+def card_code(card):
+    """
+    Returns a small integer identifying a card across both decks
+    Chance cards keep their id, Community Chest cards are offset by COMMUNITY_CHEST_OFFSET
+    """
+    if card is None:
+        return CARD_NONE
+    if card.deck_code_name == "community_chest":
+        return card.id + COMMUNITY_CHEST_OFFSET
+    return card.id
+
+
+def _npy_header(dtype, length):
+    """Returns a version 1.0 .npy header, padded to HEADER_SIZE bytes"""
+    header = f"{{'descr': '{dtype}', 'fortran_order': False, 'shape': ({length},), }}"
+    header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + (len(header)).to_bytes(2, "little") + header.encode("latin1")
+
+
+class _Column:
+    """A single growable column, memory mapped to a .npy file"""
+
+    def __init__(self, path, dtype, capacity):
+        self.path = path
+        self.dtype = numpy.dtype(dtype)
+        with open(path, "wb") as f:
+            f.write(_npy_header(dtype, capacity))
+        self.data = None
+        self._map(capacity)
+
+    def _map(self, capacity):
+        if self.data is not None:
+            self.data.flush()
+            self.data = None
+
+        with open(self.path, "r+b") as f:
+            f.write(_npy_header(self.dtype.str, capacity))
+            f.truncate(HEADER_SIZE + capacity * self.dtype.itemsize)
+
+        self.data = numpy.memmap(
+            self.path, dtype=self.dtype, mode="r+", offset=HEADER_SIZE, shape=(capacity,)
+        )
+
+    def grow(self, capacity):
+        self._map(capacity)
+
+    def close(self, length):
+        """Trims the file down to the rows written"""
+        self.data.flush()
+        self.data = None
+        with open(self.path, "r+b") as f:
+            f.write(_npy_header(self.dtype.str, length))
+            f.truncate(HEADER_SIZE + length * self.dtype.itemsize)
+
+
+class TraceWriter:
+    """
+    Records one row per player turn into a directory of memory mapped .npy files, one per column
+
+    Columns are preallocated and doubled in size when they fill up. Pass an instance to Game(trace=...)
+    for every game in a run, then close() it. Read the trace back with read_trace().
+    """
+
+    def __init__(self, directory, capacity=1 << 16):
+        if numpy is None:
+            raise ImportError("Writing traces requires numpy")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.capacity = capacity
+        self.length = 0
+        self.games = 0  # Games finished so far
+        self.columns = {
+            name: _Column(os.path.join(directory, f"{name}.npy"), dtype, capacity)
+            for name, dtype in COLUMNS.items()
+        }
+
+    def record_turn(self, game, player):
+        """Called at the end of each player turn, before the dice are reset"""
+        if self.length == self.capacity:
+            self.capacity *= 2
+            for column in self.columns.values():
+                column.grow(self.capacity)
+
+        row = self.length
+        columns = self.columns
+        columns["game"].data[row] = self.games
+        columns["seed"].data[row] = game.seed if game.seed is not None else -1
+        columns["player"].data[row] = player.seat
+        columns["die1"].data[row] = player.dice.die1 or 0
+        columns["die2"].data[row] = player.dice.die2 or 0
+        columns["position"].data[row] = player.position_id
+        columns["cash"].data[row] = player.cash
+        columns["in_jail"].data[row] = player.in_jail
+        columns["card"].data[row] = card_code(game.turn_card)
+        self.length += 1
+
+    def record_game(self, game):
+        """Called once a game has finished"""
+        self.games += 1
+
+    def close(self):
+        for column in self.columns.values():
+            column.close(self.length)
+
+
+def read_trace(directory):
+    """Returns a dict of column name to a read-only, memory mapped numpy array"""
+    if numpy is None:
+        raise ImportError("Reading traces requires numpy")
+
+    return {
+        name: numpy.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        for name in COLUMNS
+    }
@@ -0,0 +1,189 @@
+import functools
+from operator import itemgetter
+
+import landings
+import main
+import probabilities
+
+AVERAGE_ROLL = 7  # Utilities are valued at the rent of an average dice total
+CARD_VALUE = 50  # A Get Out of Jail Free card saves the jail fine
+HORIZON = 50  # Opponent turns a trade is valued over
+
+# Each color group with a getter for the owners of its positions, every group has at least 2
+GROUP_OWNERS = [(group, positions, itemgetter(*positions)) for group, positions in main.Board.groups.items()]
+
+
+class Trade:
+    """
+    An offer from one player to another: what the proposer gives, and what they take in return
+
+    Properties are positions, and cards are Get Out of Jail Free cards held by the player giving them.
+    Properties in a color group with buildings on it can't be traded until the buildings are sold.
+    """
+
+    def __init__(
+        self,
+        proposer,
+        partner,
+        give_cash=0,
+        take_cash=0,
+        give_properties=(),
+        take_properties=(),
+        give_cards=(),
+        take_cards=(),
+    ):
+        self.proposer = proposer
+        self.partner = partner
+        self.give_cash = give_cash
+        self.take_cash = take_cash
+        self.give_properties = tuple(give_properties)
+        self.take_properties = tuple(take_properties)
+        self.give_cards = tuple(give_cards)
+        self.take_cards = tuple(take_cards)
+
+    def sides(self, player):
+        """Returns what the player gives and takes as (cash, properties, cards) pairs"""
+        given = (self.give_cash, self.give_properties, self.give_cards)
+        taken = (self.take_cash, self.take_properties, self.take_cards)
+        return (given, taken) if player is self.proposer else (taken, given)
+
+    def __repr__(self):
+        return (
+            f"Trade({self.proposer.name} gives ${self.give_cash}, {list(self.give_properties)},"
+            f" {len(self.give_cards)} cards for ${self.take_cash}, {list(self.take_properties)},"
+            f" {len(self.take_cards)} cards from {self.partner.name})"
+        )
+
+
+class IncomeTable:
+    """
+    Expected rent per opponent turn for every property in every state it can be in
+
+    Keyed like the board's rent table, each entry is the long-run chance of an opponent landing on
+    the position in a turn times the rent. Valuing a trade is then a lookup per property involved,
+    rather than playing out games with and without it.
+    """
+
+    def __init__(self, jail_policy=main.Board.LEAVE_JAIL_ROLL):
+        frequencies = probabilities.LandingProbabilities(jail_policy).landing_frequencies()
+        self.income = {}
+        for key, rent in main.Board.rent_table.items():
+            position = key[0]
+            if main.Board.landings[position].is_utility:
+                rent *= AVERAGE_ROLL
+            self.income[key] = frequencies[position] * rent
+
+    def portfolio(self, game, positions):
+        """Returns the expected rent per opponent turn of a set of positions held by one player"""
+        board = game.board
+        houses = game.properties.houses
+        group_counts = {}
+        for position in positions:
+            group = board.landings[position].group
+            group_counts[group] = group_counts.get(group, 0) + 1
+        railroads = group_counts.get(landings.PropertyBase.RAILROAD, 0)
+        utilities = group_counts.get(landings.PropertyBase.UTILITY, 0)
+
+        total = 0.0
+        for position in positions:
+            landing = board.landings[position]
+            if landing.is_railroad:
+                key = (position, 0, False, railroads, 0)
+            elif landing.is_utility:
+                key = (position, 0, False, 0, utilities)
+            else:
+                monopoly = group_counts[landing.group] == len(board.groups[landing.group])
+                key = (position, houses[position], monopoly, 0, 0)
+            total += self.income[key]
+        return total
+
+    def value(self, game, player, trade, horizon=HORIZON):
+        """Returns what the trade is worth to one side of it in dollars, its cash and cards plus the rent it changes"""
+        (give_cash, give_properties, give_cards), (take_cash, take_properties, take_cards) = trade.sides(player)
+        # Only the groups changing hands change in rent
+        board = game.board
+        owners = game.properties.owners
+        groups = {board.landings[p].group for p in give_properties + take_properties}
+        owned = [p for group in groups for p in board.groups[group] if owners[p] is player]
+        after = [p for p in owned if p not in give_properties] + list(take_properties)
+        income = self.portfolio(game, after) - self.portfolio(game, owned)
+        opponents = len(game.players) - 1
+        return (
+            take_cash
+            - give_cash
+            + (len(take_cards) - len(give_cards)) * CARD_VALUE
+            + income * opponents * horizon
+        )
+
+
+@functools.lru_cache
+def income_table(jail_policy=main.Board.LEAVE_JAIL_ROLL):
+    """Returns the IncomeTable for a jail policy, built once and shared by every game"""
+    return IncomeTable(jail_policy)
+
+
+class TradingPlayer(main.DefaultPlayer):
+    """
+    DefaultPlayer, but trading to complete color groups
+
+    It offers cash for the properties it's missing from any group where it has all the rest,
+    when a single player holds them. It accepts trades that are worth something to it and no more to the
+    other side, so its offers split what a monopoly is worth to both of them, keeping $500 on hand.
+    Offers are only looked for again once a property changes hands, or it can afford one it couldn't.
+    """
+
+    reserve = 500
+    _ownership_changes = None  # Ownership changes when offers were last looked for
+    _cheapest_waiting = float("inf")  # The cheapest offer it couldn't afford then
+    _prices = None  # group -> (owners, players left, price or None for no deal) when the group was last valued
+
+    def trade_option(self):
+        game = self.game
+        game_properties = game.properties
+        cash = self.cash - self.reserve
+        if game_properties.ownership_changes == self._ownership_changes and cash < self._cheapest_waiting:
+            return []
+        self._ownership_changes = game_properties.ownership_changes
+        self._cheapest_waiting = float("inf")
+        if self._prices is None:
+            self._prices = {}
+
+        all_owners = game_properties.owners
+        trades = []
+        # Nobody can have built in a group with more than one owner, so the groups looked at have no buildings
+        for group, positions, get_owners in GROUP_OWNERS:
+            owners = get_owners(all_owners)
+            if self not in owners:
+                continue
+            missing = [p for p, owner in zip(positions, owners) if owner is not self]
+            partner = all_owners[missing[0]] if missing else None
+            if partner is None or any(all_owners[p] is not partner for p in missing):
+                continue
+
+            # A trade's value only depends on who owns the group and how many players are left
+            trade = Trade(self, partner, take_properties=missing)
+            last = self._prices.get(group)
+            if last is not None and last[0] == owners and last[1] == len(game.players):
+                price = last[2]
+            else:
+                table = income_table()
+                gain = table.value(game, self, trade)
+                loss = -table.value(game, partner, trade)
+                price = int((gain + loss) / 2) + 1
+                if not loss < price < gain:
+                    price = None
+                self._prices[group] = (owners, len(game.players), price)
+            if price is None:
+                continue
+            if price > cash:
+                self._cheapest_waiting = min(self._cheapest_waiting, price)
+                continue
+            trade.give_cash = price
+            trades.append(trade)
+            cash -= price
+        return trades
+
+    def accept_trade_option(self, trade):
+        table = income_table()
+        own_value = table.value(self.game, self, trade)
+        return own_value > 0 and own_value >= table.value(self.game, trade.proposer, trade)